@@ -0,0 +1,89 @@
+"""Run the simulation from asyncio code without blocking the event loop.
+
+Used in the Logic Simulator project to embed the simulator in asyncio
+services. A long run is split into chunks of cycles, each executed with
+Network.run_cycles(), and control goes back to the event loop between
+chunks, so other tasks keep running and the run can be cancelled.
+
+Classes
+-------
+AsyncSimulator - runs the network in chunks from asyncio code.
+"""
+import asyncio
+
+
+class AsyncSimulator:
+
+    """Run the network in chunks of cycles from asyncio code.
+
+    A chunk runs to completion once started, and the network and monitors
+    are only left between chunks, so they are consistent whenever another
+    task sees them: every cycle completed has been recorded by the
+    monitors. Cancelling the task running run() or iterating chunks()
+    raises asyncio.CancelledError in it at the next chunk boundary.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    stimulus: optional stimulus.Stimulus() of switch changes applied during
+              the runs.
+    budget: optional budget.Budget() that stops the runs, between cycles,
+            once it is spent or cancelled.
+
+    Public methods
+    --------------
+    run(self, cycles, chunk=1000): Executes the network for the number of
+                                   cycles, a chunk at a time.
+
+    chunks(self, cycles, chunk=1000): Yields the signals of the monitors
+                                      after every chunk.
+    """
+
+    def __init__(self, network, monitors, stimulus=None, budget=None):
+        """Store the simulation to run."""
+        self.network = network
+        self.monitors = monitors
+        self.stimulus = stimulus
+        self.budget = budget
+
+        # Cycle of the last run, counted from 0, that failed, or None
+        self.failed = None
+
+    async def run(self, cycles, chunk=1000):
+        """Execute the network for the number of cycles, a chunk at a time.
+
+        The monitors record every cycle. Return the cycle of the run,
+        counted from 0, that failed or did not settle, or None.
+        """
+        async for _ in self.chunks(cycles, chunk):
+            pass
+        return self.failed
+
+    async def chunks(self, cycles, chunk=1000):
+        """Yield the signals of the monitors in every chunk of the cycles.
+
+        Each item is {(device_id, output_id): array.array of signals}, as
+        returned by Network.run_cycles(). The run stops after the chunk of
+        the first cycle that fails, which is yielded without that cycle, and
+        self.failed is set to the cycle. The run also stops after the chunk
+        in which the budget is spent or cancelled. Raise a ValueError if
+        chunk is not a positive number of cycles.
+        """
+        if chunk < 1:
+            raise ValueError("chunk must be a positive number of cycles")
+        self.failed = None
+        executed = 0
+        while executed < cycles:
+            size = min(chunk, cycles - executed)
+            [signals, failed] = self.network.run_cycles(size, self.monitors,
+                                                        self.stimulus,
+                                                        self.budget)
+            if failed is not None:
+                self.failed = executed + failed
+            executed += size
+            yield signals
+            if self.failed is not None or (self.budget is not None and
+                                           self.budget.stopped is not None):
+                return
+            await asyncio.sleep(0)  # let the other tasks run
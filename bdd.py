@@ -0,0 +1,389 @@
+"""Evaluate combinational logic symbolically with binary decision diagrams.
+
+Used in the Logic Simulator project to find the output functions of
+circuits with too many switches to simulate every combination of them (see
+truthtable.py). Every gate output is built as a reduced ordered binary
+decision diagram (BDD) over the switches, so questions such as "for which
+switch settings is G9 HIGH" or "are G3 and G7 the same function" are
+answered from the diagrams, in time that depends on their size rather than
+on the 2^k combinations of k switches.
+
+Classes
+-------
+BDD - stores reduced ordered binary decision diagrams and combines them.
+SymbolicNetwork - builds the diagram of every gate output of a network.
+"""
+
+
+class BDD:
+
+    """Store reduced ordered binary decision diagrams and combine them.
+
+    A diagram is referred to by the number of its root node. Node 0 is the
+    constant FALSE and node 1 the constant TRUE. Every other node tests a
+    variable, numbered from 0 in the order of the diagram, and has a low
+    child for the variable LOW and a high child for HIGH, both testing later
+    variables. Nodes are hash-consed in a unique table, so no two nodes
+    test the same variable with the same children, and no node has two
+    equal children. Two diagrams are then the same function exactly when
+    they are the same node.
+
+    Every operation is computed by ite(), if-then-else, whose results are
+    memoized in a computed table. The computed table is a cache: it is
+    cleared when it reaches cache_limit entries, which only costs time. The
+    unique table holds the diagrams themselves, so a ValueError is raised
+    when it would exceed node_limit nodes.
+
+    The operations recurse once per variable, so the number of variables
+    must stay well below the recursion limit.
+
+    Parameters
+    ----------
+    variable_count: number of variables.
+    node_limit: largest number of nodes, or None for no limit.
+    cache_limit: largest number of memoized ite() results.
+
+    Public methods
+    --------------
+    get_variable(self, variable): Returns the diagram of a variable.
+
+    make_node(self, variable, low, high): Returns the node testing the
+                                          variable, from the unique table.
+
+    ite(self, f, g, h): Returns the diagram of if f then g else h.
+
+    negate(self, f): Returns the diagram of not f.
+
+    conjoin(self, f, g): Returns the diagram of f and g.
+
+    disjoin(self, f, g): Returns the diagram of f or g.
+
+    exclusive_or(self, f, g): Returns the diagram of f xor g.
+
+    evaluate(self, f, values): Returns the value of f for a list of variable
+                               values.
+
+    count_assignments(self, f): Returns the number of assignments of the
+                                variables for which f is TRUE.
+
+    count_nodes(self, f): Returns the number of nodes of the diagram.
+
+    get_cubes(self, f): Yields the partial assignments for which f is TRUE.
+    """
+
+    def __init__(self, variable_count, node_limit=None, cache_limit=100000):
+        """Make the unique and computed tables with the two constants."""
+        if variable_count < 0:
+            raise ValueError("variable_count must not be negative")
+        if cache_limit < 1:
+            raise ValueError("cache_limit must be a positive number")
+        [self.FALSE, self.TRUE] = range(2)
+
+        self.variable_count = variable_count
+        self.node_limit = node_limit
+        self.cache_limit = cache_limit
+
+        # Node n tests variable[n], with children low[n] and high[n]. The
+        # constants test variable_count, after every variable.
+        self.variable = [variable_count, variable_count]
+        self.low = [self.FALSE, self.TRUE]
+        self.high = [self.FALSE, self.TRUE]
+        self.unique = {}  # {(variable, low, high): node}
+        self.computed = {}  # {(f, g, h): node of ite(f, g, h)}
+
+    def get_variable(self, variable):
+        """Return the diagram of the variable."""
+        if not 0 <= variable < self.variable_count:
+            raise ValueError("No variable " + str(variable))
+        return self.make_node(variable, self.FALSE, self.TRUE)
+
+    def make_node(self, variable, low, high):
+        """Return the node testing the variable with the children.
+
+        The node is taken from the unique table, and only made if there is
+        none. Raise a ValueError if a new node would exceed node_limit.
+        """
+        if low == high:  # the variable makes no difference
+            return low
+        key = (variable, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.variable)
+            if self.node_limit is not None and node >= self.node_limit:
+                raise ValueError("The BDD node limit of " +
+                                 str(self.node_limit) + " nodes is reached")
+            self.variable.append(variable)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def ite(self, f, g, h):
+        """Return the diagram of if f then g else h."""
+        if f == self.TRUE:
+            return g
+        if f == self.FALSE:
+            return h
+        if g == h:
+            return g
+        if g == self.TRUE and h == self.FALSE:
+            return f
+        key = (f, g, h)
+        node = self.computed.get(key)
+        if node is not None:
+            return node
+
+        # Split on the first variable tested by any of the diagrams
+        variable = self.variable
+        top = min(variable[f], variable[g], variable[h])
+        [f_low, f_high] = [self.low[f], self.high[f]] \
+            if variable[f] == top else [f, f]
+        [g_low, g_high] = [self.low[g], self.high[g]] \
+            if variable[g] == top else [g, g]
+        [h_low, h_high] = [self.low[h], self.high[h]] \
+            if variable[h] == top else [h, h]
+        node = self.make_node(top, self.ite(f_low, g_low, h_low),
+                              self.ite(f_high, g_high, h_high))
+
+        if len(self.computed) >= self.cache_limit:
+            self.computed.clear()
+        self.computed[key] = node
+        return node
+
+    def negate(self, f):
+        """Return the diagram of not f."""
+        return self.ite(f, self.FALSE, self.TRUE)
+
+    def conjoin(self, f, g):
+        """Return the diagram of f and g."""
+        return self.ite(f, g, self.FALSE)
+
+    def disjoin(self, f, g):
+        """Return the diagram of f or g."""
+        return self.ite(f, self.TRUE, g)
+
+    def exclusive_or(self, f, g):
+        """Return the diagram of f xor g."""
+        return self.ite(f, self.negate(g), g)
+
+    def evaluate(self, f, values):
+        """Return True if f is TRUE when variable n has values[n]."""
+        while f not in [self.FALSE, self.TRUE]:
+            f = self.high[f] if values[self.variable[f]] else self.low[f]
+        return f == self.TRUE
+
+    def count_assignments(self, f):
+        """Return the number of assignments of every variable for which f
+        is TRUE."""
+        counts = {self.FALSE: 0, self.TRUE: 1}  # from the node's variable on
+
+        def count(node):
+            if node not in counts:
+                low = self.low[node]
+                high = self.high[node]
+                skipped = self.variable[node] + 1
+                counts[node] = (
+                    count(low) << (self.variable[low] - skipped)) + (
+                    count(high) << (self.variable[high] - skipped))
+            return counts[node]
+
+        return count(f) << self.variable[f]
+
+    def count_nodes(self, f):
+        """Return the number of nodes of the diagram f, with its
+        constants."""
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                if node not in [self.FALSE, self.TRUE]:
+                    stack.extend([self.low[node], self.high[node]])
+        return len(seen)
+
+    def get_cubes(self, f):
+        """Yield the partial assignments for which f is TRUE.
+
+        Each cube is {variable: False or True} for the variables tested on a
+        path from f to TRUE. The variables it leaves out can take either
+        value, so the cubes cover every assignment for which f is TRUE, and
+        no assignment twice.
+        """
+        stack = [(f, {})]
+        while stack:
+            [node, cube] = stack.pop()
+            if node == self.TRUE:
+                yield cube
+            elif node != self.FALSE:
+                variable = self.variable[node]
+                for child, value in [(self.high[node], True),
+                                     (self.low[node], False)]:
+                    child_cube = dict(cube)
+                    child_cube[variable] = value
+                    stack.append((child, child_cube))
+
+
+class SymbolicNetwork:
+
+    """Build the diagram of every gate output in terms of the switches.
+
+    The switches are the variables, in the order of the devices list. The
+    gates are built in the order of their strongly connected components
+    (see schedule.Schedule.find_components()), so the diagrams of the
+    inputs of a gate are built before it. A gate on a feedback loop, or
+    driven by a D-type, clock, RC or SIGGEN device, or by such a gate, is
+    not a function of the switches alone and gets no diagram; neither does
+    a gate with an unconnected input.
+
+    Signals are named as in the definition files and the monitors, such as
+    "G9" or "SW1", and switch assignments are {switch name: LOW or HIGH}
+    dictionaries, as the scenarios of bitsim.BitParallel.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    node_limit: largest number of nodes of the diagrams, or None for no
+                limit.
+    cache_limit: largest number of memoized ite() results.
+
+    Public methods
+    --------------
+    build(self): Builds the diagrams of the switches and gates.
+
+    get_function(self, signal_name): Returns the diagram of a signal.
+
+    count_assignments(self, signal_name): Returns the number of switch
+                                          assignments for which the signal
+                                          is HIGH.
+
+    find_assignments(self, signal_name): Yields the switch assignments for
+                                         which the signal is HIGH.
+
+    is_equivalent(self, first_name, second_name): Returns True if two
+                                                  signals are the same
+                                                  function of the switches.
+
+    find_difference(self, first_name, second_name): Returns a switch
+                                                    assignment for which two
+                                                    signals differ.
+    """
+
+    def __init__(self, names, devices, network, node_limit=None,
+                 cache_limit=100000):
+        """Build the diagrams of the network."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.node_limit = node_limit
+        self.cache_limit = cache_limit
+
+        self.switch_ids = []  # the switch of every variable
+        self.bdd = None
+        self.functions = {}  # {device_id: diagram of its output}
+        self.unsupported = {}  # {device_id: why it has no diagram}
+        self.build()
+
+    def build(self):
+        """Build the diagrams of the switches and gates of the network.
+
+        Raise a ValueError if the diagrams exceed node_limit.
+        """
+        devices = self.devices
+        self.switch_ids = devices.find_devices(devices.SWITCH)
+        bdd = self.bdd = BDD(len(self.switch_ids), self.node_limit,
+                             self.cache_limit)
+        self.functions = {switch_id: bdd.get_variable(variable)
+                          for variable, switch_id in
+                          enumerate(self.switch_ids)}
+        self.unsupported = {}
+
+        gates = [device for device in devices.devices_list
+                 if device.device_kind in devices.gate_types]
+        combine = {devices.AND: bdd.conjoin, devices.NAND: bdd.conjoin,
+                   devices.OR: bdd.disjoin, devices.NOR: bdd.disjoin,
+                   devices.XOR: bdd.exclusive_or}
+        for component in self.network.schedule.find_components(gates):
+            if len(component) > 1 or self.drives_itself(component[0]):
+                for device_id in component:
+                    self.unsupported[device_id] = "is on a feedback loop"
+                continue
+            [device_id] = component
+            device = devices.get_device(device_id)
+            operands = []
+            for connected_output in device.inputs.values():
+                if connected_output is None:
+                    self.unsupported[device_id] = "has an unconnected input"
+                    break
+                driver_id = connected_output[0]
+                if driver_id not in self.functions:
+                    self.unsupported[device_id] = \
+                        "is not a function of the switches alone"
+                    break
+                operands.append(self.functions[driver_id])
+            else:
+                function = operands[0]
+                for operand in operands[1:]:
+                    function = combine[device.device_kind](function, operand)
+                if device.device_kind in [devices.NAND, devices.NOR]:
+                    function = bdd.negate(function)
+                self.functions[device_id] = function
+
+    def drives_itself(self, device_id):
+        """Return True if the gate drives one of its own inputs."""
+        device = self.devices.get_device(device_id)
+        return any(connected_output is not None and
+                   connected_output[0] == device_id
+                   for connected_output in device.inputs.values())
+
+    def get_function(self, signal_name):
+        """Return the diagram of the signal.
+
+        Raise a ValueError if the signal is not the output of a switch or a
+        gate, or has no diagram.
+        """
+        [device_id, output_id] = self.devices.get_signal_ids(signal_name)
+        if device_id in self.unsupported:
+            raise ValueError(signal_name + " " + self.unsupported[device_id])
+        if device_id not in self.functions or output_id is not None:
+            raise ValueError("Not the output of a switch or a gate: " +
+                             signal_name)
+        return self.functions[device_id]
+
+    def get_assignment(self, cube):
+        """Return the switch assignment of a cube of the diagrams."""
+        return {self.names.get_name_string(self.switch_ids[variable]):
+                self.devices.HIGH if value else self.devices.LOW
+                for variable, value in cube.items()}
+
+    def count_assignments(self, signal_name):
+        """Return the number of assignments of every switch for which the
+        signal is HIGH."""
+        return self.bdd.count_assignments(self.get_function(signal_name))
+
+    def find_assignments(self, signal_name):
+        """Yield the switch assignments for which the signal is HIGH.
+
+        The switches an assignment leaves out can be either LOW or HIGH, so
+        the assignments cover every setting of the switches for which the
+        signal is HIGH, without listing the settings one by one.
+        """
+        for cube in self.bdd.get_cubes(self.get_function(signal_name)):
+            yield self.get_assignment(cube)
+
+    def is_equivalent(self, first_name, second_name):
+        """Return True if the signals are HIGH for the same switch
+        settings."""
+        return self.get_function(first_name) == \
+            self.get_function(second_name)
+
+    def find_difference(self, first_name, second_name):
+        """Return a switch assignment for which the signals differ, or None
+        if they are equivalent."""
+        difference = self.bdd.exclusive_or(self.get_function(first_name),
+                                           self.get_function(second_name))
+        for cube in self.bdd.get_cubes(difference):
+            return self.get_assignment(cube)
+        return None
@@ -0,0 +1,421 @@
+"""Simulate many switch settings of the network at once.
+
+Used in the Logic Simulator project to run the same network under a list of
+switch settings (scenarios) in a single pass. Each signal is held as two
+Python integers used as bit masks, with bit k belonging to scenario k, so
+every device is evaluated once for all the scenarios with the bitwise
+operators &, | and ^.
+
+Classes
+-------
+BitParallel - simulates a list of scenarios bit-parallel.
+"""
+import collections
+
+from oscillation import LoopDetector
+
+BLOCK_CYCLES = 64  # cycles of source outputs filled at a time by default
+
+
+class BitParallel:
+
+    """Simulate a list of switch settings of the network bit-parallel.
+
+    A signal is stored as a pair of bit masks (level, edge): the level is the
+    value the signal settles to and the edge is set while it is RISING or
+    FALLING, so LOW is (0, 0), HIGH (1, 0), RISING (1, 1) and FALLING (0, 1).
+    With this encoding, Network.update_signal() becomes level = target and
+    edge = target ^ old level. Every scenario goes through exactly the steps of
+    network.Network.settle_network(): a scenario stops iterating once it is
+    steady or oscillates, while the others carry on, so each scenario gets the
+    same traces as a sweep of the network with its switch settings.
+
+    Outputs and inputs can be held LOW or HIGH in chosen scenarios, to
+    simulate stuck-at faults (see faultsim.FaultSimulator).
+
+    The run starts from the current state of the network (signals, D-type
+    memories, clock counters and cycles completed), which is left unchanged.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_switch_masks(self, scenarios): Returns the switch states of every
+                                       scenario as bit masks.
+
+    reset(self, lanes): Loads the state of the network into every scenario.
+
+    get_signal(self, key, lane): Returns the signal of an output in one
+                                 scenario.
+
+    get_state(self, keys, lane): Returns the state of the outputs at keys in
+                                 one scenario.
+
+    detect_loops(self, detectors, keys, lanes): Returns the scenarios whose
+                                                outputs are proven to repeat.
+
+    fill_sources(self, cycles): Fills the outputs of the clocks, RC and
+                                SIGGEN devices for a block of cycles.
+
+    execute_cycle(self, switch_masks): Executes one simulation cycle of every
+                                       scenario.
+
+    run(self, scenarios, cycles): Runs every scenario for the number of cycles
+                                  and returns their monitor traces.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the simulator."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # Stuck-at faults, {(device_id, port_id): [stuck LOW, stuck HIGH]} as
+        # bit masks of the scenarios
+        self.output_faults = {}
+        self.input_faults = {}
+
+        self.every = 0  # bit mask of every scenario
+        self.level = {}  # {(device_id, output_id): level bit mask}
+        self.edge = {}  # {(device_id, output_id): edge bit mask}
+        self.memory = {}  # {device_id: D-type memory bit mask}
+        self.cycles_completed = 0
+
+        # The outputs of the clocks, RC and SIGGEN devices in a block of
+        # cycles, {(device_id, None): [(level, edge) bit masks]}
+        self.source_block = {}
+        self.block_start = 0
+        self.block_cycles = 0
+
+        # steady_states[k][n] is True if scenario k settled in cycle n
+        self.steady_states = []
+
+    def get_switch_masks(self, scenarios):
+        """Return {switch_id: bit mask of the scenarios where it is HIGH}.
+
+        scenarios is a list of {switch name: LOW or HIGH} dictionaries. A
+        switch missing from a scenario keeps its current state. Raise a
+        ValueError for a name that is not a switch or an invalid state.
+        """
+        devices = self.devices
+        masks = {}
+        for device in devices.devices_list:
+            if device.device_kind == devices.SWITCH and \
+                    device.switch_state == devices.HIGH:
+                masks[device.device_id] = (1 << len(scenarios)) - 1
+            elif device.device_kind == devices.SWITCH:
+                masks[device.device_id] = 0
+        for lane, scenario in enumerate(scenarios):
+            for name, state in scenario.items():
+                switch_id = self.names.query(name)
+                if switch_id not in masks:
+                    raise ValueError("Not a switch: " + str(name))
+                if state not in [devices.LOW, devices.HIGH]:
+                    raise ValueError("Invalid state for switch " + str(name) +
+                                     ": " + str(state))
+                if state == devices.HIGH:
+                    masks[switch_id] |= 1 << lane
+                else:
+                    masks[switch_id] &= ~(1 << lane)
+        return masks
+
+    def reset(self, lanes):
+        """Load the state of the network into every one of the scenarios.
+
+        Raise a ValueError if the network has an unconnected input, a
+        signal that is not LOW, HIGH, RISING or FALLING, or gates folded to
+        constants or merged (see schedule.Schedule).
+        """
+        devices = self.devices
+        network = self.network
+        if not network.check_network():
+            raise ValueError("The network has unconnected inputs")
+        network.sweep_order()  # rebuild the schedule if the network changed
+        network.wheel.sync()  # bring the clock counters up to date
+        if network.schedule.folded or network.schedule.merged:
+            raise ValueError("Gates folded or merged by the schedule cannot "
+                             "be simulated bit-parallel")
+
+        every = self.every = (1 << lanes) - 1
+        self.level = {}
+        self.edge = {}
+        for device in devices.devices_list:
+            for output_id, signal in device.outputs.items():
+                if signal not in [devices.LOW, devices.HIGH, devices.RISING,
+                                  devices.FALLING]:
+                    raise ValueError("Invalid signal at " + str(
+                        devices.get_signal_name(device.device_id, output_id)))
+                key = (device.device_id, output_id)
+                self.level[key] = 0
+                self.edge[key] = 0
+                self.store(key, every if signal in [devices.HIGH,
+                                                    devices.RISING] else 0,
+                           every if signal in [devices.RISING,
+                                               devices.FALLING] else 0)
+        self.memory = {device.device_id: every if device.dtype_memory ==
+                       devices.HIGH else 0
+                       for device in devices.devices_list
+                       if device.device_kind == devices.D_TYPE}
+        self.cycles_completed = network.cycles_completed
+        self.source_block = {}
+        self.block_start = self.cycles_completed
+        self.block_cycles = 0
+
+    def get_signal(self, key, lane):
+        """Return the signal of the output at key in one scenario."""
+        devices = self.devices
+        bit = 1 << lane
+        if self.edge[key] & bit:
+            return devices.RISING if self.level[key] & bit else \
+                devices.FALLING
+        return devices.HIGH if self.level[key] & bit else devices.LOW
+
+    def get_state(self, keys, lane):
+        """Return the level and edge bits of the outputs at keys, and every
+        D-type memory bit, in one scenario."""
+        return tuple((self.level[key] >> lane & 1) |
+                     (self.edge[key] >> lane & 1) << 1 for key in keys) + \
+            tuple(memory >> lane & 1 for memory in self.memory.values())
+
+    def detect_loops(self, detectors, keys, lanes):
+        """Add the state of every scenario in the lanes bit mask to its
+        oscillation.LoopDetector() in the detectors dictionary.
+
+        Return the bit mask of the scenarios whose state is proven to repeat,
+        as in Network.settle_component() and Network.sweep_network().
+        """
+        proven = 0
+        lane = 0
+        while lanes >> lane:
+            if lanes >> lane & 1:
+                detector = detectors.setdefault(lane, LoopDetector())
+                if detector.add(self.get_state(keys, lane)):
+                    proven |= 1 << lane
+            lane += 1
+        return proven
+
+    def store(self, key, level, edge):
+        """Store the signal of an output, apply its stuck-at faults, and
+        return the scenarios where it changed."""
+        if key in self.output_faults:
+            [stuck_low, stuck_high] = self.output_faults[key]
+            level = (level & ~stuck_low) | stuck_high
+            edge &= ~(stuck_low | stuck_high)
+        changed = (level ^ self.level[key]) | (edge ^ self.edge[key])
+        self.level[key] = level
+        self.edge[key] = edge
+        return changed
+
+    def read(self, device, input_id):
+        """Return the (level, edge) bit masks seen at an input."""
+        key = device.inputs[input_id]
+        level = self.level[key]
+        edge = self.edge[key]
+        if (device.device_id, input_id) in self.input_faults:
+            [stuck_low, stuck_high] = self.input_faults[(device.device_id,
+                                                         input_id)]
+            level = (level & ~stuck_low) | stuck_high
+            edge &= ~(stuck_low | stuck_high)
+        return [level, edge]
+
+    def update(self, key, target, active, keep_edges=False):
+        """Move the output at key towards the target in the active scenarios,
+        as Network.update_signal(), and return the scenarios where it
+        changed."""
+        old_level = self.level[key]
+        old_edge = self.edge[key]
+        new_edge = target ^ old_level
+        if keep_edges:
+            new_edge |= old_edge
+        return self.store(key, (target & active) | (old_level & ~active),
+                          (new_edge & active) | (old_edge & ~active))
+
+    def get_gate_target(self, device):
+        """Return the bit mask of the scenarios where the gate output is
+        HIGH once settled."""
+        devices = self.devices
+        kind = device.device_kind
+        target = None
+        for input_id in device.inputs:
+            signal = self.read(device, input_id)[0]
+            if target is None:
+                target = signal
+            elif kind in [devices.AND, devices.NAND]:
+                target &= signal
+            elif kind in [devices.OR, devices.NOR]:
+                target |= signal
+            else:  # XOR
+                target ^= signal
+        if kind in [devices.NAND, devices.NOR]:
+            target = ~target & self.every
+        return target
+
+    def execute_d_type(self, device, active):
+        """Execute a D-type, as Network.execute_d_type(), and return the
+        scenarios where an output changed."""
+        devices = self.devices
+        [clk_level, clk_edge] = self.read(device, devices.CLK_ID)
+        [data_level, data_edge] = self.read(device, devices.DATA_ID)
+        [set_level, set_edge] = self.read(device, devices.SET_ID)
+        [clear_level, clear_edge] = self.read(device, devices.CLEAR_ID)
+        rising = clk_level & clk_edge & active
+        # DATA is HIGH or FALLING exactly where level ^ edge is set
+        data_high = data_level ^ data_edge
+        new = (self.memory[device.device_id] & ~rising) | (data_high & rising)
+        new |= set_level & ~set_edge & active
+        new &= ~(clear_level & ~clear_edge & active)
+        self.memory[device.device_id] = new
+        changed = self.update((device.device_id, devices.Q_ID), new, active)
+        changed |= self.update((device.device_id, devices.QBAR_ID),
+                               ~new & self.every, active)
+        return changed
+
+    def settle_component(self, component, active):
+        """Settle a feedback component, as Network.settle_component(), in
+        every active scenario.
+
+        Return [changed, unsettled], the scenarios where an output changed
+        and those where the component did not settle.
+        """
+        changed = 0
+        for device in component:
+            changed |= self.update((device.device_id, None),
+                                   self.get_gate_target(device), active)
+        unsettled = changed & active
+        keys = [(device.device_id, None) for device in component]
+        detectors = {}
+        proven = 0
+        for _ in range(self.network.iteration_limit):
+            if not unsettled:
+                break
+            pass_changed = 0
+            for device in component:
+                pass_changed |= self.update((device.device_id, None),
+                                            self.get_gate_target(device),
+                                            unsettled, keep_edges=True)
+            changed |= pass_changed
+            unsettled = pass_changed
+            proven |= self.detect_loops(detectors, keys, unsettled)
+            unsettled &= ~proven
+        return [changed, unsettled | proven]
+
+    def fill_sources(self, cycles):
+        """Fill the outputs of the clocks, RC and SIGGEN devices for a block
+        of cycles from this cycle on.
+
+        The block of every device is sliced from its waveform in one step
+        (see Network.get_source_block()), and is the same in every scenario.
+        """
+        devices = self.devices
+        every = self.every
+        self.block_start = self.cycles_completed
+        self.block_cycles = cycles
+        self.source_block = {}
+        for device in self.network.schedule.sources:
+            if device.device_kind not in [devices.CLOCK, devices.RC,
+                                          devices.SIGGEN]:
+                continue
+            block = self.network.get_source_block(
+                device, self.cycles_completed, cycles)
+            self.source_block[(device.device_id, None)] = [
+                (every if signal in [devices.HIGH, devices.RISING] else 0,
+                 every if signal in [devices.RISING, devices.FALLING] else 0)
+                for signal in block]
+
+    def tick_sources(self):
+        """Update the clocks, RC and SIGGEN devices for this cycle from the
+        block filled by fill_sources(), filling a new block if it ran out."""
+        index = self.cycles_completed - self.block_start
+        if index >= self.block_cycles:
+            self.fill_sources(BLOCK_CYCLES)
+            index = 0
+        for key, block in self.source_block.items():
+            [level, edge] = block[index]
+            self.store(key, level, edge)
+
+    def execute_cycle(self, switch_masks):
+        """Execute one simulation cycle of every scenario.
+
+        switch_masks is {switch_id: bit mask of the scenarios where it is
+        HIGH}. Return the bit mask of the scenarios that settled.
+        """
+        devices = self.devices
+        network = self.network
+        schedule = network.schedule
+        self.tick_sources()
+
+        active = self.every
+        steady = 0
+        iterations = 0
+        keys = [(device.device_id, output_id) for device, output_id in
+                network.get_state_outputs(schedule.order)]
+        detectors = {}
+        while active and iterations < network.iteration_limit:
+            iterations += 1
+            changed = 0
+            oscillating = 0
+            for device in schedule.sources:
+                key = (device.device_id, None)
+                if device.device_kind == devices.SWITCH:
+                    changed |= self.update(key,
+                                           switch_masks[device.device_id],
+                                           active)
+                elif device.device_kind == devices.D_TYPE:
+                    changed |= self.execute_d_type(device, active)
+                else:  # execute_clock() completes a RISING or FALLING edge
+                    edges = self.edge[key] & active
+                    changed |= self.store(key, self.level[key],
+                                          self.edge[key] & ~edges)
+            for component, cyclic in zip(schedule.components,
+                                         schedule.cyclic):
+                if cyclic:
+                    [component_changed, unsettled] = self.settle_component(
+                        component, active)
+                    changed |= component_changed
+                    oscillating |= unsettled
+                else:
+                    device = component[0]
+                    changed |= self.update((device.device_id, None),
+                                           self.get_gate_target(device),
+                                           active)
+            # Scenarios stop at the end of a pass where they settled or a
+            # feedback component oscillated
+            steady |= active & ~changed & ~oscillating
+            active &= changed & ~oscillating
+            if iterations > 2:
+                active &= ~self.detect_loops(detectors, keys, active)
+        self.cycles_completed += 1
+        return steady
+
+    def run(self, scenarios, cycles):
+        """Run every scenario for the number of cycles.
+
+        Return a list with one monitor dictionary per scenario, in the form of
+        Monitors.monitors_dictionary: {(device_id, output_id): [signals]}.
+        Raise a ValueError if the network has an unconnected input or a
+        signal that is not LOW, HIGH, RISING or FALLING.
+        """
+        lanes = len(scenarios)
+        switch_masks = self.get_switch_masks(scenarios)
+        self.reset(lanes)
+        self.fill_sources(cycles)
+
+        traces = [collections.OrderedDict((key, list(signals))
+                                          for key, signals in
+                                          self.monitors.monitors_dictionary
+                                          .items())
+                  for _ in range(lanes)]
+        self.steady_states = [[] for _ in range(lanes)]
+        for _ in range(cycles):
+            steady = self.execute_cycle(switch_masks)
+            for lane in range(lanes):
+                self.steady_states[lane].append(bool(steady >> lane & 1))
+                for key, signals in traces[lane].items():
+                    signals.append(self.get_signal(key, lane))
+        return traces
@@ -0,0 +1,99 @@
+"""Bound simulation runs by wall-clock time, cycles and cancellation.
+
+Used in the Logic Simulator project to stop runaway simulations, such as a
+pathological netlist asked for millions of cycles on a shared server,
+without killing the process. A budget is checked between cycles, so a run
+it stops keeps every completed cycle recorded in the monitors and the
+network is left in a consistent state, ready to be continued.
+
+Classes
+-------
+Budget - limits a run and lets another thread or a signal handler cancel it.
+"""
+import time
+
+
+class Budget:
+
+    """Limit the cycles and wall-clock time of runs, and cancel them.
+
+    The clock starts when the budget is made, and the cycles are counted
+    over every run given the budget, so one budget can bound a whole
+    session of several runs. Runs call allow_cycle() before each cycle and
+    stop, with a partial result, as soon as it returns False. Checking the
+    budget reads a flag, a counter and the monotonic clock, which costs
+    much less than a cycle.
+
+    cancel() only sets a flag, so it may be called from another thread, a
+    signal handler or an asyncio task, and takes effect before the next
+    cycle.
+
+    Parameters
+    ----------
+    seconds: wall-clock time, in seconds, after which no cycle is started,
+             or None for no time limit.
+    cycles: number of cycles that may be executed, or None for no limit.
+
+    Public methods
+    --------------
+    cancel(self): Stops the runs before their next cycle.
+
+    is_cancelled(self): Returns True if the budget has been cancelled.
+
+    allow_cycle(self): Returns True and counts a cycle, or False once the
+                       budget is spent or cancelled.
+
+    get_text(self): Returns why the runs were stopped.
+    """
+
+    def __init__(self, seconds=None, cycles=None):
+        """Start the clock of the budget."""
+        if seconds is not None and seconds < 0:
+            raise ValueError("seconds must not be negative")
+        if cycles is not None and cycles < 0:
+            raise ValueError("cycles must not be negative")
+        [self.CANCELLED, self.TIME_LIMIT, self.CYCLE_LIMIT] = range(3)
+
+        self.seconds = seconds
+        self.cycles = cycles
+        self.deadline = None if seconds is None else \
+            time.monotonic() + seconds
+        self.cancelled = False
+        self.cycles_used = 0  # cycles allowed so far
+        self.stopped = None  # why the budget stopped a run, or None
+
+    def cancel(self):
+        """Stop the runs given the budget before their next cycle."""
+        self.cancelled = True
+
+    def is_cancelled(self):
+        """Return True if the budget has been cancelled."""
+        return self.cancelled
+
+    def allow_cycle(self):
+        """Return True, counting the cycle, if one more cycle may run.
+
+        Otherwise record why in self.stopped and return False.
+        """
+        if self.cancelled:
+            self.stopped = self.CANCELLED
+        elif self.cycles is not None and self.cycles_used >= self.cycles:
+            self.stopped = self.CYCLE_LIMIT
+        elif self.deadline is not None and \
+                time.monotonic() >= self.deadline:
+            self.stopped = self.TIME_LIMIT
+        else:
+            self.cycles_used += 1
+            return True
+        return False
+
+    def get_text(self):
+        """Return why the runs were stopped, or None if they were not."""
+        if self.stopped == self.CANCELLED:
+            return "Cancelled after " + str(self.cycles_used) + " cycles"
+        elif self.stopped == self.CYCLE_LIMIT:
+            return "Cycle limit of " + str(self.cycles) + " cycles reached"
+        elif self.stopped == self.TIME_LIMIT:
+            return ("Time limit of " + str(self.seconds) + " seconds "
+                    "reached after " + str(self.cycles_used) + " cycles")
+        return None
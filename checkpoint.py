@@ -0,0 +1,225 @@
+"""Save the state of a simulation and restore it later.
+
+Used in the Logic Simulator project to resume long runs, after a crash for
+example, and to start experiments from a state that took many cycles to
+reach, without simulating those cycles again.
+
+Classes
+-------
+Checkpoint - encodes and restores the state of a simulation.
+
+Functions
+---------
+get_byte(signal): Returns a signal or state as a byte.
+
+get_id(port_id): Returns a port ID as a 32-bit field.
+
+get_value(field, none): Returns the value of a decoded field.
+"""
+import struct
+
+MAGIC = b"LSCK"  # first bytes of every snapshot
+VERSION = 1
+NONE = 0xFFFFFFFF  # stands for None in a 32-bit field
+NO_SIGNAL = 0xFF  # stands for None in a signal byte
+
+HEADER = struct.Struct("<4sBQII")  # magic, version, cycles, devices, monitors
+DEVICE = struct.Struct("<IIBBBI")  # id, kind, outputs, memory, switch, counter
+OUTPUT = struct.Struct("<IB")  # output id, signal
+MONITOR = struct.Struct("<IIQB")  # device id, output id, length, has trace
+
+
+class Checkpoint:
+
+    """Encode the state of a simulation as bytes and restore it.
+
+    The state is every device output, D-type memory, clock counter and
+    switch state, the cycles completed by the network and the length of
+    every monitor trace. Each field is packed with the struct module into a
+    few bytes, so a snapshot of a network with thousands of devices takes
+    kilobytes. The traces themselves can be included as one byte per
+    recorded signal.
+
+    A snapshot can only be restored into a network with the same devices,
+    as made from the same definition file. The schedule and engine of the
+    network are rebuilt after restore(), since they cache signals.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    snapshot(self, traces=False): Returns the state of the simulation as
+                                  bytes.
+
+    restore(self, data): Restores the state of the simulation from a
+                         snapshot.
+
+    save(self, path, traces=True): Writes a snapshot to a checkpoint file.
+
+    load(self, path): Restores the state of the simulation from a checkpoint
+                      file.
+    """
+
+    def __init__(self, devices, network, monitors):
+        """Store the simulation to take snapshots of."""
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+    def snapshot(self, traces=False):
+        """Return the state of the simulation as bytes.
+
+        If traces is True, the monitor traces are included, not only their
+        lengths.
+        """
+        devices_list = self.devices.devices_list
+        monitors_dictionary = self.monitors.monitors_dictionary
+        self.network.wheel.sync()  # bring the clock counters up to date
+        parts = [HEADER.pack(MAGIC, VERSION, self.network.cycles_completed,
+                             len(devices_list), len(monitors_dictionary))]
+        for device in devices_list:
+            parts.append(DEVICE.pack(
+                device.device_id, device.device_kind, len(device.outputs),
+                get_byte(device.dtype_memory), get_byte(device.switch_state),
+                NONE if device.clock_counter is None
+                else device.clock_counter))
+            for output_id, signal in device.outputs.items():
+                parts.append(OUTPUT.pack(get_id(output_id),
+                                         get_byte(signal)))
+        for (device_id, output_id), signal_list in \
+                monitors_dictionary.items():
+            parts.append(MONITOR.pack(device_id, get_id(output_id),
+                                      len(signal_list), traces))
+            if traces:
+                parts.append(bytes(get_byte(signal)
+                                   for signal in signal_list))
+        return b"".join(parts)
+
+    def restore(self, data):
+        """Restore the state of the simulation from a snapshot.
+
+        Monitors without a trace in the snapshot are cut back to their
+        recorded lengths. Monitors removed since the snapshot are made
+        again, with BLANK signals where their trace is not in the snapshot,
+        and monitors made since are removed. Raise a ValueError, before
+        anything is changed, if data is not a snapshot of this network or
+        a trace is shorter than in the snapshot.
+        """
+        [cycles, device_states, monitor_states] = self.decode(data)
+        self.network.invalidate_schedule()  # engines cache the signals
+        self.monitors.unshare_traces()
+        for device, memory, switch, counter, outputs in device_states:
+            device.dtype_memory = memory
+            device.switch_state = switch
+            device.clock_counter = counter
+            device.outputs.update(outputs)
+        monitors_dictionary = self.monitors.monitors_dictionary
+        keys = [key for key, length, signal_list in monitor_states]
+        for key in list(monitors_dictionary):
+            if key not in keys:
+                self.monitors.remove_monitor(*key)
+        for key, length, signal_list in monitor_states:
+            if key not in monitors_dictionary:
+                self.monitors.make_monitor(*key, cycles_completed=length)
+            if signal_list is None:
+                del monitors_dictionary[key][length:]
+            else:
+                monitors_dictionary[key] = signal_list
+        self.network.cycles_completed = cycles
+
+    def decode(self, data):
+        """Return the state in a snapshot, checked against the network.
+
+        The state is [cycles completed, [[device, memory, switch, counter,
+        {output_id: signal}]], [[monitor, length, trace or None]]].
+        """
+        try:
+            [magic, version, cycles, device_count,
+             monitor_count] = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a version " + str(VERSION) +
+                                 " simulation snapshot")
+            offset = HEADER.size
+
+            devices_list = self.devices.devices_list
+            if device_count != len(devices_list):
+                raise ValueError("the snapshot has " + str(device_count) +
+                                 " devices, the network " +
+                                 str(len(devices_list)))
+            device_states = []
+            for device in devices_list:
+                [device_id, kind, output_count, memory, switch,
+                 counter] = DEVICE.unpack_from(data, offset)
+                offset += DEVICE.size
+                if device_id != device.device_id or \
+                        kind != device.device_kind or \
+                        output_count != len(device.outputs):
+                    raise ValueError("the snapshot is of another network")
+                outputs = {}
+                for _ in range(output_count):
+                    [output_id, signal] = OUTPUT.unpack_from(data, offset)
+                    offset += OUTPUT.size
+                    output_id = get_value(output_id, NONE)
+                    if output_id not in device.outputs:
+                        raise ValueError(
+                            "the snapshot is of another network")
+                    outputs[output_id] = get_value(signal)
+                device_states.append([device, get_value(memory),
+                                      get_value(switch),
+                                      get_value(counter, NONE), outputs])
+
+            monitor_states = []
+            for _ in range(monitor_count):
+                [device_id, output_id, length,
+                 has_trace] = MONITOR.unpack_from(data, offset)
+                offset += MONITOR.size
+                key = (device_id, get_value(output_id, NONE))
+                signal_list = None
+                device = self.devices.get_device(device_id)
+                if device is None or key[1] not in device.outputs:
+                    raise ValueError("the snapshot is of another network")
+                if has_trace:
+                    trace = data[offset:offset + length]
+                    offset += length
+                    if len(trace) != length:
+                        raise ValueError("the snapshot is truncated")
+                    signal_list = [get_value(signal) for signal in trace]
+                elif key in self.monitors.monitors_dictionary and \
+                        len(self.monitors.monitors_dictionary[key]) < length:
+                    raise ValueError("the trace of " +
+                                     self.devices.get_signal_name(*key) +
+                                     " is shorter than in the snapshot")
+                monitor_states.append([key, length, signal_list])
+        except struct.error:
+            raise ValueError("the snapshot is truncated")
+        return [cycles, device_states, monitor_states]
+
+    def save(self, path, traces=True):
+        """Write a snapshot, by default with the traces, to a file."""
+        data = self.snapshot(traces)
+        with open(path, "wb") as checkpoint_file:
+            checkpoint_file.write(data)
+
+    def load(self, path):
+        """Restore the state of the simulation from a checkpoint file."""
+        with open(path, "rb") as checkpoint_file:
+            self.restore(checkpoint_file.read())
+
+
+def get_byte(signal):
+    """Return a signal or state as a byte, NO_SIGNAL for None."""
+    return NO_SIGNAL if signal is None else signal
+
+
+def get_id(port_id):
+    """Return a port ID as a 32-bit field, NONE for None."""
+    return NONE if port_id is None else port_id
+
+
+def get_value(field, none=NO_SIGNAL):
+    """Return the value of a decoded field, None if it is none."""
+    return None if field == none else field
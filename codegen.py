@@ -0,0 +1,318 @@
+"""Compile the network into a single Python function.
+
+Used in the Logic Simulator project as an alternative to the sweep engine in
+network.py. The schedule of a parsed network is turned into the source code
+of one function, with a local variable per output and the logic of every
+gate and D-type written out in line, so a simulation cycle costs no method
+calls or dictionary look-ups per device.
+
+Classes
+-------
+CompiledEngine - generates, compiles and runs the function for a network.
+"""
+from oscillation import LoopDetector
+
+
+class CompiledEngine:
+
+    """Generate, compile and run a Python function for the network.
+
+    The generated function executes the devices in exactly the order and
+    with exactly the rules of network.Network.settle_network(), which is
+    how the default sweep engine settles every cycle, so the signal traces
+    are identical. Signals are held as the integers LOW (0), HIGH (1),
+    RISING (2) and FALLING (3). Compiled code is cached by its source, so
+    networks with the same structure share it. The cache keeps the
+    cache_limit most recently used functions.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    invalidate(self): Discards the compiled function so that it is rebuilt
+                      before the next cycle.
+
+    generate(self): Returns the source code of the function for the network.
+
+    build(self): Generates and compiles the function for the network.
+
+    execute_network(self): Executes the compiled function for one simulation
+                           cycle.
+    """
+
+    # {source code: code object}, shared by every network, least recently
+    # used first
+    code_cache = {}
+    cache_limit = 16
+
+    def __init__(self, network):
+        """Initialise the engine without a compiled function."""
+        self.network = network
+        self.devices = network.devices
+
+        self.cycle = None  # the compiled function
+        self.order = []  # the devices, in the order of the generated code
+        self.state_outputs = []  # (device, output_id) of the state tuple
+        self.connected = False
+        self.device_count = None
+
+    def invalidate(self):
+        """Discard the function so that it is rebuilt before the next cycle."""
+        self.device_count = None
+
+    def generate(self):
+        """Return the source code of the function for the network.
+
+        Return None if an input is unconnected, since the sweep engine must
+        then produce its partial results.
+        """
+        devices = self.devices
+        schedule = self.network.schedule
+        self.order = schedule.order
+        position = {device.device_id: k for k, device in enumerate(self.order)}
+
+        # Local variable holding each output
+        variables = {}
+        for k, device in enumerate(self.order):
+            if device.device_kind == devices.D_TYPE:
+                variables[(device.device_id, devices.Q_ID)] = "q" + str(k)
+                variables[(device.device_id, devices.QBAR_ID)] = "b" + str(k)
+            else:
+                variables[(device.device_id, None)] = "s" + str(k)
+
+        inputs = []
+        for device in self.order:
+            names = {}
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    return None
+                elif connected_output[0] in schedule.folded:
+                    names[input_id] = str(schedule.folded[
+                        connected_output[0]])
+                elif schedule.resolve(connected_output) not in variables:
+                    return None
+                else:
+                    names[input_id] = variables[schedule.resolve(
+                        connected_output)]
+            inputs.append(names)
+
+        def get_tuple(names):
+            return "(" + "".join(name + ", " for name in names) + ")"
+
+        operators = {devices.AND: " & ", devices.OR: " | ",
+                     devices.NAND: " & ", devices.NOR: " | ",
+                     devices.XOR: " ^ "}
+
+        def change(indent, k, assignments):
+            return [indent + assignments,
+                    indent + "st = False",
+                    indent + "if track:",
+                    indent + "    ch.append(" + str(k) + ")"]
+
+        def gate(indent, k, keep_edges):
+            device = self.order[k]
+            output = variables[(device.device_id, None)]
+            target = operators[device.device_kind].join(
+                "H[" + name + "]" for name in inputs[k].values())
+            if device.device_kind in [devices.NAND, devices.NOR]:
+                target = "1 - (" + target + ")"
+            lines = [indent + "n = U[" + output + " * 2 + (" + target + ")]"]
+            if keep_edges:
+                lines.append(indent + "if n != " + output + " and n != H[" +
+                             output + "]:")
+                lines.extend(change(indent + "    ", k,
+                                    output + " = n; c = True"))
+            else:
+                lines.append(indent + "if n != " + output + ":")
+                lines.extend(change(indent + "    ", k,
+                                    output + " = n; c = True"))
+            return lines
+
+        load = []
+        store = []
+        body = []
+        for k, device in enumerate(self.order):
+            kind = device.device_kind
+            if kind == devices.D_TYPE:
+                q, b, m = "q" + str(k), "b" + str(k), "m" + str(k)
+                load += [q + " = o" + str(k) + "[" + str(devices.Q_ID) + "]",
+                         b + " = o" + str(k) + "[" + str(devices.QBAR_ID) +
+                         "]",
+                         m + " = d" + str(k) + ".dtype_memory"]
+                store += ["o" + str(k) + "[" + str(devices.Q_ID) + "] = " + q,
+                          "o" + str(k) + "[" + str(devices.QBAR_ID) + "] = " +
+                          b,
+                          "d" + str(k) + ".dtype_memory = " + m]
+                names = inputs[k]
+                clk = names[devices.CLK_ID]
+                data = names[devices.DATA_ID]
+                body += ["if " + clk + " == 2:",
+                         "    if " + data + " == 1 or " + data + " == 3:",
+                         "        " + m + " = 1",
+                         "    elif " + data + " == 0 or " + data + " == 2:",
+                         "        " + m + " = 0",
+                         "if " + names[devices.SET_ID] + " == 1:",
+                         "    " + m + " = 1",
+                         "if " + names[devices.CLEAR_ID] + " == 1:",
+                         "    " + m + " = 0",
+                         "n = U[" + q + " * 2 + (0 if " + m + " == 0 else 1)]",
+                         "n2 = U[" + b + " * 2 + (0 if " + m +
+                         " == 1 else 1)]",
+                         "if n != " + q + " or n2 != " + b + ":"]
+                body += change("    ", k, q + " = n; " + b + " = n2")
+                continue
+
+            s = "s" + str(k)
+            load.append(s + " = o" + str(k) + "[None]")
+            store.append("o" + str(k) + "[None] = " + s)
+            if kind == devices.SWITCH:
+                load.append("w" + str(k) + " = 0 if d" + str(k) +
+                            ".switch_state == 0 else 1")
+                body += ["n = U[" + s + " * 2 + w" + str(k) + "]",
+                         "if n != " + s + ":"]
+                body += change("    ", k, s + " = n")
+            elif kind in [devices.CLOCK, devices.RC, devices.SIGGEN]:
+                body += ["if " + s + " > 1:"]
+                body += change("    ", k, s + " = H[" + s + "]")
+
+        start = len(schedule.sources)
+        for j, (component, cyclic) in enumerate(zip(schedule.components,
+                                                    schedule.cyclic)):
+            members = range(start, start + len(component))
+            start += len(component)
+            if not cyclic:
+                body += gate("", members[0], False)
+                continue
+            # Feedback component, as network.Network.settle_component()
+            body.append("c = False")
+            for k in members:
+                body += gate("", k, False)
+            body += ["if c:",
+                     "    ld = L()",
+                     "    for _ in range(LIMIT):",
+                     "        c = False"]
+            for k in members:
+                body += gate("        ", k, True)
+            body += ["        if not c:",
+                     "            break",
+                     "        if ld.add(" + get_tuple(
+                         ["s" + str(k) for k in members]) + "):",
+                     "            osc.append((" + str(j) + ", ld))",
+                     "            break",
+                     "    else:",
+                     "        osc.append((" + str(j) + ", ld))"]
+
+        # The state of the network, as network.Network.get_state()
+        self.state_outputs = []
+        state = []
+        memories = []
+        for k, device in enumerate(self.order):
+            for output_id in device.outputs:
+                self.state_outputs.append((device, output_id))
+                state.append(variables[(device.device_id, output_id)])
+            if device.device_kind == devices.D_TYPE:
+                memories.append("m" + str(k))
+
+        lines = ["def build(O, D, H, U, L):"]
+        for k in range(len(self.order)):
+            lines.append("    o" + str(k) + " = O[" + str(k) + "]")
+            lines.append("    d" + str(k) + " = D[" + str(k) + "]")
+        lines += ["", "    def cycle(LIMIT):"]
+        lines += ["        " + line for line in load]
+        lines += ["        osc = []",
+                  "        ch = []",
+                  "        ld0 = L()",
+                  "        it = 0",
+                  "        st = True",
+                  "        while it < LIMIT:",
+                  "            it += 1",
+                  "            track = it == LIMIT",
+                  "            st = True"]
+        lines += ["            " + line for line in body]
+        lines += ["            if osc:",
+                  "                st = False",
+                  "                break",
+                  "            if st:",
+                  "                break",
+                  "            if it > 2 and ld0.add(" +
+                  get_tuple(state + memories) + "):",
+                  "                break"]
+        lines += ["        " + line for line in store]
+        lines += ["        return [st, osc, ch, ld0]",
+                  "",
+                  "    return cycle",
+                  ""]
+        return "\n".join(lines)
+
+    def build(self):
+        """Generate and compile the function for the network."""
+        self.network.sweep_order()  # rebuild the schedule if necessary
+        self.device_count = len(self.devices.devices_list)
+        source = self.generate()
+        if source is None:
+            self.connected = False
+            self.cycle = None
+            return
+        self.connected = True
+        code = self.code_cache.pop(source, None)
+        if code is None:
+            code = compile(source, "<logsim network>", "exec")
+            while len(self.code_cache) >= self.cache_limit:
+                del self.code_cache[next(iter(self.code_cache))]
+        self.code_cache[source] = code
+        namespace = {}
+        exec(code, namespace)
+
+        # settled level, and update_signal(signal, target) as a flat table
+        settled = (0, 1, 1, 0)
+        update = (0, 2, 3, 1, 3, 1, 0, 2)
+        self.cycle = namespace["build"](
+            [device.outputs for device in self.order], self.order,
+            settled, update, LoopDetector)
+
+    def execute_network(self):
+        """Execute the compiled function for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        network = self.network
+        devices = self.devices
+        if self.device_count != len(devices.devices_list):
+            self.build()
+        if not self.connected:
+            return network.sweep_network()
+
+        network.tick_sources()
+        try:
+            [steady, oscillating, changed, detector] = self.cycle(
+                network.iteration_limit)
+        except (IndexError, KeyError, TypeError):
+            # A signal is not LOW, HIGH, RISING or FALLING. Nothing has been
+            # written back yet, so the sweep can fail in exactly its own way.
+            return network.settle_network()
+
+        schedule = network.schedule
+        network.oscillations = []
+        network.oscillation_reports = []
+        for j, component_detector in oscillating:
+            component = schedule.components[j]
+            network.add_oscillation([(device, None) for device in component],
+                                    component_detector,
+                                    component_detector.iterations + 1)
+            network.oscillations.append(
+                network.get_component_names(component))
+        if not steady and not oscillating:
+            if detector.proven:
+                network.oscillations = [network.get_component_names(
+                    network.add_oscillation(self.state_outputs, detector,
+                                            detector.iterations + 2))]
+            else:
+                network.add_oscillation(self.state_outputs, detector,
+                                        network.iteration_limit)
+                network.oscillations = [network.get_component_names(
+                    [self.order[k] for k in sorted(set(changed))])]
+        network.steady_state = steady
+        network.cycles_completed += 1
+        return steady
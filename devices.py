@@ -8,9 +8,12 @@ Classes
 Device - stores device properties.
 Devices - makes and stores all the devices in the logic network.
 """
+import copy
 import random
 from typing import Union
 
+from waveform import Waveform
+
 
 class Device:
 
@@ -41,6 +44,7 @@ class Device:
         self.clock_half_period = None
         self.RC_switch_period = None
         self.SIGGEN_signal = None
+        self.waveform = None  # waveform.Waveform() of a source device
         self.clock_counter = None
         self.RC_counter = None
         self.SIGGEN_counter = None
@@ -101,7 +105,10 @@ class Devices:
 
     make_d_type(self, device_id): Makes a D-type device.
 
-    cold_startup(self): Simulates cold start-up of D-types and clocks.
+    cold_startup(self, rng=None): Simulates cold start-up of D-types and
+                                  clocks.
+
+    fork(self): Returns a copy of the devices that shares their connections.
 
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
@@ -114,6 +121,14 @@ class Devices:
 
         self.devices_list = []
 
+        # Number of cold start-ups, so that simulators can tell when the
+        # clock counters and D-type memories have been set from outside
+        self.cold_starts = 0
+
+        # IDs of the switches set to a new state, so that simulators only
+        # need to re-evaluate their fanout (see wheel.TimingWheel)
+        self.changed_switches = set()
+
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC", "SIGGEN"]
         dtype_inputs = ["CLK", "SET", "CLEAR", "DATA"]
@@ -235,6 +250,8 @@ class Devices:
         elif device.device_kind != self.SWITCH:
             return False
         else:
+            if device.switch_state != signal:
+                self.changed_switches.add(device_id)
             device.switch_state = signal
             return True
 
@@ -253,6 +270,8 @@ class Devices:
         self.add_device(device_id, self.CLOCK, name)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period  # type: ignore
+        device.waveform = Waveform([self.LOW] * clock_half_period +
+                                   [self.HIGH] * clock_half_period)
         self.cold_startup()  # clock initialised to a random point in its cycle
 
     def make_gate(self, device_id, device_kind, no_of_inputs, name=None):
@@ -281,6 +300,8 @@ class Devices:
         self.add_device(device_id, self.RC, name)
         device = self.get_device(device_id)
         device.RC_switch_period = RC_switch_period
+        device.waveform = Waveform(
+            [self.LOW], [self.HIGH] * RC_switch_period + [self.FALLING])
         # Start with the RC output high
         self.add_output(device_id, output_id=None, signal=self.HIGH)
 
@@ -291,26 +312,49 @@ class Devices:
         self.add_device(device_id, self.SIGGEN, name)
         device = self.get_device(device_id)
         device.SIGGEN_signal = SIGGEN_SIGNAL
-        self.add_output(device_id, output_id=None, signal=int(
-            str(SIGGEN_SIGNAL)[0]))  # Start with the SIGGEN First Signal
+        levels = [int(char) for char in str(SIGGEN_SIGNAL)]
+        device.waveform = Waveform(levels, levels[:1])
+        self.add_output(device_id, output_id=None,
+                        signal=levels[0])  # Start with the SIGGEN First Signal
 
-    def cold_startup(self):
+    def cold_startup(self, rng=None):
         """Simulate cold start-up of D-types and clocks.
 
         Set the memory of the D-types to a random state and make the clocks
-        begin from a random point in their cycles.
+        begin from a random point in their cycles. rng is the random.Random()
+        instance to draw from, or None for the global random module.
         """
+        if rng is None:
+            rng = random
+        self.cold_starts += 1
         for device in self.devices_list:
             if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
+                device.dtype_memory = rng.choice([self.LOW, self.HIGH])
 
             elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
+                clock_signal = rng.choice([self.LOW, self.HIGH])
                 self.add_output(device.device_id, output_id=None,
                                 signal=clock_signal)
                 # Initialise it to a random point in its cycle.
                 device.clock_counter = \
-                    random.randrange(device.clock_half_period)
+                    rng.randrange(device.clock_half_period)
+
+    def fork(self):
+        """Return a copy of the devices that shares their connections.
+
+        Every Device is copied shallowly, with its own outputs dictionary, so
+        the copy can be simulated on its own while the inputs dictionaries,
+        properties and waveforms are shared. Connections must therefore not
+        be changed after forking.
+        """
+        forked = copy.copy(self)
+        forked.changed_switches = set(self.changed_switches)
+        forked.devices_list = []
+        for device in self.devices_list:
+            forked_device = copy.copy(device)
+            forked_device.outputs = dict(device.outputs)
+            forked.devices_list.append(forked_device)
+        return forked
 
     def make_device(
             self,
@@ -0,0 +1,349 @@
+"""Execute the network with an event-driven scheduler.
+
+Used in the Logic Simulator project as an alternative to the sweep engine in
+network.py. Only the devices whose inputs changed are evaluated, but they are
+visited in the same order as the sweep, so the signal traces are identical.
+
+Classes
+-------
+EventEngine - evaluates only the devices affected by signal changes.
+"""
+import heapq
+
+from oscillation import LoopDetector
+
+
+class EventEngine:
+
+    """Execute the network by propagating signal changes through fanouts.
+
+    The sweep engine evaluates every device in a fixed order until no signal
+    changes. Evaluating a device whose inputs have not changed and whose
+    outputs have settled does nothing, so this engine only queues the fanout
+    of the devices whose outputs did change. A fanout device later in the
+    sweep order is evaluated in the current iteration, and one earlier in the
+    sweep order is evaluated in the next iteration, exactly as the sweep would
+    have seen it.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    invalidate(self): Discards the compiled schedule so that it is rebuilt
+                      before the next cycle.
+
+    build(self): Compiles the sweep order, input references and fanouts of
+                 every device.
+
+    execute_network(self): Executes the devices affected by signal changes for
+                           one simulation cycle.
+    """
+
+    def __init__(self, network):
+        """Initialise the engine with an empty schedule."""
+        self.network = network
+        self.devices = network.devices
+
+        # [(device, kind, [(source_device, source_port)], x, y)] in sweep order
+        self.schedule = None
+        self.position = {}  # {device_id: position in the sweep order}
+        self.block_of = []  # block_of[position] = position its block starts
+        self.blocks = {}  # {start position: positions of a feedback loop}
+        self.fanouts = []  # fanouts[position] = blocks reading its outputs
+        self.sources = []  # positions evaluated at the start of every cycle
+        self.connected = False
+        self.device_count = 0
+
+        # Outputs of the source devices at the end of the previous cycle, or
+        # None if every device must be evaluated in the next cycle
+        self.seen_outputs = None
+
+        self.evaluations = 0  # number of device evaluations performed
+
+    def invalidate(self):
+        """Discard the schedule so that it is rebuilt before the next cycle."""
+        self.schedule = None
+
+    def build(self):
+        """Compile the sweep order, input references and fanouts."""
+        devices = self.devices
+        gate_rules = {devices.AND: (devices.HIGH, devices.HIGH),
+                      devices.OR: (devices.LOW, devices.LOW),
+                      devices.NAND: (devices.HIGH, devices.LOW),
+                      devices.NOR: (devices.LOW, devices.HIGH),
+                      devices.XOR: (None, None)}
+
+        order = self.network.sweep_order()
+        position = {device.device_id: i for i, device in enumerate(order)}
+        by_id = {device.device_id: device for device in devices.devices_list}
+
+        self.schedule = []
+        self.fanouts = [set() for _ in order]
+        self.sources = []
+        self.connected = True
+        for i, device in enumerate(order):
+            input_refs = []
+            for connected_output in device.inputs.values():
+                if connected_output is None:
+                    self.connected = False
+                    continue
+                source_id, source_port = self.network.schedule.resolve(
+                    connected_output)
+                input_refs.append((by_id[source_id], source_port))
+                if source_id in position:
+                    self.fanouts[position[source_id]].add(i)
+            x, y = gate_rules.get(device.device_kind, (None, None))
+            self.schedule.append((device, device.device_kind, input_refs,
+                                  x, y))
+            if device.device_kind not in devices.gate_types:
+                self.sources.append(i)
+
+        # A feedback component is evaluated as one block, which is queued at
+        # the position of its first gate
+        self.position = position
+        self.block_of = list(range(len(order)))
+        self.blocks = {}
+        start = len(self.network.schedule.sources)
+        for members, cyclic in zip(self.network.schedule.components,
+                                   self.network.schedule.cyclic):
+            if cyclic:
+                self.blocks[start] = list(range(start, start + len(members)))
+                for member in self.blocks[start]:
+                    self.block_of[member] = start
+            start += len(members)
+
+        # Gates in the same block are settled by the block itself, but a
+        # D-type driving its own inputs must be queued again
+        self.fanouts = [sorted({self.block_of[fanout] for fanout in fanouts
+                                if self.block_of[fanout] not in self.blocks or
+                                self.block_of[fanout] != self.block_of[i]})
+                        for i, fanouts in enumerate(self.fanouts)]
+        self.device_count = len(devices.devices_list)
+        self.seen_outputs = None
+
+    def update_signal(self, signal, target):
+        """Return the signal updated in the direction of the target.
+
+        Mirrors network.Network.update_signal() without touching the
+        steady_state flag. Return None if the signal is not a valid level.
+        """
+        devices = self.devices
+        if signal == devices.LOW or signal == devices.FALLING:
+            if target == devices.LOW:
+                return devices.LOW
+            return devices.RISING
+        elif signal == devices.HIGH or signal == devices.RISING:
+            if target == devices.LOW:
+                return devices.FALLING
+            return devices.HIGH
+        return None
+
+    def evaluate(self, position, keep_edges=False):
+        """Evaluate the device at the given position in the sweep order.
+
+        keep_edges has the same meaning as in
+        network.Network.evaluate_device(). Return True if one of its outputs
+        changed, False if none did, or None if the evaluation failed.
+        """
+        devices = self.devices
+        device, kind, input_refs, x, y = self.schedule[position]
+        outputs = device.outputs
+        self.evaluations += 1
+
+        if kind in devices.gate_types:
+            settled = self.network.settled_signal
+            if kind == devices.XOR:
+                first = settled(input_refs[0][0].outputs[input_refs[0][1]])
+                second = settled(input_refs[1][0].outputs[input_refs[1][1]])
+                target = devices.LOW if first == second else devices.HIGH
+            else:
+                target = y
+                for source, port in input_refs:
+                    if settled(source.outputs[port]) != x:
+                        target = self.network.invert_signal(y)
+                        break
+            signal = outputs[None]
+            new_signal = self.update_signal(signal, target)
+            if new_signal is None:
+                return None
+            if keep_edges and new_signal == settled(signal):
+                return False
+            outputs[None] = new_signal
+            return new_signal != signal
+
+        elif kind == devices.SWITCH:
+            signal = outputs[None]
+            new_signal = self.update_signal(signal, device.switch_state)
+            if new_signal is None:
+                return None
+            outputs[None] = new_signal
+            return new_signal != signal
+
+        elif kind == devices.D_TYPE:
+            signals = {}
+            for input_id, (source, port) in zip(device.inputs, input_refs):
+                signals[input_id] = source.outputs[port]
+            # Set D-type memory depending on the input signals, following
+            # network.Network.execute_d_type()
+            if signals[devices.CLK_ID] == devices.RISING:
+                data_signal = signals[devices.DATA_ID]
+                if data_signal in [devices.HIGH, devices.FALLING]:
+                    device.dtype_memory = devices.HIGH
+                elif data_signal in [devices.LOW, devices.RISING]:
+                    device.dtype_memory = devices.LOW
+            if signals[devices.SET_ID] == devices.HIGH:
+                device.dtype_memory = devices.HIGH
+            if signals[devices.CLEAR_ID] == devices.HIGH:
+                device.dtype_memory = devices.LOW
+
+            Q_signal = outputs[devices.Q_ID]
+            QBAR_signal = outputs[devices.QBAR_ID]
+            new_Q = self.update_signal(Q_signal, device.dtype_memory)
+            new_QBAR = self.update_signal(
+                QBAR_signal, self.network.invert_signal(device.dtype_memory))
+            if new_Q is None or new_QBAR is None:
+                return None
+            outputs[devices.Q_ID] = new_Q
+            outputs[devices.QBAR_ID] = new_QBAR
+            return new_Q != Q_signal or new_QBAR != QBAR_signal
+
+        else:  # CLOCK, RC and SIGGEN outputs settle like a clock
+            signal = outputs[None]
+            if signal == devices.RISING:
+                outputs[None] = devices.HIGH
+                return True
+            elif signal == devices.FALLING:
+                outputs[None] = devices.LOW
+                return True
+            elif signal in [devices.HIGH, devices.LOW]:
+                return False
+            return None
+
+    def execute_network(self):
+        """Execute the affected devices for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        network = self.network
+        devices = self.devices
+        if (self.schedule is None or
+                self.device_count != len(devices.devices_list)):
+            self.build()
+        if not self.connected:
+            # Unconnected inputs make the sweep fail part-way through a
+            # cycle, so let it produce exactly the same side effects
+            self.seen_outputs = None
+            return network.sweep_network()
+
+        switches = network.wheel.get_changed_switches()
+        network.tick_sources()
+
+        if self.seen_outputs is None:
+            current = sorted(set(self.block_of))
+        elif switches:
+            # Only these switches can change since the last settled cycle
+            current = sorted(self.position[switch.device_id]
+                             for switch in switches)
+        else:
+            queued = set(self.sources)
+            # Source outputs changed between cycles (cold start-up, reset)
+            # must reach their fanout even if the source itself is settled
+            for position, seen in zip(self.sources, self.seen_outputs):
+                device = self.schedule[position][0]
+                if list(device.outputs.values()) != seen:
+                    queued.update(self.fanouts[position])
+            current = sorted(queued)
+
+        def evaluate_gate(device, keep_edges):
+            return self.evaluate(self.position[device.device_id], keep_edges)
+
+        network.oscillations = []
+        network.oscillation_reports = []
+        detector = LoopDetector()
+        outputs = None  # every output, once the iterations go on
+        iterations = 0
+        network.steady_state = False
+        while iterations < network.iteration_limit:
+            iterations += 1
+            pending = set(current)
+            heapq.heapify(current)
+            following = set()
+            changed = []
+            while current:
+                start = heapq.heappop(current)
+                pending.discard(start)
+                if start in self.blocks:
+                    component = [self.schedule[member][0]
+                                 for member in self.blocks[start]]
+                    result = network.settle_component(component,
+                                                      evaluate_gate)
+                    if result is None:
+                        self.seen_outputs = None
+                        return False
+                    [component_changed, settled] = result
+                    if not settled:
+                        network.oscillations.append(
+                            network.get_component_names(component))
+                    positions = [self.position[device.device_id]
+                                 for device in component_changed]
+                else:
+                    result = self.evaluate(start)
+                    if result is None:
+                        self.seen_outputs = None
+                        return False
+                    positions = [start] if result else []
+
+                for position in positions:
+                    changed.append(position)
+                    device = self.schedule[position][0]
+                    if any(signal in [devices.RISING, devices.FALLING]
+                           for signal in device.outputs.values()):
+                        # The edge must be completed in the next iteration
+                        following.add(self.block_of[position])
+                    for fanout in self.fanouts[position]:
+                        if fanout > start:
+                            if fanout not in pending:
+                                pending.add(fanout)
+                                heapq.heappush(current, fanout)
+                        else:
+                            following.add(fanout)
+
+            if network.oscillations:
+                break
+            if not changed:
+                network.steady_state = True
+                break
+            if iterations > 2:
+                # The state of the network, with the devices queued for the
+                # next iteration, must repeat, as in the sweep
+                if outputs is None:
+                    outputs = network.get_state_outputs(
+                        network.schedule.order)
+                if detector.add(network.get_state(outputs) +
+                                tuple(sorted(following))):
+                    network.oscillations.append(network.get_component_names(
+                        network.add_oscillation(outputs, detector,
+                                                iterations)))
+                    break
+            if iterations == network.iteration_limit:
+                # Report everything still changing, as the sweep does
+                if outputs is None:
+                    outputs = network.get_state_outputs(
+                        network.schedule.order)
+                network.add_oscillation(outputs, detector, iterations)
+                network.oscillations.append(network.get_component_names(
+                    [self.schedule[position][0]
+                     for position in sorted(changed)]))
+            current = list(following)
+
+        if network.steady_state:
+            self.seen_outputs = [
+                list(self.schedule[position][0].outputs.values())
+                for position in self.sources]
+        else:
+            # Devices left changing must all be executed in the next cycle
+            self.seen_outputs = None
+        network.cycles_completed += 1
+        return network.steady_state
@@ -0,0 +1,162 @@
+"""Simulate stuck-at faults and report how many the monitors detect.
+
+Used in the Logic Simulator project to check that a test sequence catches
+manufacturing faults. Every device output and input pin is held stuck LOW
+(stuck-at-0) and stuck HIGH (stuck-at-1) in turn. A fault is detected when a
+monitored signal differs from the signal of the fault-free (good) network.
+
+Classes
+-------
+FaultSimulator - simulates stuck-at faults bit-parallel.
+"""
+from bitsim import BitParallel
+
+
+class FaultSimulator:
+
+    """Simulate stuck-at faults bit-parallel and report the fault coverage.
+
+    The faults are simulated in batches with bitsim.BitParallel: bit 0 of
+    every signal is the good network and bit k is the network with fault k
+    of the batch, so one pass through the network simulates the whole batch.
+    After every cycle, the monitored signals of each fault are compared with
+    those of the good network. A fault that differs is detected and
+    dropped, and a batch stops as soon as all its faults are dropped.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_faults(self): Returns every stuck-at fault of the network.
+
+    get_fault_name(self, fault): Returns the name of a fault.
+
+    run(self, sequence, batch_size=256): Simulates every fault for the test
+                                         sequence and returns the detected
+                                         faults.
+
+    get_coverage(self): Returns the fraction of the faults detected.
+
+    get_report(self): Returns the coverage report as text.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the simulator without results."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        self.faults = []  # faults simulated in the last run
+        self.detected = {}  # {fault: cycle in which it was detected}
+
+    def get_faults(self):
+        """Return every stuck-at fault of the network.
+
+        A fault is (device_id, port_id, is_input, stuck), where stuck is LOW
+        or HIGH. Outputs come before inputs, device by device.
+        """
+        devices = self.devices
+        faults = []
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                for stuck in [devices.LOW, devices.HIGH]:
+                    faults.append((device.device_id, output_id, False, stuck))
+            for input_id in device.inputs:
+                for stuck in [devices.LOW, devices.HIGH]:
+                    faults.append((device.device_id, input_id, True, stuck))
+        return faults
+
+    def get_fault_name(self, fault):
+        """Return the name of a fault, such as "G1.I2 stuck-at-0"."""
+        device_id, port_id, is_input, stuck = fault
+        return self.devices.get_signal_name(device_id, port_id) + \
+            " stuck-at-" + str(stuck)
+
+    def run(self, sequence, batch_size=256):
+        """Simulate every fault for the test sequence.
+
+        sequence has one {switch name: LOW or HIGH} dictionary per cycle,
+        applied before the cycle. Switches keep their state until they are
+        set again. Return {fault: cycle in which it was detected}. Raise a
+        ValueError if the network cannot be simulated bit-parallel.
+        """
+        devices = self.devices
+        simulator = BitParallel(self.names, devices, self.network,
+                                self.monitors)
+        # The switch settings are the same in every lane
+        switch_masks = []
+        states = {device.device_id: device.switch_state
+                  for device in devices.devices_list
+                  if device.device_kind == devices.SWITCH}
+        for settings in sequence:
+            masks = simulator.get_switch_masks([settings])  # validates names
+            for name in settings:
+                switch_id = self.names.query(name)
+                states[switch_id] = masks[switch_id]
+            switch_masks.append(dict(states))
+
+        self.faults = self.get_faults()
+        self.detected = {}
+        for start in range(0, len(self.faults), batch_size):
+            batch = self.faults[start:start + batch_size]
+            self.run_batch(simulator, batch, switch_masks)
+        return self.detected
+
+    def run_batch(self, simulator, batch, switch_masks):
+        """Simulate a batch of faults, lane k + 1 holding fault k."""
+        simulator.output_faults = {}
+        simulator.input_faults = {}
+        for lane, (device_id, port_id, is_input, stuck) in enumerate(batch,
+                                                                     1):
+            faults = simulator.input_faults if is_input else \
+                simulator.output_faults
+            masks = faults.setdefault((device_id, port_id), [0, 0])
+            masks[stuck] |= 1 << lane
+        lanes = len(batch) + 1
+        simulator.reset(lanes)
+        simulator.fill_sources(len(switch_masks))
+        every = simulator.every
+        undetected = every & ~1
+        monitored = list(self.monitors.monitors_dictionary)
+
+        for cycle, masks in enumerate(switch_masks):
+            simulator.execute_cycle({switch_id: every if state else 0
+                                     for switch_id, state in masks.items()})
+            diverged = 0
+            for key in monitored:
+                level = simulator.level[key]
+                edge = simulator.edge[key]
+                diverged |= (level ^ -(level & 1)) | (edge ^ -(edge & 1))
+            diverged &= undetected
+            while diverged:
+                lowest = diverged & -diverged
+                self.detected[batch[lowest.bit_length() - 2]] = cycle
+                diverged ^= lowest
+                undetected ^= lowest
+            if not undetected:
+                break  # every fault of the batch has been dropped
+
+    def get_coverage(self):
+        """Return the fraction of the faults detected in the last run."""
+        if not self.faults:
+            return 0.0
+        return len(self.detected) / len(self.faults)
+
+    def get_report(self):
+        """Return the coverage report of the last run as text."""
+        lines = ["Faults: " + str(len(self.faults)),
+                 "Detected: " + str(len(self.detected)) + " (" +
+                 "%.1f" % (100 * self.get_coverage()) + "%)"]
+        undetected = [fault for fault in self.faults
+                      if fault not in self.detected]
+        if undetected:
+            lines.append("Undetected:")
+            lines.extend("  " + self.get_fault_name(fault)
+                         for fault in undetected)
+        return "\n".join(lines)
@@ -10,7 +10,7 @@ Gui - configures the main window and all the widgets.
 """
 import math
 import random
-from typing import List
+from typing import List, Optional
 import wx
 
 
@@ -20,6 +20,7 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from budget import Budget
 from components.ui import Button, Text, NumberInput, TextBox, COLORS
 from components import Canvas, FileButton, Box, ScrollBox
 from errors import Error
@@ -46,7 +47,8 @@ class Gui(wx.Frame):
     """Main GUI for the Logic Simulator.
     """
 
-    def __init__(self, path, names, devices, network, monitors):
+    def __init__(self, path, names, devices, network, monitors,
+                 time_limit=None, cycle_limit=None):
         super().__init__(parent=None, title=t("logic-simulator"), size=(800, 600))
 
         nb = Notebook(self, devices, monitors)
@@ -54,7 +56,8 @@ class Gui(wx.Frame):
         nb.file_path = path
         nb.uploaded_code = self._read_file(nb.file_path)
         nb.AddPage(MainPage(devices,
-                   network, monitors, notebook=nb), t("tabs.main"))
+                   network, monitors, notebook=nb, time_limit=time_limit,
+                   cycle_limit=cycle_limit), t("tabs.main"))
 
         nb.AddPage(nb.canvas, t("tabs.graphs"))
         nb.AddPage(CodePage(nb), t("tabs.code"))
@@ -153,12 +156,17 @@ class MainPage(wx.Panel):
             devices: Devices,
             network: Network,
             monitors: Monitors,
-            notebook: Notebook):
+            notebook: Notebook,
+            time_limit: Optional[float] = None,
+            cycle_limit: Optional[int] = None):
         """Initialise widgets and layout."""
         super().__init__(parent=notebook)
 
         self.network = network
         self.monitors = monitors
+        # Limits of a run, so one run cannot hang the GUI
+        self.time_limit = time_limit
+        self.cycle_limit = cycle_limit
 
         self.SetBackgroundColour(COLORS.GRAY_950)
         self.number_of_cycles = 5
@@ -219,15 +227,24 @@ class MainPage(wx.Panel):
         Executes the network for the specified number of cycles.
         and records the signals.
         """
-        success = True
-
-        for _ in range(self.number_of_cycles):
-            success = self.network.execute_network()
-            self.monitors.record_signals()
-
-        if not success:
+        budget = Budget(self.time_limit, self.cycle_limit)
+        failed = self.network.run_cycles(self.number_of_cycles,
+                                         self.monitors, budget=budget)[1]
+
+        if budget.stopped is not None:
+            ErrorsGui([budget.get_text() + ": stopped after " +
+                       str(budget.cycles_used) + " of " +
+                       str(self.number_of_cycles) + " cycles"])
+        elif failed is not None:
             ErrorsGui([
-                "Error in network execution"
+                "Error in network execution in cycle " +
+                str(self.cycles_completed + failed + 1)
+            ] + [
+                "Oscillating: " + ", ".join(component)
+                for component in self.network.oscillations
+            ] + [
+                report.get_text()
+                for report in self.network.oscillation_reports
             ])
 
         monitors_dict = self.monitors.monitors_dictionary
@@ -244,7 +261,8 @@ class MainPage(wx.Panel):
 
         self.canvas.Refresh()
         self.canvas2.Refresh()
-        self.cycles_completed += self.number_of_cycles
+        self.cycles_completed += budget.cycles_used if failed is None \
+            else failed
 
     def on_reset(self, event):
         """Onclick handler for reset button. Resets the canvas and network."""
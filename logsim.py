@@ -9,6 +9,22 @@ Usage
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
 Graphical user interface: logsim.py <file path>
+Select the simulation engine: logsim.py --engine=event [-c] <file path>
+Only simulate what the monitors need: logsim.py --prune [-c] <file path>
+Fold constant gates and dead logic: logsim.py --fold [-c] <file path>
+Merge identical gates: logsim.py --merge [-c] <file path>
+Truth table of every switch setting (bit-parallel, so without --engine,
+--fold or --merge):
+    logsim.py --sweep <file path> [--cycles=N] [--prune] [--iterations=N]
+Random cold starts: logsim.py --montecarlo=RUNS [--cycles=N] [--seed=S]
+                    <file path>
+Stuck-at fault coverage: logsim.py --faults [--cycles=N]
+                         [--stimulus=<stimulus path>] <file path>
+Iteration budget of a cycle: logsim.py --iterations=N [-c] <file path>
+Switch changes from a stimulus file: logsim.py --stimulus=<stimulus path>
+                                     [--cycles=N] <file path>
+Limit every run: logsim.py [--time-limit=SECONDS] [--cycle-limit=N]
+                 [-c] <file path>
 """
 import getopt
 import os
@@ -24,6 +40,11 @@ from scanner import Scanner
 from parse import Parser
 from userint import UserInterface
 from gui import ErrorsGui, Gui
+from truthtable import write_truth_table
+from montecarlo import monte_carlo, write_summary
+from faultsim import FaultSimulator
+from stimulus import Stimulus, read_stimulus, get_sequence
+from budget import Budget
 
 
 def main(arg_list):
@@ -35,20 +56,205 @@ def main(arg_list):
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
                      "Command line user interface: logsim.py -c <file path>\n"
-                     "Graphical user interface: logsim.py <file path>")
+                     "Graphical user interface: logsim.py <file path>\n"
+                     "Select the simulation engine (sweep, event, compiled or "
+                     "vector): "
+                     "logsim.py --engine=event [-c] <file path>\n"
+                     "Only simulate what the monitors need: "
+                     "logsim.py --prune [-c] <file path>\n"
+                     "Fold constant gates and dead logic: "
+                     "logsim.py --fold [-c] <file path>\n"
+                     "Merge identical gates: "
+                     "logsim.py --merge [-c] <file path>\n"
+                     "Truth table of every switch setting (bit-parallel, "
+                     "so without --engine, --fold or --merge): "
+                     "logsim.py --sweep <file path> [--cycles=N] [--prune] "
+                     "[--iterations=N]\n"
+                     "Random cold starts: logsim.py --montecarlo=RUNS "
+                     "[--cycles=N] [--seed=S] <file path>\n"
+                     "Stuck-at fault coverage: "
+                     "logsim.py --faults [--cycles=N] "
+                     "[--stimulus=<stimulus path>] <file path>\n"
+                     "Iteration budget of a cycle: "
+                     "logsim.py --iterations=N [-c] <file path>\n"
+                     "Switch changes from a stimulus file: "
+                     "logsim.py --stimulus=<stimulus path> [--cycles=N] "
+                     "<file path>\n"
+                     "Limit every run: logsim.py [--time-limit=SECONDS] "
+                     "[--cycle-limit=N] [-c] <file path>")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(arg_list, "hc:",
+                                           ["engine=", "sweep=", "cycles=",
+                                            "montecarlo=", "seed=",
+                                            "faults", "prune", "fold",
+                                            "merge", "iterations=",
+                                            "stimulus=", "time-limit=",
+                                            "cycle-limit="])
     except getopt.GetoptError:
         print("Error: invalid command line arguments\n")
         print(usage_message)
         sys.exit()
 
+    engine = "sweep"
+    engine_given = False
+    sweep_path = None
+    cycles = 10
+    runs = None
+    seed = 0
+    faults = False
+    prune = False
+    fold = False
+    merge = False
+    iterations = None
+    stimulus_path = None
+    time_limit = None
+    cycle_limit = None
+    for option, value in options:
+        if option == "--engine":
+            engine = value
+            engine_given = True
+        elif option == "--faults":
+            faults = True
+        elif option == "--prune":
+            prune = True
+        elif option == "--fold":
+            fold = True
+        elif option == "--merge":
+            merge = True
+        elif option == "--sweep":
+            sweep_path = value
+        elif option == "--stimulus":
+            stimulus_path = value
+        elif option == "--time-limit":
+            try:
+                time_limit = float(value)
+            except ValueError:
+                time_limit = 0.0
+            if not time_limit > 0:
+                print("Error: --time-limit must be a positive number of "
+                      "seconds\n")
+                print(usage_message)
+                sys.exit()
+        elif option in ["--cycles", "--montecarlo", "--seed",
+                        "--iterations", "--cycle-limit"]:
+            if not value.isdigit() or (int(value) == 0 and
+                                       option != "--seed"):
+                print("Error: " + option + " must be a positive integer\n")
+                print(usage_message)
+                sys.exit()
+            if option == "--cycles":
+                cycles = int(value)
+            elif option == "--montecarlo":
+                runs = int(value)
+            elif option == "--iterations":
+                iterations = int(value)
+            elif option == "--cycle-limit":
+                cycle_limit = int(value)
+            else:
+                seed = int(value)
+    options = [(option, value) for option, value in options
+               if option not in ["--engine", "--sweep", "--cycles",
+                                 "--montecarlo", "--seed", "--faults",
+                                 "--prune", "--fold", "--merge",
+                                 "--iterations", "--stimulus",
+                                 "--time-limit", "--cycle-limit"]]
+
+    if sweep_path is not None:  # tabulate every setting of the switches
+        if engine_given or fold or merge:
+            print("Error: --sweep simulates bit-parallel and takes no "
+                  "--engine, --fold or --merge\n")
+            print(usage_message)
+            sys.exit()
+        write_truth_table(sweep_path, cycles, sys.stdout, prune=prune,
+                          iterations=iterations)
+        sys.exit()
+
+    if runs is not None:  # summarise random cold starts
+        if len(arguments) != 1:
+            print("Error: one file path required\n")
+            print(usage_message)
+            sys.exit()
+        result = monte_carlo(arguments[0], runs, cycles, seed, engine=engine)
+        if result is None:
+            print("Error: the definition file is not valid")
+        else:
+            write_summary(*result, sys.stdout)
+        sys.exit()
+
     # Initialise instances of the four inner simulator classes
     names = Names()
     devices = Devices(names)
-    network = Network(names, devices)
+    try:
+        network = Network(names, devices, engine, prune, fold,
+                          merge)
+    except ValueError as error:
+        print("Error: " + str(error) + "\n")
+        print(usage_message)
+        sys.exit()
+    except ImportError:
+        print("Error: the " + engine + " engine needs NumPy")
+        sys.exit()
+    if iterations is not None:
+        network.iteration_limit = iterations
     monitors = Monitors(names, devices, network)
 
+    if faults:  # stuck-at fault coverage of the monitors
+        if len(arguments) != 1:
+            print("Error: one file path required\n")
+            print(usage_message)
+            sys.exit()
+        scanner = Scanner(arguments[0], names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        valid, errors = parser.parse_network()
+        if not valid:
+            print(errors)
+            sys.exit()
+        simulator = FaultSimulator(names, devices, network, monitors)
+        try:
+            if stimulus_path is None:
+                sequence = [{}] * cycles
+            else:
+                sequence = get_sequence(read_stimulus(stimulus_path),
+                                        cycles)
+            simulator.run(sequence)
+        except (OSError, ValueError) as error:
+            print("Error: " + str(error))
+            sys.exit()
+        print(simulator.get_report())
+        sys.exit()
+
+    if stimulus_path is not None:  # apply the switch changes of a file
+        if len(arguments) != 1:
+            print("Error: one file path required\n")
+            print(usage_message)
+            sys.exit()
+        scanner = Scanner(arguments[0], names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        valid, errors = parser.parse_network()
+        if not valid:
+            print(errors)
+            sys.exit()
+        try:
+            stimulus = Stimulus(names, devices,
+                                read_stimulus(stimulus_path))
+            budget = Budget(time_limit, cycle_limit)
+            failed = network.run_cycles(cycles, monitors, stimulus,
+                                        budget)[1]
+        except (OSError, ValueError) as error:
+            print("Error: " + str(error))
+            sys.exit()
+        if budget.stopped is not None:
+            print(budget.get_text() + ": stopped after " +
+                  str(network.cycles_completed) + " of " + str(cycles) +
+                  " cycles.")
+        if failed is not None:
+            print("Error! Network oscillating in cycle " +
+                  str(failed + 1) + ".")
+            for report in network.oscillation_reports:
+                print(report.get_text())
+        monitors.display_signals()
+        sys.exit()
+
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
@@ -58,7 +264,8 @@ def main(arg_list):
             parser = Parser(names, devices, network, monitors, scanner)
             if parser.parse_network():
                 # Initialise an instance of the userint.UserInterface() class
-                userint = UserInterface(names, devices, network, monitors)
+                userint = UserInterface(names, devices, network, monitors,
+                                        time_limit, cycle_limit)
                 userint.command_interface()
 
     if not options:  # no option given, use the graphical user interface
@@ -77,7 +284,7 @@ def main(arg_list):
             # Initialise an instance of the gui.Gui() class
             app = wx.App()
             gui = Gui(path, names, devices, network,
-                      monitors)
+                      monitors, time_limit, cycle_limit)
             gui.Show(True)
             app.MainLoop()
         else:
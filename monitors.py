@@ -47,6 +47,13 @@ class Monitors:
     get_margin(self): Returns the length of the longest monitor's name.
 
     display_signals(self): Displays signal trace(s) in the text console.
+
+    get_trace_string(self, signal_list): Returns a signal trace as text.
+
+    unshare_traces(self): Copies the traces shared with a fork.
+
+    fork(self): Returns names, devices, network and monitors of a branch of
+                the simulation.
     """
 
     def __init__(self, names, devices, network):
@@ -59,17 +66,25 @@ class Monitors:
         # {(device_id, output_id): [signal_list]}
         self.monitors_dictionary = collections.OrderedDict()
 
+        # Monitors whose signal lists are shared with a fork, and are copied
+        # before they are changed
+        self.shared_traces = set()
+
         # [self.NO_ERROR, self.NOT_OUTPUT,
         #  self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
         self.NO_ERROR = "NO_ERROR"
         self.NOT_OUTPUT = "NOT_OUTPUT"
         self.MONITOR_PRESENT = "MONITOR_PRESENT"
+        self.MONITOR_PRUNED = "MONITOR_PRUNED"
 
     def make_monitor(self, device_id, output_id, cycles_completed=0):
         """Add the specified signal to the monitors dictionary.
 
         Return NO_ERROR if successful, or the corresponding error if not.
+        Once the network has run, an output that pruning left out of the
+        simulation is out of date and gives MONITOR_PRUNED (see
+        schedule.Schedule).
         """
         monitor_device = self.devices.get_device(device_id)
         if monitor_device is None:
@@ -78,6 +93,9 @@ class Monitors:
             return self.NOT_OUTPUT
         elif (device_id, output_id) in self.monitors_dictionary:
             return self.MONITOR_PRESENT
+        elif self.network.cycles_completed > 0 and \
+                self.network.schedule.is_pruned(device_id):
+            return self.MONITOR_PRUNED
         else:
             # If n simulation cycles have been completed before making this
             # monitor, then initialise the signal trace with an n-length list
@@ -85,6 +103,7 @@ class Monitors:
             # list.
             self.monitors_dictionary[(device_id, output_id)] = [
                 self.devices.BLANK] * cycles_completed
+            self.network.add_monitor(device_id, output_id)
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -96,6 +115,7 @@ class Monitors:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            self.network.remove_monitor(device_id, output_id)
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -113,6 +133,8 @@ class Monitors:
 
         This function is called at every simulation cycle.
         """
+        if self.shared_traces:
+            self.unshare_traces()
         for device_id, output_id in self.monitors_dictionary:
             signal_level = self.get_monitor_signal(device_id, output_id)
             self.monitors_dictionary[(device_id,
@@ -143,6 +165,7 @@ class Monitors:
         """
         for device_id, output_id in self.monitors_dictionary:
             self.monitors_dictionary[(device_id, output_id)] = []
+        self.shared_traces = set()
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -170,19 +193,24 @@ class Monitors:
             signal_list = self.monitors_dictionary[(device_id, output_id)]
             print(monitor_name + " " * (margin - name_length),  # type: ignore
                   end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
+            print(self.get_trace_string(signal_list), end="")
             print("\n", end="")
 
+    def get_trace_string(self, signal_list):
+        """Return the signal trace as text, one character per signal."""
+        symbols = {self.devices.HIGH: "-", self.devices.LOW: "_",
+                   self.devices.RISING: "/", self.devices.FALLING: "\\",
+                   self.devices.BLANK: " "}
+        try:
+            # Translating the signals as bytes is much faster on long traces
+            table = bytes(ord(symbols.get(signal, " "))
+                          for signal in range(256))
+            unknown = bytes(signal for signal in range(256)
+                            if signal not in symbols)
+            return bytes(signal_list).translate(table, unknown).decode()
+        except (TypeError, ValueError):  # e.g. a None signal
+            return "".join(symbols.get(signal, "") for signal in signal_list)
+
     def toggle_monitor(self, port_name, cycles_completed=0):
         if "." in port_name:
             device, output_id = port_name.split(".")
@@ -204,3 +232,31 @@ class Monitors:
             self.remove_monitor(device_id, output_id)
         else:
             self.make_monitor(device_id, output_id, cycles_completed)
+
+    def unshare_traces(self):
+        """Copy the signal lists shared with a fork, so they can be changed.
+
+        Code that changes a signal list other than by record_signals() must
+        call this first.
+        """
+        for key in self.shared_traces:
+            if key in self.monitors_dictionary:
+                self.monitors_dictionary[key] = list(
+                    self.monitors_dictionary[key])
+        self.shared_traces = set()
+
+    def fork(self):
+        """Return names, devices, network and monitors of a branch.
+
+        The branch starts from the current cycle and is simulated on its own
+        (see Network.fork()). Its monitors share the signal lists recorded so
+        far, which are copied by either side only when it records a signal.
+        """
+        network = self.network.fork()
+        forked = Monitors(self.names, network.devices, network)
+        for key, signal_list in self.monitors_dictionary.items():
+            forked.monitors_dictionary[key] = signal_list
+            network.add_monitor(*key)
+        forked.shared_traces = set(self.monitors_dictionary)
+        self.shared_traces.update(self.monitors_dictionary)
+        return [self.names, network.devices, network, forked]
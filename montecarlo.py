@@ -0,0 +1,203 @@
+"""Run many random cold starts of the network and summarise the traces.
+
+Used in the Logic Simulator project by `logsim.py --montecarlo=RUNS <file
+path>` to judge how robust a circuit is to the random state of its D-types
+and clocks at power-up (see devices.Devices.cold_startup). Every run draws
+its cold start from its own random number generator, seeded from the base
+seed and the run number, so any run can be replayed on its own. The runs
+are spread over a multiprocessing pool, and each worker parses the
+definition file once.
+
+Classes
+-------
+ColdStartRunner - simulates cold starts of a parsed definition file.
+
+Functions
+---------
+get_run_seed(seed, run): Returns the seed of the generator of a run.
+
+init_worker(path, cycles, engine): Parses the definition file in a worker.
+
+run_chunk(chunk): Returns the traces of a chunk of runs.
+
+monte_carlo(path, runs, cycles, seed, processes, chunk_size, engine):
+    Runs the cold starts and returns the summary of every monitor.
+
+summarise(results, runs, cycles, monitors): Returns the summary of the
+                                            traces of the runs.
+
+write_summary(summary, unsettled, output): Writes the summary as text.
+"""
+import contextlib
+import io
+import multiprocessing
+import random
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+# Cold start runner of the definition file in this worker process
+worker = None
+
+
+class ColdStartRunner:
+
+    """Simulate cold starts of a parsed definition file.
+
+    The file is parsed once, and the signals and switch states it leaves are
+    saved. Every run restores them, resets the RC and SIGGEN devices, draws
+    a new cold start and simulates the network from cycle 0.
+
+    Parameters
+    ----------
+    path: path of the definition file.
+    cycles: number of simulation cycles of every run.
+    engine: simulation engine of the network, see network.Network.
+
+    Public methods
+    --------------
+    run(self, run_seed): Simulates one cold start and returns the traces of
+                         the monitors.
+    """
+
+    def __init__(self, path, cycles, engine="sweep"):
+        """Parse the definition file and save the state it leaves."""
+        self.names = Names()
+        self.devices = Devices(self.names)
+        self.network = Network(self.names, self.devices, engine)
+        self.monitors = Monitors(self.names, self.devices, self.network)
+        scanner = Scanner(path, self.names)
+        parser = Parser(self.names, self.devices, self.network,
+                        self.monitors, scanner)
+        with contextlib.redirect_stdout(io.StringIO()):
+            [self.valid, self.errors] = parser.parse_network()
+        self.cycles = cycles
+
+        self.saved_state = [(device, dict(device.outputs),
+                             device.switch_state)
+                            for device in self.devices.devices_list]
+
+    def run(self, run_seed):
+        """Simulate one cold start and return its traces.
+
+        Return [traces, steady], where traces is {monitor name: tuple of
+        signals} and steady is False if a cycle failed or did not settle.
+        """
+        for device, outputs, switch_state in self.saved_state:
+            device.outputs = dict(outputs)
+            device.switch_state = switch_state
+        self.network.reset_network()
+        self.devices.cold_startup(random.Random(run_seed))
+        self.network.invalidate_schedule()  # the engines drop their state
+        self.monitors.reset_monitors()
+
+        steady = True
+        for _ in range(self.cycles):
+            if not self.network.execute_network():
+                steady = False
+            self.monitors.record_signals()
+        traces = {self.devices.get_signal_name(device_id, output_id):
+                  tuple(signals)
+                  for (device_id, output_id), signals
+                  in self.monitors.monitors_dictionary.items()}
+        return [traces, steady]
+
+
+def get_run_seed(seed, run):
+    """Return the seed of the random number generator of a run.
+
+    The seed is a string, which random.Random() turns into the same stream
+    in every process.
+    """
+    return str(seed) + ":" + str(run)
+
+
+def init_worker(path, cycles, engine):
+    """Parse the definition file once in this worker process."""
+    global worker
+    worker = ColdStartRunner(path, cycles, engine)
+
+
+def run_chunk(chunk):
+    """Return [(run, traces, steady)] for a chunk of runs in this worker.
+
+    chunk is (seed, start, stop).
+    """
+    seed, start, stop = chunk
+    return [[run] + worker.run(get_run_seed(seed, run))
+            for run in range(start, stop)]
+
+
+def monte_carlo(path, runs, cycles, seed=0, processes=None, chunk_size=16,
+                engine="sweep"):
+    """Run the cold starts and return the summary of every monitor.
+
+    Return None if the definition file is not valid. Otherwise, return
+    [summary, unsettled], where summary is {monitor name: [high, traces]}
+    and unsettled lists the runs with a cycle that did not settle. high[n]
+    is the fraction of runs in which the signal settles HIGH at cycle n, and
+    traces is {trace: runs}, with the trace as text and the runs producing
+    it.
+    """
+    runner = ColdStartRunner(path, cycles, engine)
+    if not runner.valid:
+        return None
+
+    if processes == 1 or runs <= chunk_size:
+        results = ([run] + runner.run(get_run_seed(seed, run))
+                   for run in range(runs))
+        return summarise(results, runs, cycles, runner.monitors)
+
+    chunks = ((seed, start, min(start + chunk_size, runs))
+              for start in range(0, runs, chunk_size))
+    with multiprocessing.Pool(processes, init_worker,
+                              (path, cycles, engine)) as pool:
+        results = (result for rows in pool.imap(run_chunk, chunks)
+                   for result in rows)
+        return summarise(results, runs, cycles, runner.monitors)
+
+
+def summarise(results, runs, cycles, monitors):
+    """Return [summary, unsettled] for the (run, traces, steady) results."""
+    devices = monitors.devices
+    summary = {}
+    unsettled = []
+    for run, traces, steady in results:
+        if not steady:
+            unsettled.append(run)
+        for name, signals in traces.items():
+            if name not in summary:
+                summary[name] = [[0] * cycles, {}]
+            [high, distinct] = summary[name]
+            for cycle, signal in enumerate(signals):
+                if signal in [devices.HIGH, devices.RISING]:
+                    high[cycle] += 1
+            trace = monitors.get_trace_string(signals)
+            distinct.setdefault(trace, []).append(run)
+    for result in summary.values():
+        result[0] = [count / runs for count in result[0]]
+    return [summary, unsettled]
+
+
+def write_summary(summary, unsettled, output):
+    """Write the summary of every monitor as text to output.
+
+    The distinct traces are listed from the most to the least common, with
+    their number of runs and the first run that produced them.
+    """
+    for name, (high, traces) in summary.items():
+        output.write(name + "\n")
+        output.write("  P(HIGH): " + " ".join("%.2f" % probability
+                                              for probability in high) +
+                     "\n")
+        for trace, runs in sorted(traces.items(),
+                                  key=lambda item: -len(item[1])):
+            output.write("  " + trace + " x" + str(len(runs)) + " (run " +
+                         str(runs[0]) + ")\n")
+    if unsettled:
+        output.write("Runs that did not settle: " +
+                     " ".join(str(run) for run in unsettled) + "\n")
@@ -6,9 +6,14 @@ Classes
 --------
 Network - builds and executes the network.
 """
-
+import array
 
 from devices import Device, Devices
+from event import EventEngine
+from codegen import CompiledEngine
+from schedule import Schedule
+from wheel import TimingWheel
+from oscillation import LoopDetector, Oscillation
 
 
 class Network:
@@ -22,6 +27,17 @@ class Network:
     Parameters
     ----------
     devices - instance of the devices.Devices() class.
+    engine - "sweep" (default) evaluates every device until the signals
+             settle, "event" evaluates only the devices whose inputs changed
+             "compiled" runs the network as generated Python code and
+             "vector" evaluates each level of gates with NumPy arrays.
+    prune - if True, only the devices that the monitored outputs depend on
+            are executed (see schedule.Schedule).
+    fold - if True, gates fixed by the switches are folded to constants and
+           devices that drive nothing are not executed (see
+           schedule.Schedule).
+    merge - if True, gates of the same kind driven by the same outputs are
+            only executed once (see schedule.Schedule).
 
     Public methods
     --------------
@@ -38,11 +54,19 @@ class Network:
                     second_port_id): Connects the first device to the second
                                      device.
 
+    add_monitor(self, device_id, output_id): Adds the fan-in of a monitored
+                                             output to the executed devices.
+
+    remove_monitor(self, device_id, output_id): Forgets a removed monitor.
+
     check_network(self): Checks if all inputs in the network are connected.
 
     update_signal(self, signal, target): Updates the signal in the direction of
                                          the target.
 
+    settled_signal(self, signal): Returns the level a RISING or FALLING signal
+                                  settles to.
+
     invert_signal(self, signal): Returns the inverse of the signal if the
                                  signal is HIGH or LOW.
 
@@ -60,11 +84,58 @@ class Network:
     update_clocks(self): If it is time to do so, sets clock signals to RISING
                          or FALLING.
 
-    execute_network(self): Executes all the devices in the network for one
-                           simulation cycle.
+    get_source_signal(self, device, cycle): Returns the output of a clock, RC
+                                            or SIGGEN device in a cycle.
+
+    get_source_block(self, device, cycle, cycles): Returns the outputs of a
+                                  source device in a block of cycles.
+
+    tick_sources(self): Updates the clocks, RC and SIGGEN devices whose
+                        outputs change in this cycle.
+
+    sweep_order(self): Returns the devices in the order the sweep executes them.
+
+    execute_device(self, device): Executes a single device of any kind.
+
+    evaluate_device(self, device, keep_edges=False): Executes a single device
+                                  and returns whether its outputs changed.
+
+    settle_component(self, component, evaluate): Iterates a feedback
+                                  component until its signals settle.
+
+    get_component_names(self, component): Returns the device names of a
+                                          component.
+
+    get_state_outputs(self, order): Returns every output of the devices in
+                                    the order.
+
+    get_state(self, outputs): Returns the signals of the outputs and every
+                              D-type memory.
+
+    add_oscillation(self, outputs, detector, iterations): Reports the outputs
+                                  that did not settle and returns their
+                                  devices.
+
+    sweep_network(self): Executes all the devices in the network for one
+                         simulation cycle.
+
+    settle_network(self, fanout=None): Executes the devices until the signals
+                                       settle, once the clocks have been
+                                       updated.
+
+    execute_network(self): Executes the network for one simulation cycle with
+                           the selected engine.
+
+    run_cycles(self, cycles, monitors, stimulus=None): Executes the network
+                                        for the number of cycles and records
+                                        the monitors.
+
+    fork(self): Returns a copy of the network that can be simulated on its
+                own from the current cycle.
     """
 
-    def __init__(self, names, devices):
+    def __init__(self, names, devices, engine="sweep", prune=False,
+                 fold=False, merge=False):
         """Initialise network errors and the steady_state variable."""
         self.names = names
         self.devices: Devices = devices
@@ -88,6 +159,39 @@ class Network:
 
         self.steady_state = True  # for checking if signals have settled
 
+        # Iteration budget of a cycle: the signals must settle, or be proven
+        # to oscillate (see oscillation.LoopDetector), within it
+        self.iteration_limit = 1000
+
+        # Device names of every component that did not settle in the last
+        # cycle, e.g. [["G1", "G2"]] for an oscillating latch
+        self.oscillations = []
+
+        # oscillation.Oscillation() of every component in self.oscillations
+        self.oscillation_reports = []
+
+        # Levelized execution order, rebuilt when the network changes
+        self.schedule = Schedule(devices)
+        self.schedule.prune = prune
+        self.schedule.fold = fold
+        self.schedule.merge = merge
+
+        # Calendar of the clock, RC and SIGGEN changes
+        self.wheel = TimingWheel(self)
+
+        self.engine_name = engine  # so that workers can make the same engine
+        if engine == "sweep":
+            self.engine = None
+        elif engine == "event":
+            self.engine = EventEngine(self)
+        elif engine == "compiled":
+            self.engine = CompiledEngine(self)
+        elif engine == "vector":
+            from vector import VectorEngine  # needs NumPy
+            self.engine = VectorEngine(self)
+        else:
+            raise ValueError("Unknown simulation engine: " + str(engine))
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -111,7 +215,10 @@ class Network:
         if connected_output is None:  # invalid IDs or unconnected input
             return None
         else:
-            (output_device_id, output_port_id) = connected_output
+            # A merged gate is not executed, so read the gate it was merged
+            # into
+            (output_device_id, output_port_id) = self.schedule.resolve(
+                connected_output)
             return self.get_output_signal(output_device_id, output_port_id)
 
     def get_output_signal(self, device_id, output_id):
@@ -149,6 +256,7 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.invalidate_schedule()
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -168,6 +276,7 @@ class Network:
                             self.devices.SET_ID, self.devices.CLEAR_ID]:
                         second_device.inputs[second_port_id] = (
                             first_device_id, first_port_id)
+                        self.invalidate_schedule()
                         error_type = self.NO_ERROR
                     else:
                         error_type = self.INVALID_RC_CONNECTION
@@ -175,6 +284,7 @@ class Network:
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.invalidate_schedule()
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -184,6 +294,33 @@ class Network:
 
         return error_type
 
+    def invalidate_schedule(self):
+        """Make the engines recompile their schedules before the next cycle."""
+        self.schedule.invalidate()
+        self.wheel.invalidate()
+        if self.engine is not None:
+            self.engine.invalidate()
+
+    def add_monitor(self, device_id, output_id):
+        """Add the fan-in of a monitored output to the executed devices.
+
+        Called by monitors.Monitors. Nothing is rebuilt unless the network
+        is pruned and the output is outside the current cone of influence.
+        """
+        self.schedule.add_monitor(device_id, output_id)
+        if self.schedule.is_stale() and self.engine is not None:
+            self.engine.invalidate()
+
+    def remove_monitor(self, device_id, output_id):
+        """Forget a removed monitor.
+
+        Called by monitors.Monitors. A pruned network keeps executing the
+        fan-in of the monitor (see schedule.Schedule).
+        """
+        self.schedule.remove_monitor(device_id, output_id)
+        if self.schedule.is_stale() and self.engine is not None:
+            self.engine.invalidate()
+
     def check_network(self):
         """Return True if all inputs in the network are connected."""
         for device_id in self.devices.find_devices():
@@ -215,6 +352,17 @@ class Network:
             self.steady_state = False
         return new_signal
 
+    def settled_signal(self, signal):
+        """Return the level a signal settles to: RISING is HIGH, FALLING LOW.
+
+        Return the signal unchanged if it is not RISING or FALLING.
+        """
+        if signal == self.devices.RISING:
+            return self.devices.HIGH
+        elif signal == self.devices.FALLING:
+            return self.devices.LOW
+        return signal
+
     def invert_signal(self, signal):
         """Return the inverse of the signal if the signal is HIGH or LOW.
 
@@ -251,6 +399,8 @@ class Network:
         output is the inverse of y.
         Note: (x,y) pairs for AND, OR, NOR, NAND, XOR are: (HIGH, HIGH), (LOW,
         LOW), (LOW, HIGH), (HIGH, LOW), (None, None).
+        Inputs are taken at the level they settle to, so a gate fed by a
+        RISING input already computes its final output.
         Return True if successful.
         """
         device = self.devices.get_device(device_id)
@@ -259,6 +409,7 @@ class Network:
             input_signal = self.get_input_signal(device_id, input_id)
             if input_signal is None:  # this input is unconnected
                 return False
+            input_signal = self.settled_signal(input_signal)
             input_signal_list.append(input_signal)
 
             if device.device_kind != self.devices.XOR:
@@ -364,59 +515,118 @@ class Network:
 
     def update_clocks(self):
         """If it is time to do so, set clock signals to RISING or FALLING."""
+        self.wheel.invalidate()  # the counters are advanced here instead
         clock_devices = self.devices.find_devices(self.devices.CLOCK)
         for device_id in clock_devices:
-            device = self.devices.get_device(device_id)
-            if device.clock_counter == device.clock_half_period:
-                device.clock_counter = 0
-                output_signal = self.get_output_signal(device_id,
-                                                       output_id=None)
-                if output_signal == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
-                elif output_signal == self.devices.LOW:
-                    device.outputs[None] = self.devices.RISING
-            device.clock_counter += 1
+            self.tick_clock(self.devices.get_device(device_id))
+
+    def tick_clock(self, device):
+        """Advance the counter of a single clock device by one cycle."""
+        if device.clock_counter == device.clock_half_period:
+            device.clock_counter = 0
+            output_signal = device.outputs[None]
+            if output_signal == self.devices.HIGH:
+                device.outputs[None] = self.devices.FALLING
+            elif output_signal == self.devices.LOW:
+                device.outputs[None] = self.devices.RISING
+        device.clock_counter += 1
 
     def update_rc(self):
         """Update RC devices."""
+        self.wheel.invalidate()
         rc_devices = self.devices.find_devices(self.devices.RC)
         for device_id in rc_devices:
-            device = self.devices.get_device(device_id)
-            rc_period = device.RC_switch_period
-            if self.cycles_completed >= rc_period:
-                if device.outputs[None] == self.devices.HIGH:
-                    device.outputs[None] = self.devices.FALLING
+            self.tick_rc(self.devices.get_device(device_id))
 
-            else:
-                device.outputs[None] = self.devices.HIGH
+    def tick_rc(self, device):
+        """Update the output of a single RC device for this cycle."""
+        rc_period = device.RC_switch_period
+        if self.cycles_completed >= rc_period:
+            if device.outputs[None] == self.devices.HIGH:
+                device.outputs[None] = self.devices.FALLING
+
+        else:
+            device.outputs[None] = self.devices.HIGH
 
     def update_siggen(self):
         """Update signal generator devices."""
+        self.wheel.invalidate()
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
-            device: Device = self.devices.get_device(device_id)
-            old_signal = device.outputs[None]
-            signal = str(device.SIGGEN_signal)
-            signal_length = len(signal)
-
-            # index is the remainder of the division of the number of cycles by
-            # the length of the signal
-            index = self.cycles_completed % signal_length
-
-            new_signal = int(signal[index])
-
-            if old_signal == self.devices.HIGH and new_signal == self.devices.HIGH:
-                device.outputs[None] = self.devices.HIGH
-                # print(old_signal, new_signal, "HIGH")
-            elif old_signal == self.devices.LOW and new_signal == self.devices.LOW:
-                device.outputs[None] = self.devices.LOW
-                # print(old_signal, new_signal, "LOW")
-            elif old_signal == self.devices.HIGH and new_signal == self.devices.LOW:
-                device.outputs[None] = self.devices.FALLING
-                # print(old_signal, new_signal, "FALLING")
-            elif old_signal == self.devices.LOW and new_signal == self.devices.HIGH:
-                device.outputs[None] = self.devices.RISING
-                # print(old_signal, new_signal, "RISING")
+            self.tick_siggen(self.devices.get_device(device_id))
+
+    def tick_siggen(self, device: Device):
+        """Update the output of a single signal generator for this cycle."""
+        old_signal = device.outputs[None]
+        # The level is looked up in the waveform compiled by make_SIGGEN()
+        new_signal = device.waveform.get_level(self.cycles_completed)
+
+        if old_signal == self.devices.LOW and new_signal == self.devices.HIGH:
+            device.outputs[None] = self.devices.RISING
+        elif old_signal == self.devices.HIGH and new_signal == self.devices.LOW:
+            device.outputs[None] = self.devices.FALLING
+
+    def get_waveform_cycle(self, device, cycle):
+        """Return the cycle of its waveform a source device is in at cycle.
+
+        RC and SIGGEN waveforms start in cycle 0. A clock can start anywhere
+        in its period, so its waveform cycle is found from its counter and
+        output. Return None for the extra cycle a clock holds its output
+        after a cold start-up from a counter of 0.
+        """
+        if device.device_kind != self.devices.CLOCK:
+            return cycle
+        self.wheel.sync()
+        half_period = device.clock_half_period
+        counter = device.clock_counter
+        start = self.cycles_completed
+        if counter == 0:
+            if cycle == start:
+                return None
+            start += 1
+            counter = 1
+        edge = start + half_period - counter  # cycle of the next edge
+        if self.settled_signal(device.outputs[None]) == self.devices.HIGH:
+            position = 0  # the falling edge
+        else:
+            position = half_period  # the rising edge
+        return (position + cycle - edge) % (2 * half_period)
+
+    def get_source_signal(self, device, cycle):
+        """Return the output of a clock, RC or SIGGEN device in a cycle.
+
+        cycle is the cycles completed when the cycle is executed, at least
+        self.cycles_completed. The network must run on without a reset or
+        cold start-up until then. The output is looked up in the waveform
+        compiled when the device was made (see waveform.Waveform).
+        """
+        waveform_cycle = self.get_waveform_cycle(device, cycle)
+        if waveform_cycle is None:
+            return device.outputs[None]
+        return device.waveform.get_signal(waveform_cycle)
+
+    def get_source_block(self, device, cycle, cycles):
+        """Return the outputs of a source device in a block of cycles.
+
+        The outputs are a list of get_source_signal() in the cycles from
+        cycle on, sliced from the waveform of the device in one step rather
+        than looked up cycle by cycle.
+        """
+        if cycles <= 0:
+            return []
+        waveform_cycle = self.get_waveform_cycle(device, cycle)
+        if waveform_cycle is None:
+            return [device.outputs[None]] + device.waveform.get_block(
+                self.get_waveform_cycle(device, cycle + 1), cycles - 1)
+        return device.waveform.get_block(waveform_cycle, cycles)
+
+    def tick_sources(self):
+        """Update the clocks, RC and SIGGEN devices for this cycle.
+
+        Only the devices whose outputs change are touched (see
+        wheel.TimingWheel).
+        """
+        self.wheel.tick()
 
     def reset_network(self):
         """
@@ -431,77 +641,346 @@ class Network:
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
             device = self.devices.get_device(device_id)
-            signal = str(device.SIGGEN_signal)
-            device.outputs[None] = int(signal[0])
+            device.outputs[None] = device.waveform.get_level(0)
         self.cycles_completed = 0
 
+    def sweep_order(self):
+        """Return the devices in the order the sweep executes them.
+
+        Switches come first, then D-types (to catch the rising edge of the
+        clock), then clocks, RC and SIGGEN devices, then the logic gates in
+        levelized order (see schedule.Schedule).
+        """
+        if self.schedule.is_stale():
+            self.schedule.build()
+        return self.schedule.order
+
     def execute_network(self):
-        """Execute all the devices in the network for one simulation cycle.
+        """Execute the network for one simulation cycle.
 
         Return True if successful and the network does not oscillate.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
-        rc_devices = self.devices.find_devices(self.devices.RC)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
+        if self.wheel.skip_cycle():
+            # The network settled and no source or switch changes
+            self.oscillations = []
+            self.oscillation_reports = []
+            self.steady_state = True
+            self.cycles_completed += 1
+            return True
+        if self.engine is not None:
+            if self.schedule.is_stale():
+                self.engine.invalidate()  # e.g. a folded switch was set
+            result = self.engine.execute_network()
+        else:
+            result = self.sweep_network()
+        self.schedule.copy_merged()
+        self.wheel.end_cycle(result)
+        return result
+
+    def run_cycles(self, cycles, monitors, stimulus=None, budget=None):
+        """Execute the network for the number of cycles and record the
+        monitors of monitors.Monitors().
+
+        The outputs of the monitors are looked up once, and the signal of
+        every cycle is written straight into a preallocated array per
+        monitor, rather than through Monitors.record_signals(). The run
+        stops at the first cycle that fails or does not settle, which is not
+        recorded. The signals recorded are then added to the monitors, even
+        if the run is stopped by an exception.
+
+        If stimulus is a stimulus.Stimulus(), the switch changes it lists
+        are applied before the cycles they are due in, so the run is not
+        interrupted to set switches.
+
+        If budget is a budget.Budget(), it is checked before every cycle,
+        and the run stops early, without failing, once it is spent or
+        cancelled. budget.stopped then tells why, and the signals hold the
+        cycles completed so far.
+
+        Return [signals, failed], where signals is {(device_id, output_id):
+        array.array of the signals of the cycles executed} and failed is the
+        cycle of the run, counted from 0, that failed, or None.
+        """
+        length = cycles
+        if budget is not None and budget.cycles is not None:
+            # No more cycles can run than are left in the budget
+            length = min(cycles, max(budget.cycles - budget.cycles_used, 0))
+        signals = {}
+        targets = []
+        for device_id, output_id in monitors.monitors_dictionary:
+            device = self.devices.get_device(device_id)
+            buffer = array.array("b", bytes(length))
+            signals[(device_id, output_id)] = buffer
+            targets.append((buffer, device.outputs, output_id))
+
+        failed = None
+        executed = 0
+        try:
+            for cycle in range(cycles):
+                if budget is not None and not budget.allow_cycle():
+                    break
+                if stimulus is not None:
+                    stimulus.apply(self.cycles_completed)
+                if not self.execute_network():
+                    failed = cycle
+                    break
+                for buffer, outputs, output_id in targets:
+                    buffer[cycle] = outputs[output_id]
+                executed += 1
+        finally:
+            monitors.unshare_traces()
+            for key, buffer in signals.items():
+                del buffer[executed:]
+                monitors.monitors_dictionary[key].extend(buffer)
+        return [signals, failed]
+
+    def execute_device(self, device):
+        """Execute a single device of any kind.
+
+        Return True if successful.
+        """
+        device_id = device.device_id
+        kind = device.device_kind
+        if kind == self.devices.SWITCH:
+            return self.execute_switch(device_id)
+        elif kind == self.devices.D_TYPE:
+            return self.execute_d_type(device_id)
+        elif kind == self.devices.AND:
+            return self.execute_gate(device_id, self.devices.HIGH,
+                                     self.devices.HIGH)
+        elif kind == self.devices.OR:
+            return self.execute_gate(device_id, self.devices.LOW,
+                                     self.devices.LOW)
+        elif kind == self.devices.NAND:
+            return self.execute_gate(device_id, self.devices.HIGH,
+                                     self.devices.LOW)
+        elif kind == self.devices.NOR:
+            return self.execute_gate(device_id, self.devices.LOW,
+                                     self.devices.HIGH)
+        elif kind == self.devices.XOR:
+            return self.execute_gate(device_id, None, None)
+        else:  # clocks, RC and SIGGEN devices complete their edges
+            return self.execute_clock(device_id)
+
+    def evaluate_device(self, device, keep_edges=False):
+        """Execute a single device and report whether its outputs changed.
+
+        If keep_edges is True, a RISING or FALLING output whose target has not
+        changed is left as it is, so that devices further on still see the
+        edge. Return True if an output changed, False if none did, or None if
+        the execution failed.
+        """
+        old_outputs = list(device.outputs.values())
+        if not self.execute_device(device):
+            return None
+        if keep_edges and device.outputs.get(None) == \
+                self.settled_signal(old_outputs[0]):
+            device.outputs[None] = old_outputs[0]
+        return list(device.outputs.values()) != old_outputs
+
+    def settle_component(self, component, evaluate):
+        """Iterate a feedback component until its settled signals stop changing.
+
+        evaluate(device, keep_edges) executes one gate and returns True if its
+        output changed, False if not, or None if the execution failed. The
+        first iteration is an ordinary one, which also completes the edges
+        left over from the previous iteration. The following iterations keep
+        new edges, so only a change of settled level counts as a change. They
+        stop as soon as the outputs of the component repeat, which proves
+        that it oscillates, and the oscillation is reported.
+
+        Return [changed, settled], where changed is the list of gates whose
+        output changed and settled is False if the component oscillates, or
+        None if an execution failed.
+        """
+        changed = []
+        for device in component:
+            result = evaluate(device, False)
+            if result is None:
+                return None
+            if result:
+                changed.append(device)
+        if not changed:
+            return [changed, True]
+
+        detector = LoopDetector()
+        for _ in range(self.iteration_limit):
+            settled = True
+            for device in component:
+                result = evaluate(device, True)
+                if result is None:
+                    return None
+                if result:
+                    settled = False
+                    if device not in changed:
+                        changed.append(device)
+            if settled:
+                return [changed, True]
+            if detector.add(tuple(device.outputs[None]
+                                  for device in component)):
+                break
+        self.add_oscillation([(device, None) for device in component],
+                             detector, detector.iterations + 1)
+        return [changed, False]
+
+    def get_component_names(self, component):
+        """Return the names of the devices in a component."""
+        return [self.names.get_name_string(device.device_id)
+                for device in component]
+
+    def get_state_outputs(self, order):
+        """Return (device, output_id) of every output of the devices in the
+        order."""
+        return [(device, output_id) for device in order
+                for output_id in device.outputs]
+
+    def get_state(self, outputs):
+        """Return the signals of the outputs and the memory of every D-type
+        among them."""
+        return tuple(device.outputs[output_id]
+                     for device, output_id in outputs) + \
+            tuple(device.dtype_memory for device, output_id in outputs
+                  if output_id == self.devices.Q_ID)
+
+    def add_oscillation(self, outputs, detector, iterations):
+        """Report the outputs that did not settle in this cycle.
+
+        outputs is the list of (device, output_id) in the order of the
+        states added to the oscillation.LoopDetector() detector, which may
+        hold more values after them. An oscillation.Oscillation() of the
+        outputs that change is added to self.oscillation_reports. Return the
+        devices of these outputs.
+        """
+        states = detector.loop if detector.proven else detector.recent
+        names = []
+        sequences = []
+        changing = []
+        for position, (device, output_id) in enumerate(outputs):
+            sequence = [state[position] for state in states]
+            if len(set(sequence)) > 1:
+                names.append(self.devices.get_signal_name(device.device_id,
+                                                          output_id))
+                sequences.append(sequence)
+                if device not in changing:
+                    changing.append(device)
+        self.oscillation_reports.append(Oscillation(
+            names, sequences, detector.proven, iterations,
+            self.cycles_completed))
+        return changing
+
+    def sweep_network(self):
+        """Execute all the devices in the network for one simulation cycle.
 
+        Return True if successful and the network does not oscillate. The
+        devices that did not settle are listed in self.oscillations. If the
+        last cycle settled and only switches have changed since, only their
+        fanout is executed, as every other device would keep its outputs.
+        """
+        switches = self.wheel.get_changed_switches()
         # This sets clock signals to RISING or FALLING, where necessary
-        self.update_clocks()
-        self.update_rc()
-        self.update_siggen()
+        self.tick_sources()
+        if switches:
+            return self.settle_network(self.schedule.get_fanout(switches))
+        return self.settle_network()
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
+    def settle_network(self, fanout=None):
+        """Execute the devices until the signals settle, after the clocks,
+        RC and SIGGEN devices have been updated for this cycle.
 
+        fanout is [sources, components, cyclic] of the devices to execute,
+        as returned by Schedule.get_fanout(), or None for every device.
+        Return True if successful and the network does not oscillate.
+        """
+        self.oscillations = []
+        self.oscillation_reports = []
+        self.sweep_order()  # rebuild the schedule if the network changed
+        schedule = self.schedule
+        if fanout is None:
+            fanout = [schedule.sources, schedule.components, schedule.cyclic]
+            order = schedule.order
+        else:
+            order = fanout[0] + [gate for component in fanout[1]
+                                 for gate in component]
+        [sources, components, cyclic_components] = fanout
+        detector = LoopDetector()
+        outputs = None  # every output, once the iterations go on
+
+        # Levelized gates settle in the first iteration, the next ones only
+        # complete RISING and FALLING edges, or re-execute the D-types driven
+        # by gates. Feedback loops are iterated on their own.
         iterations = 0
-        while iterations < iteration_limit:
+        while iterations < self.iteration_limit:
             iterations += 1
+            last_iteration = iterations == self.iteration_limit
             self.steady_state = True
-            for device_id in switch_devices:  # execute switch devices
-                if not self.execute_switch(device_id):
-                    return False
-            # Execute D-type devices before clocks to catch the rising edge of
-            # the clock
-            for device_id in d_type_devices:  # execute DTYPE devices
-                if not self.execute_d_type(device_id):
-                    return False
-            for device_id in clock_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
-                    return False
-            for device_id in rc_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
-                    return False
-            for device_id in siggen_devices:  # complete clock executions
-                if not self.execute_clock(device_id):
+            changed = []
+            for device in sources:
+                result = self.evaluate_device(device)
+                if result is None:
                     return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
-                    return False
-
+                if result and last_iteration:
+                    changed.append(device)
+            for component, cyclic in zip(components, cyclic_components):
+                if cyclic:
+                    result = self.settle_component(component,
+                                                   self.evaluate_device)
+                    if result is None:
+                        return False
+                    [component_changed, settled] = result
+                    if component_changed:
+                        self.steady_state = False
+                    if not settled:
+                        self.oscillations.append(
+                            self.get_component_names(component))
+                    elif last_iteration:
+                        changed.extend(component_changed)
+                else:
+                    result = self.evaluate_device(component[0])
+                    if result is None:
+                        return False
+                    if result and last_iteration:
+                        changed.append(component[0])
+
+            if self.oscillations:
+                self.steady_state = False
+                break
             if self.steady_state:
                 break
+            # The loop runs through sequential devices rather than a single
+            # component, so the state of every executed device must repeat
+            if iterations > 2:
+                if outputs is None:
+                    outputs = self.get_state_outputs(order)
+                if detector.add(self.get_state(outputs)):
+                    self.oscillations.append(self.get_component_names(
+                        self.add_oscillation(outputs, detector, iterations)))
+                    break
+            if last_iteration:
+                if outputs is None:
+                    outputs = self.get_state_outputs(order)
+                # Report everything still changing
+                self.add_oscillation(outputs, detector, iterations)
+                self.oscillations.append(self.get_component_names(
+                    [device for device in order if device in changed]))
         self.cycles_completed += 1
         return self.steady_state
+
+    def fork(self):
+        """Return a copy of the network that can be simulated on its own.
+
+        The copy runs on a fork of the devices (see Devices.fork()), with
+        the same engine and options, from the current cycle. Its schedule is
+        built before its first cycle.
+        """
+        self.wheel.sync()  # the forked devices need up to date counters
+        schedule = self.schedule
+        forked = Network(self.names, self.devices.fork(), "sweep",
+                         schedule.prune, schedule.fold, schedule.merge)
+        if self.engine is not None:
+            forked.engine = type(self.engine)(forked)
+        forked.cycles_completed = self.cycles_completed
+        forked.iteration_limit = self.iteration_limit
+        forked.steady_state = self.steady_state
+        forked.oscillations = list(self.oscillations)
+        forked.oscillation_reports = list(self.oscillation_reports)
+        return forked
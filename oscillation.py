@@ -0,0 +1,118 @@
+"""Prove that the signals of a cycle oscillate and describe the oscillation.
+
+Used in the Logic Simulator project by every simulation engine. The
+iterations of a cycle are deterministic, so once the state of the iterated
+devices repeats, they will repeat the same loop of states forever, and the
+cycle can be abandoned at once rather than after the whole iteration budget.
+
+Classes
+-------
+LoopDetector - finds a repeated state in the iterations of a cycle.
+Oscillation - describes the signals that did not settle in a cycle.
+"""
+
+
+class LoopDetector:
+
+    """Find a repeated state in the iterations of a cycle.
+
+    The hash of the state after every iteration is stored. A repeated hash
+    gives a candidate period, which is confirmed by comparing the full state
+    one period later, so a hash collision can never prove a loop that does
+    not exist (as periodic.PeriodDetector does across cycles). The states of
+    the confirming period are kept, which is the loop of states.
+
+    Public methods
+    --------------
+    add(self, state): Adds the state after an iteration and returns True
+                      once the loop is proven.
+    """
+
+    def __init__(self):
+        """Initialise the detector without states."""
+        self.iterations = 0  # iterations added
+        self.hashes = {}  # {hash of the state: iteration}
+        self.candidate = None  # [iteration, period, state] of a repeated hash
+        self.loop = []  # states of the confirming period
+        self.recent = []  # states of the last iterations
+        self.proven = False
+
+    def add(self, state):
+        """Add the state, a tuple or bytes, after an iteration.
+
+        Return True once the state is proven to repeat. self.loop then holds
+        the states of one period, ending with the repeated state.
+        """
+        self.iterations += 1
+        self.recent = self.recent[-3:] + [state]
+        if self.candidate is not None:
+            [iteration, period, first] = self.candidate
+            self.loop.append(state)
+            if self.iterations < iteration + period:
+                return False
+            if state == first:
+                self.proven = True
+                return True
+            self.candidate = None
+            self.loop = []
+
+        state_hash = hash(state)
+        if state_hash in self.hashes:
+            self.candidate = [self.iterations,
+                              self.iterations - self.hashes[state_hash],
+                              state]
+        self.hashes[state_hash] = self.iterations
+        return False
+
+
+class Oscillation:
+
+    """Describe the signals that did not settle in a cycle.
+
+    An oscillation is proven when the iterated devices returned to an
+    earlier state (see LoopDetector). Then sequences holds the loop of
+    signals each of them repeats forever. Otherwise the iteration budget ran
+    out first, and sequences holds the signals of the last iterations.
+
+    Parameters
+    ----------
+    names: names of the signals that change, such as "G1" or "D1.Q".
+    sequences: list of the signals of each name in the iterations.
+    proven: True if the signals were proven to repeat.
+    iterations: number of iterations executed in the cycle.
+    cycle: the number of cycles completed before the cycle.
+
+    Public methods
+    --------------
+    get_period(self): Returns the number of iterations of the loop.
+
+    get_text(self): Returns the description as text.
+    """
+
+    def __init__(self, names, sequences, proven, iterations, cycle):
+        """Store the description."""
+        self.names = names
+        self.sequences = sequences
+        self.proven = proven
+        self.iterations = iterations
+        self.cycle = cycle
+
+    def get_period(self):
+        """Return the number of iterations of the loop, None if unproven."""
+        if not self.proven or not self.sequences:
+            return None
+        return len(self.sequences[0])
+
+    def get_text(self):
+        """Return the description, one line per signal after the first."""
+        if self.proven:
+            lines = ["Oscillation with period " + str(self.get_period()) +
+                     " proven after " + str(self.iterations) +
+                     " iterations in cycle " + str(self.cycle + 1) + ":"]
+        else:
+            lines = ["No settled state after " + str(self.iterations) +
+                     " iterations in cycle " + str(self.cycle + 1) + ":"]
+        for name, sequence in zip(self.names, self.sequences):
+            lines.append("  " + name + ": " +
+                         " ".join(str(signal) for signal in sequence))
+        return "\n".join(lines)
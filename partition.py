@@ -0,0 +1,182 @@
+"""Split the network into independent circuits and simulate them in parallel.
+
+Used in the Logic Simulator project to run definition files that bundle
+several circuits sharing no nets, such as separate counters, on every core
+of the machine. Each circuit is a weakly connected component of the network,
+found from the inputs of the devices, and is simulated in its own worker
+process. The traces are merged back into the monitors at the end.
+
+Classes
+-------
+ParallelRunner - simulates the components of the network in parallel.
+
+Functions
+---------
+run_component(job): Simulates one component and returns its traces and
+                    final state.
+"""
+import multiprocessing
+
+from devices import Devices
+from network import Network
+from monitors import Monitors
+
+
+class ParallelRunner:
+
+    """Simulate the weakly connected components of the network in parallel.
+
+    Two devices are in the same component if one is connected to an input
+    of the other, directly or through other devices, in either direction.
+    Components share no signals, and the only thing they share in a cycle
+    is the number of cycles completed, so each can be simulated on its own
+    for a whole run and give the signals of a serial run.
+
+    Each worker is sent the devices of its component, with their current
+    state, so a run can start from any cycle. It returns the traces of the
+    monitors of the component and the final state of its devices, which are
+    written back to the network. If a cycle of any component fails, the run
+    ends there as in a serial run: the traces stop before that cycle, and
+    components that ran further are simulated again up to it. The other
+    components then complete that cycle, where a serial run stops part-way
+    through it, so their outputs may be settled where a serial run leaves
+    RISING or FALLING signals.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    get_components(self): Returns the weakly connected components of the
+                          network.
+
+    run(self, cycles, processes=None): Simulates the network for the number
+                                       of cycles and records the monitors.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Store the simulation to run in parallel."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+    def get_components(self):
+        """Return the weakly connected components of the network.
+
+        A component is a list of devices in the order of devices_list, and
+        the components are in the order of their first devices.
+        """
+        devices_list = self.devices.devices_list
+        parent = {device.device_id: device.device_id
+                  for device in devices_list}
+
+        def find(device_id):
+            """Return the root of the set of a device, halving the path."""
+            while parent[device_id] != device_id:
+                parent[device_id] = parent[parent[device_id]]
+                device_id = parent[device_id]
+            return device_id
+
+        for device in devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in parent:
+                    parent[find(device.device_id)] = find(connected_output[0])
+
+        components = {}
+        for device in devices_list:
+            components.setdefault(find(device.device_id), []).append(device)
+        return list(components.values())
+
+    def get_job(self, component, cycles):
+        """Return the job that simulates a component for the cycles."""
+        network = self.network
+        schedule = network.schedule
+        device_ids = {device.device_id for device in component}
+        monitored = [key for key in self.monitors.monitors_dictionary
+                     if key[0] in device_ids]
+        return (self.names, component, monitored, network.cycles_completed,
+                cycles, network.engine_name, schedule.prune, schedule.fold,
+                schedule.merge, network.iteration_limit)
+
+    def run(self, cycles, processes=None):
+        """Simulate the network for the cycles and record the monitors.
+
+        processes is the number of worker processes, by default the number
+        of cores. A network with a single component, or a single process,
+        is simulated serially. Return True if every cycle settled.
+        """
+        network = self.network
+        monitors = self.monitors
+        components = self.get_components()
+        if processes == 1 or len(components) < 2:
+            return network.run_cycles(cycles, monitors)[1] is None
+
+        network.wheel.sync()  # the workers need up to date clock counters
+        jobs = [self.get_job(component, cycles) for component in components]
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(run_component, jobs)
+            failed = [result[0] for result in results if not result[1]]
+            executed = min(failed) if failed else cycles
+            # Components that ran past the failed cycle are run up to it
+            again = [index for index, result in enumerate(results)
+                     if result[0] > executed]
+            rerun = pool.map(run_component,
+                             [self.get_job(components[index], executed)
+                              for index in again])
+            for index, result in zip(again, rerun):
+                results[index] = result
+
+        network.invalidate_schedule()  # the engines cache the signals
+        monitors.unshare_traces()
+        recorded = executed if not failed else executed - 1
+        network.oscillations = []
+        for component, (_, steady, traces, states, oscillations) in \
+                zip(components, results):
+            for device, (outputs, memory, counter) in zip(component, states):
+                device.outputs.update(outputs)
+                device.dtype_memory = memory
+                device.clock_counter = counter
+            for key, signal_list in traces.items():
+                monitors.monitors_dictionary[key].extend(
+                    signal_list[:recorded])
+            if not steady:
+                network.oscillations.extend(oscillations)
+        network.cycles_completed += executed
+        network.steady_state = not failed
+        return not failed
+
+
+def run_component(job):
+    """Simulate one component in this worker process.
+
+    job is (names, devices of the component, monitored outputs, cycles
+    completed, cycles, engine name, prune, fold, merge, iteration limit),
+    so the worker makes its network as the network was made. The component stops at the first cycle that fails. Return
+    [cycles executed, steady, {monitor: signal list}, [(outputs, D-type
+    memory, clock counter) of every device], oscillations].
+    """
+    [names, component, monitored, cycles_completed, cycles, engine, prune,
+     fold, merge, iteration_limit] = job
+    devices = Devices(names)
+    devices.devices_list = component
+    network = Network(names, devices, engine, prune, fold, merge)
+    network.cycles_completed = cycles_completed
+    network.iteration_limit = iteration_limit
+    monitors = Monitors(names, devices, network)
+    for device_id, output_id in monitored:
+        monitors.make_monitor(device_id, output_id)
+
+    failed = network.run_cycles(cycles, monitors)[1]
+    steady = failed is None
+    executed = cycles if steady else failed + 1
+    network.wheel.sync()
+    states = [(device.outputs, device.dtype_memory, device.clock_counter)
+              for device in component]
+    return [executed, steady, dict(monitors.monitors_dictionary), states,
+            network.oscillations]
@@ -0,0 +1,154 @@
+"""Detect when the network becomes periodic and fast-forward long runs.
+
+Used in the Logic Simulator project to run the network for millions of
+cycles. Once every clock, RC and SIGGEN device has reached its periodic
+regime, the state of the network repeats, and so do the monitor traces.
+The remaining cycles are then extrapolated instead of simulated.
+
+Classes
+-------
+PeriodDetector - runs the network and fast-forwards it once periodic.
+"""
+
+
+class PeriodDetector:
+
+    """Run the network and fast-forward it once its state repeats.
+
+    The state of the network after a cycle is every output, D-type memory
+    and clock counter, together with the phase of every SIGGEN device and,
+    until the last RC device has fallen, the number of cycles completed.
+    This is all that the next cycle depends on, so if the state after cycle
+    j is the state after cycle i, the network repeats cycles i + 1 to j
+    forever, with period p = j - i.
+
+    The hash of the state is stored for every cycle. A repeated hash gives a
+    candidate period, which is confirmed by comparing the full state one
+    period later, so a hash collision can never give wrong traces. Whole
+    periods are then fast-forwarded by repeating the last period of every
+    monitor trace, and the cycles left over are simulated.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    history_limit: number of state hashes stored before the history is
+                   cleared, which bounds memory. Longer periods are not
+                   detected.
+
+    Public methods
+    --------------
+    get_state(self): Returns the state of the network.
+
+    run(self, cycles, budget=None, stimulus=None): Executes the network for
+                                                   the number of cycles and
+                                                   records the monitors,
+                                                   fast-forwarding once
+                                                   periodic.
+    """
+
+    def __init__(self, devices, network, monitors, history_limit=100000):
+        """Initialise the detector without a detected period."""
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+        self.history_limit = history_limit
+
+        self.period = None  # period of the last run, None if not periodic
+        self.start = None  # cycle of the run after which it was periodic
+        self.fast_forwarded = 0  # cycles of the last run not simulated
+
+    def get_state(self):
+        """Return the state of the network after the last cycle."""
+        devices = self.devices
+        network = self.network
+        cycles_completed = network.cycles_completed
+        network.wheel.sync()  # bring the clock counters up to date
+        state = []
+        rc_period = None
+        for device in devices.devices_list:
+            state.extend(device.outputs.values())
+            kind = device.device_kind
+            if kind == devices.D_TYPE:
+                state.append(device.dtype_memory)
+            elif kind == devices.CLOCK:
+                state.append(device.clock_counter)
+            elif kind == devices.SIGGEN:
+                state.append(cycles_completed % device.waveform.period)
+            elif kind == devices.RC:
+                rc_period = max(rc_period or 0, device.RC_switch_period)
+        if rc_period is not None:
+            state.append(min(cycles_completed, rc_period))
+        return tuple(state)
+
+    def run(self, cycles, budget=None, stimulus=None):
+        """Execute the network for the number of cycles.
+
+        Every cycle executed goes through Network.run_cycles(), so the
+        monitors record the signals after every successful cycle. Return
+        False, as soon as a cycle fails or does not settle.
+
+        If budget is a budget.Budget(), it is checked before every cycle
+        executed, and the run stops early, returning True, once it is spent
+        or cancelled. Fast-forwarded cycles are not executed, so they do not
+        count against the budget.
+
+        If stimulus is a stimulus.Stimulus(), its switch changes are applied
+        at their cycles, and the network is only fast-forwarded once every
+        change has been applied.
+        """
+        monitors = self.monitors
+        network = self.network
+        self.period = None
+        self.start = None
+        self.fast_forwarded = 0
+        history = {}  # {hash of the state: cycle of the run}
+        candidate = None  # [cycle, period, state] of a repeated hash
+        cycle = 0
+        while cycle < cycles:
+            if self.period is not None:
+                # The cycles left over after fast-forwarding
+                return network.run_cycles(cycles - cycle, monitors, stimulus,
+                                          budget)[1] is None
+            completed = network.cycles_completed
+            if network.run_cycles(1, monitors, stimulus,
+                                  budget)[1] is not None:
+                return False
+            if network.cycles_completed == completed:
+                return True  # the budget is spent or cancelled
+            cycle += 1
+            if stimulus is not None and not stimulus.is_finished():
+                # The switches will change, so the state does not give the
+                # next cycles yet
+                history = {}
+                candidate = None
+                continue
+
+            state = self.get_state()
+            if candidate is not None:
+                if cycle == candidate[0] + candidate[1]:
+                    if state == candidate[2]:
+                        self.fast_forward(cycles - cycle, candidate[1])
+                        self.start = cycle - 2 * candidate[1]
+                        cycle += self.fast_forwarded
+                    candidate = None
+                continue
+
+            state_hash = hash(state)
+            if state_hash in history:
+                candidate = [cycle, cycle - history[state_hash], state]
+            elif len(history) >= self.history_limit:
+                history = {}
+            history[state_hash] = cycle
+        return True
+
+    def fast_forward(self, remaining, period):
+        """Extrapolate the whole periods of the remaining cycles."""
+        repeats = remaining // period
+        self.monitors.unshare_traces()
+        for signal_list in self.monitors.monitors_dictionary.values():
+            signal_list.extend(signal_list[-period:] * repeats)
+        self.network.cycles_completed += repeats * period
+        self.period = period
+        self.fast_forwarded = repeats * period
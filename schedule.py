@@ -0,0 +1,542 @@
+"""Order the devices of the network for execution.
+
+Used in the Logic Simulator project to levelize the logic gates once after
+the network has been built, so that combinational logic settles in a single
+pass instead of one sweep per gate in a chain, and only feedback loops are
+iterated.
+
+Classes
+-------
+Schedule - builds and stores the execution order of the devices.
+"""
+
+
+class Schedule:
+
+    """Build and store the execution order of the devices.
+
+    Switches, D-types, clocks, RC and SIGGEN devices are executed first, in the
+    same order as before. The logic gates are split into strongly connected
+    components using Device.inputs: a component is either a single gate, or a
+    group of gates on a feedback loop (such as a cross-coupled NAND latch).
+    Components are then executed level by level: a component on level n only
+    depends on sources and components on levels below n, so every gate sees
+    the final values of its inputs in the same pass. Only the cyclic
+    components need to be iterated until they settle.
+
+    If prune is True, only the cone of influence of the monitored outputs is
+    scheduled: the D-types and gates they depend on through Device.inputs.
+    Switches, clocks, RC and SIGGEN devices are always scheduled, since they
+    have no inputs and keep time. Devices outside the cone keep their signals
+    (and D-types their memory), so they are out of date once the network has
+    run: a removed monitor leaves its fan-in in the cone, and
+    monitors.Monitors.make_monitor() refuses a pruned output after cycle 0.
+
+    If fold is True, gates whose outputs are fixed by the switches (such as an
+    AND gate with a LOW switch input) are folded to constants and left out,
+    once their outputs have reached these constants. D-types and gates that
+    then drive no scheduled input and no monitor are dead, and are left out
+    too. The schedule goes stale when a switch that a folded gate depends on
+    is set, or when a constant that was still changing has settled.
+
+    If merge is True, gates of the same kind driven by the same outputs are
+    merged by structural hashing: only the first of them is scheduled, the
+    engines read it in place of the others, and copy_merged() copies its
+    output to the others after every cycle, so their names can still be
+    monitored. Gates on feedback loops are never merged.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    invalidate(self): Marks the schedule as out of date.
+
+    is_stale(self): Returns True if the schedule must be rebuilt.
+
+    build(self): Splits the gates into components and builds the execution
+                 order.
+
+    find_components(self, gates): Returns the strongly connected components of
+                                  the given gates.
+
+    find_cone(self, device_ids, cone): Adds the transitive fan-in of the
+                                       devices to the cone.
+
+    add_monitor(self, device_id, output_id): Extends the cone with the fan-in
+                                             of a new monitor.
+
+    remove_monitor(self, device_id, output_id): Forgets a removed monitor,
+                                                keeping the cone.
+
+    is_pruned(self, device_id): Returns True if the device is left out of the
+                                cone of influence.
+
+    fold_constants(self, scheduled): Folds the gates whose outputs are fixed
+                                     by the switches.
+
+    remove_dead(self, scheduled): Removes the devices that drive nothing.
+
+    resolve(self, connected_output): Returns the output that the engines read
+                                     in place of the given output.
+
+    copy_merged(self): Copies the outputs of the scheduled gates to the gates
+                       merged into them.
+
+    get_fanout(self, devices): Returns the scheduled sources and components
+                               that the devices drive, in execution order.
+    """
+
+    def __init__(self, devices):
+        """Initialise an empty schedule."""
+        self.devices = devices
+
+        self.sources = []  # non-gate devices, in sweep order
+        self.components = []  # gate components, in execution order
+        self.cyclic = []  # cyclic[i] is True if components[i] has a loop
+        self.levels = []  # levels[n] = gates on level n + 1
+        self.feedback = []  # the cyclic components
+        self.order = []  # every device in execution order
+        self.position = {}  # {device_id: position in self.order}
+        self.component_of = {}  # {device_id: index in self.components}
+        self.readers = {}  # {device_id: scheduled devices reading it}
+
+        self.prune = False  # only schedule the cone of influence if True
+        self.monitored = set()  # {(device_id, output_id)} of the monitors
+        self.cone = None  # ids of the devices in the cone of influence
+
+        self.fold = False  # fold constants and remove dead logic if True
+        self.folded = {}  # {device_id: constant output} of folded gates
+        self.folded_switches = []  # [(switch, state)] the constants rely on
+        # [(device, output)] of the constants that had not reached their
+        # values and the identical gates with different outputs, with their
+        # outputs when the schedule was built
+        self.unsettled = []
+        self.dead = set()  # ids of the devices that drive nothing
+
+        self.merge = False  # merge structurally identical gates if True
+        self.merged = {}  # {device_id: id of the gate it was merged into}
+        self.duplicates = []  # [(merged gate, gate it was merged into)]
+
+        self.device_count = None  # number of devices when last built
+
+    def invalidate(self):
+        """Mark the schedule and the cone of influence as out of date."""
+        self.device_count = None
+        self.cone = None
+
+    def find_cone(self, device_ids, cone):
+        """Add the devices and their transitive fan-in to the cone.
+
+        Devices already in the cone are not walked again, so extending a
+        cone only visits its new devices. Return the cone.
+        """
+        by_id = {device.device_id: device
+                 for device in self.devices.devices_list}
+        stack = [device_id for device_id in device_ids
+                 if device_id not in cone]
+        while stack:
+            device_id = stack.pop()
+            if device_id in cone or device_id not in by_id:
+                continue
+            cone.add(device_id)
+            for connected_output in by_id[device_id].inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] not in cone:
+                    stack.append(connected_output[0])
+        return cone
+
+    def add_monitor(self, device_id, output_id):
+        """Extend the cone with the fan-in of a new monitor.
+
+        The schedule only needs rebuilding if the monitor is outside the
+        cone.
+        """
+        self.monitored.add((device_id, output_id))
+        if self.prune and self.cone is not None and \
+                device_id not in self.cone:
+            self.find_cone([device_id], self.cone)
+            self.device_count = None  # rebuild, keeping the extended cone
+        elif device_id in self.dead:
+            self.device_count = None
+
+    def remove_monitor(self, device_id, output_id):
+        """Forget a removed monitor, keeping the cone.
+
+        The fan-in of the monitor stays in the cone, so it is kept up to
+        date in case the monitor is made again. The schedule only needs
+        rebuilding if the monitor kept dead logic alive.
+        """
+        self.monitored.discard((device_id, output_id))
+        if self.fold:
+            self.device_count = None  # rebuild, keeping the cone
+
+    def is_pruned(self, device_id):
+        """Return True if the device is left out of the cone of influence.
+
+        Switches, clocks, RC and SIGGEN devices are never pruned.
+        """
+        devices = self.devices
+        if not self.prune or self.cone is None or device_id in self.cone:
+            return False
+        device = devices.get_device(device_id)
+        return device is not None and device.device_kind not in [
+            devices.SWITCH, devices.CLOCK, devices.RC, devices.SIGGEN]
+
+    def is_stale(self):
+        """Return True if the schedule must be rebuilt."""
+        if self.device_count != len(self.devices.devices_list):
+            return True
+        for switch, state in self.folded_switches:
+            if switch.switch_state != state:
+                return True
+        for device, signal in self.unsettled:
+            if device.outputs[None] != signal:
+                return True  # more gates may be folded or merged now
+        return False
+
+    def fold_constants(self, scheduled):
+        """Fold the gates whose outputs are fixed by the switches.
+
+        A gate is constant if an input fixes its output (LOW for AND and
+        NAND, HIGH for OR and NOR), or if all its inputs are constant. It is
+        only folded once its output and those inputs have settled to their
+        constants, so the schedule is rebuilt when the outputs of the
+        constants listed in self.unsettled change. Return the
+        scheduled devices without the folded gates.
+        """
+        devices = self.devices
+        rules = {devices.AND: (devices.HIGH, devices.HIGH),
+                 devices.OR: (devices.LOW, devices.LOW),
+                 devices.NAND: (devices.HIGH, devices.LOW),
+                 devices.NOR: (devices.LOW, devices.HIGH)}
+        readers = {}
+        for device in scheduled:
+            if device.device_kind in devices.gate_types:
+                for connected_output in device.inputs.values():
+                    if connected_output is not None:
+                        readers.setdefault(connected_output[0],
+                                           []).append(device)
+
+        constants = {}  # {device_id: constant output}
+        settled = set()  # constants that have reached their values
+        switches = {}  # {device_id: switches a settled constant relies on}
+        stack = []
+        for device in scheduled:
+            if device.device_kind == devices.SWITCH:
+                device_id = device.device_id
+                constants[device_id] = device.switch_state
+                if device.outputs[None] == device.switch_state:
+                    settled.add(device_id)
+                switches[device_id] = {device}
+                stack.extend(readers.get(device_id, []))
+
+        while stack:
+            gate = stack.pop()
+            if gate.device_id in settled:
+                continue
+            sources = [connected_output[0] if connected_output is not None
+                       else None for connected_output in gate.inputs.values()]
+            if None in sources:
+                continue  # the sweep must report the unconnected input
+            known = [source for source in sources if source in constants]
+            if gate.device_kind == devices.XOR:
+                if len(known) < len(sources):
+                    continue
+                constant = constants[sources[0]] ^ constants[sources[1]]
+                used = [known]
+            else:
+                x, y = rules[gate.device_kind]
+                fixing = [source for source in known
+                          if constants[source] != x]
+                if fixing:
+                    constant = 1 - y
+                    # Any settled input fixing the output is enough
+                    used = [[source] for source in fixing]
+                elif len(known) == len(sources):
+                    constant = y
+                    used = [known]
+                else:
+                    continue
+            is_new = gate.device_id not in constants
+            constants[gate.device_id] = constant
+            for inputs in used:
+                if gate.outputs[None] == constant and \
+                        settled.issuperset(inputs):
+                    settled.add(gate.device_id)
+                    switches[gate.device_id] = set().union(
+                        *(switches[source] for source in inputs))
+                    break
+            if is_new or gate.device_id in settled:
+                stack.extend(readers.get(gate.device_id, []))
+
+        self.folded = {}
+        self.unsettled = []
+        folded_switches = set()
+        for device in scheduled:
+            device_id = device.device_id
+            if device_id not in constants:
+                continue
+            if device_id not in settled:
+                self.unsettled.append((device, device.outputs[None]))
+            elif device.device_kind != devices.SWITCH:
+                self.folded[device_id] = constants[device_id]
+                folded_switches.update(switches[device_id])
+        self.folded_switches = [(switch, switch.switch_state)
+                                for switch in folded_switches]
+        return [device for device in scheduled
+                if device.device_id not in self.folded]
+
+    def remove_dead(self, scheduled):
+        """Remove the D-types and gates that drive nothing.
+
+        A device is dead if none of its outputs is monitored or read by a
+        scheduled device that is not dead. Return the scheduled devices
+        without the dead ones.
+        """
+        devices = self.devices
+        monitored = {device_id for device_id, _ in self.monitored}
+        by_id = {device.device_id: device for device in scheduled}
+        reads = dict.fromkeys(by_id, 0)
+        for device in scheduled:
+            for connected_output in device.inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in reads:
+                    reads[connected_output[0]] += 1
+
+        def removable(device_id):
+            return reads[device_id] == 0 and device_id not in monitored and \
+                device_id not in self.dead and by_id[device_id].device_kind \
+                in devices.gate_types + [devices.D_TYPE]
+
+        self.dead = set()
+        stack = [device_id for device_id in by_id if removable(device_id)]
+        while stack:
+            device_id = stack.pop()
+            if not removable(device_id):
+                continue
+            self.dead.add(device_id)
+            for connected_output in by_id[device_id].inputs.values():
+                if connected_output is not None and \
+                        connected_output[0] in reads:
+                    reads[connected_output[0]] -= 1
+                    stack.append(connected_output[0])
+        return [device for device in scheduled
+                if device.device_id not in self.dead]
+
+    def merge_gate(self, gate, hashes):
+        """Merge the gate into an earlier gate with the same structure.
+
+        hashes maps (device_kind, sorted input sources) to the first gate
+        found with them. The gates are visited after the gates driving them,
+        so gates driven by merged gates can be merged too. A gate is only
+        merged if its output is the same as the output of the other gate.
+        Return True if the gate was merged.
+        """
+        if None in gate.inputs.values():
+            return False
+        sources = [self.resolve(connected_output)
+                   for connected_output in gate.inputs.values()]
+        key = (gate.device_kind, tuple(sorted(
+            sources, key=lambda source: (source[0], str(source[1])))))
+        original = hashes.setdefault(key, gate)
+        if original is gate:
+            return False
+        if gate.outputs[None] != original.outputs[None]:
+            self.unsettled.extend([(gate, gate.outputs[None]),
+                                   (original, original.outputs[None])])
+            return False
+        self.merged[gate.device_id] = original.device_id
+        self.duplicates.append((gate, original))
+        return True
+
+    def resolve(self, connected_output):
+        """Return the output that the engines read in place of the given one.
+
+        This is the output of the gate a merged gate was merged into.
+        """
+        device_id, output_id = connected_output
+        if device_id in self.merged:
+            return (self.merged[device_id], output_id)
+        return connected_output
+
+    def copy_merged(self):
+        """Copy the outputs of the scheduled gates to the gates merged into
+        them."""
+        for duplicate, original in self.duplicates:
+            duplicate.outputs[None] = original.outputs[None]
+
+    def get_fanout(self, devices):
+        """Return the scheduled sources and components that the devices
+        drive, directly or through other devices, including the devices.
+
+        Return [sources, components, cyclic] in the form of self.sources,
+        self.components and self.cyclic, in execution order. Only the fanout
+        is walked, so the time taken grows with its size rather than with
+        the network.
+        """
+        fanout = set()
+        stack = [device.device_id for device in devices
+                 if device.device_id in self.position]
+        while stack:
+            device_id = stack.pop()
+            if device_id in fanout:
+                continue
+            fanout.add(device_id)
+            for reader in self.readers.get(device_id, []):
+                if reader.device_id not in fanout:
+                    stack.append(reader.device_id)
+        source_count = len(self.sources)
+        positions = sorted(self.position[device_id] for device_id in fanout
+                           if self.position[device_id] < source_count)
+        indices = sorted({self.component_of[device_id]
+                          for device_id in fanout
+                          if device_id in self.component_of})
+        return [[self.order[position] for position in positions],
+                [self.components[index] for index in indices],
+                [self.cyclic[index] for index in indices]]
+
+    def find_components(self, gates):
+        """Return the strongly connected components of the given gates.
+
+        Edges go from a gate to the gates driving its inputs, so every
+        component is returned after the components it depends on. This is
+        an iterative version of Tarjan's algorithm, so long chains of gates
+        do not reach the recursion limit.
+        """
+        gate_ids = {gate.device_id for gate in gates}
+        drivers = {}
+        for gate in gates:
+            drivers[gate.device_id] = [
+                connected_output[0]
+                for connected_output in gate.inputs.values()
+                if connected_output is not None and
+                connected_output[0] in gate_ids]
+
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for gate in gates:
+            if gate.device_id in index:
+                continue
+            work = [(gate.device_id, 0)]
+            while work:
+                device_id, child = work.pop()
+                if child == 0:
+                    index[device_id] = lowlink[device_id] = len(index)
+                    stack.append(device_id)
+                    on_stack.add(device_id)
+                children = drivers[device_id]
+                if child < len(children):
+                    work.append((device_id, child + 1))
+                    driver = children[child]
+                    if driver not in index:
+                        work.append((driver, 0))
+                    elif driver in on_stack:
+                        lowlink[device_id] = min(lowlink[device_id],
+                                                 index[driver])
+                    continue
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[device_id])
+                if lowlink[device_id] == index[device_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == device_id:
+                            break
+                    components.append(component)
+        return components
+
+    def build(self):
+        """Split the gates into components and build the execution order."""
+        devices = self.devices
+        if not self.prune:
+            self.cone = None
+        elif self.cone is None:
+            self.cone = self.find_cone(
+                [device_id for device_id, _ in self.monitored], set())
+        scheduled = [device for device in devices.devices_list
+                     if self.cone is None or device.device_id in self.cone or
+                     device.device_kind in [devices.SWITCH, devices.CLOCK,
+                                            devices.RC, devices.SIGGEN]]
+        self.folded = {}
+        self.folded_switches = []
+        self.unsettled = []
+        self.dead = set()
+        self.merged = {}
+        self.duplicates = []
+        if self.fold:
+            scheduled = self.remove_dead(self.fold_constants(scheduled))
+
+        source_kinds = [devices.SWITCH, devices.D_TYPE, devices.CLOCK,
+                        devices.RC, devices.SIGGEN]
+        self.sources = [device for kind in source_kinds
+                        for device in scheduled
+                        if device.device_kind == kind]
+        gates = [device for kind in devices.gate_types
+                 for device in scheduled
+                 if device.device_kind == kind]
+        sweep_index = {gate.device_id: i for i, gate in enumerate(gates)}
+        by_id = {gate.device_id: gate for gate in gates}
+
+        # Components come out after their drivers, so their level is one more
+        # than the highest level among the components driving them
+        component_of = {}
+        level_of = []
+        components = []
+        hashes = {}  # {(kind, sorted inputs): first gate with them}
+        for number, component in enumerate(self.find_components(gates)):
+            members = sorted((by_id[device_id] for device_id in component),
+                             key=lambda gate: sweep_index[gate.device_id])
+            level = 0
+            cyclic = len(members) > 1
+            for gate in members:
+                component_of[gate.device_id] = number
+            for gate in members:
+                for connected_output in gate.inputs.values():
+                    if connected_output is None or \
+                            connected_output[0] not in component_of:
+                        continue
+                    driver = component_of[connected_output[0]]
+                    if driver == number:
+                        cyclic = True  # includes a gate driving itself
+                    else:
+                        level = max(level, level_of[driver])
+            level_of.append(level + 1)
+            if self.merge and not cyclic and \
+                    self.merge_gate(members[0], hashes):
+                continue
+            components.append((level + 1, sweep_index[members[0].device_id],
+                               members, cyclic))
+
+        # Keep the sweep order within each level
+        components.sort(key=lambda item: (item[0], item[1]))
+        self.components = [members for _, _, members, _ in components]
+        self.cyclic = [cyclic for _, _, _, cyclic in components]
+        self.feedback = [members for _, _, members, cyclic in components
+                         if cyclic]
+        self.levels = []
+        for level, _, members, _ in components:
+            if len(self.levels) < level:
+                self.levels.append([])
+            self.levels[level - 1].extend(members)
+        self.order = self.sources + [gate for members in self.components
+                                     for gate in members]
+        self.position = {device.device_id: position
+                         for position, device in enumerate(self.order)}
+        self.component_of = {gate.device_id: index
+                             for index, members in enumerate(self.components)
+                             for gate in members}
+        self.readers = {}
+        for device in self.order:
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    driver_id = self.resolve(connected_output)[0]
+                    self.readers.setdefault(driver_id, []).append(device)
+        self.device_count = len(devices.devices_list)
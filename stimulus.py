@@ -0,0 +1,146 @@
+"""Read switch changes from a stimulus file and apply them at their cycles.
+
+Used in the Logic Simulator project to drive testbenches with thousands of
+switch changes in a single run, instead of one command or click at a time
+between runs. A stimulus file has one event per line:
+
+    # cycle switch value
+    0 SW1 1
+    12 SW2 0
+    12 SW1 0
+
+The cycle is the number of cycles completed by the network when the switch
+is set, so an event at cycle 0 applies before the first cycle. Events must
+be in order of their cycles. Blank lines and text after # are ignored. The
+file is read lazily, one line per event, so it can be larger than memory.
+
+Classes
+-------
+Stimulus - applies a stream of switch changes at their cycles.
+
+Functions
+---------
+read_stimulus(path): Yields the events of a stimulus file.
+
+get_sequence(events, cycles): Returns the switch settings of each cycle.
+"""
+
+
+class Stimulus:
+
+    """Apply a stream of switch changes at their cycles.
+
+    The events are taken one at a time from an iterable, such as the
+    generator returned by read_stimulus(), as the simulation reaches their
+    cycles. The next event is held until its cycle, so a run can be split
+    into several calls of Network.run_cycles() with the same stimulus.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    events: iterable of (cycle, switch name, value) events in order of
+            their cycles.
+
+    Public methods
+    --------------
+    apply(self, cycle): Sets the switches of the events at the cycle.
+
+    is_finished(self): Returns True once every event has been applied.
+    """
+
+    def __init__(self, names, devices, events):
+        """Start reading the events."""
+        self.names = names
+        self.devices = devices
+        # {switch name: switch_id}, looked up once rather than per event
+        self.switch_ids = {names.get_name_string(switch_id): switch_id
+                           for switch_id in
+                           devices.find_devices(devices.SWITCH)}
+        self.events = iter(events)
+        self.pending = None  # next (cycle, switch name, value), not applied
+        self.finished = False
+        self.last_cycle = 0  # cycle of the last event taken
+        self.applied = 0  # number of events applied
+        self.next_event()
+
+    def next_event(self):
+        """Take the next event from the stream into self.pending."""
+        self.pending = next(self.events, None)
+        if self.pending is None:
+            self.finished = True
+            return
+        cycle = self.pending[0]
+        if cycle < self.last_cycle:
+            raise ValueError("The event at cycle " + str(cycle) +
+                             " comes after cycle " + str(self.last_cycle))
+        self.last_cycle = cycle
+
+    def apply(self, cycle):
+        """Set the switches of the events at the cycle.
+
+        Raise a ValueError if an event is for an earlier cycle, which has
+        been simulated already, names a device that is not a switch or has
+        a value other than 0 or 1. Return the number of events applied.
+        """
+        applied = 0
+        while self.pending is not None and self.pending[0] <= cycle:
+            [event_cycle, name, value] = self.pending
+            if event_cycle < cycle:
+                raise ValueError("The event for " + str(name) +
+                                 " at cycle " + str(event_cycle) +
+                                 " is before cycle " + str(cycle))
+            if name not in self.switch_ids:
+                raise ValueError("Not a switch: " + str(name))
+            if value not in [self.devices.LOW, self.devices.HIGH]:
+                raise ValueError("Invalid value for switch " + str(name) +
+                                 ": " + str(value))
+            self.devices.set_switch(self.switch_ids[name], value)
+            applied += 1
+            self.next_event()
+        self.applied += applied
+        return applied
+
+    def is_finished(self):
+        """Return True once every event has been applied."""
+        return self.finished
+
+
+def read_stimulus(path):
+    """Yield the (cycle, switch name, value) events of a stimulus file.
+
+    The file is read one line at a time. Raise a ValueError, naming the
+    line, for a line that is not a cycle, a switch name and a value.
+    """
+    with open(path) as stimulus_file:
+        for line_number, line in enumerate(stimulus_file, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) != 3 or not fields[0].isdigit() or \
+                    fields[2] not in ["0", "1"]:
+                raise ValueError("Line " + str(line_number) + " of " +
+                                 str(path) + " is not a cycle, a switch "
+                                 "and a value of 0 or 1: " + line.strip())
+            yield (int(fields[0]), fields[1], int(fields[2]))
+
+
+def get_sequence(events, cycles):
+    """Return one {switch name: value} dictionary per cycle of the events.
+
+    The dictionary of a cycle holds the events applied before it, as taken
+    by faultsim.FaultSimulator.run(). Events from the cycles after the last
+    are ignored. Raise a ValueError if the events are not in order of their
+    cycles.
+    """
+    sequence = [{} for _ in range(cycles)]
+    last_cycle = 0
+    for cycle, name, value in events:
+        if cycle < last_cycle:
+            raise ValueError("The event at cycle " + str(cycle) +
+                             " comes after cycle " + str(last_cycle))
+        last_cycle = cycle
+        if cycle >= cycles:
+            break
+        sequence[cycle][name] = value
+    return sequence
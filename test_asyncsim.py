@@ -0,0 +1,116 @@
+"""Test the asyncsim module."""
+import asyncio
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from stimulus import Stimulus
+from asyncsim import AsyncSimulator
+from test_bitsim import parse_file
+
+
+def test_run_in_chunks():
+    """Test if a run in chunks records the signals of a single run."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 1)
+    assert network.run_cycles(25, monitors)[1] is None
+    expected = monitors.monitors_dictionary
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 1)
+    simulator = AsyncSimulator(network, monitors)
+    assert asyncio.run(simulator.run(25, chunk=4)) is None
+    assert monitors.monitors_dictionary == expected
+
+
+def test_chunks():
+    """Test if the signals of every chunk are yielded."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 1)
+    simulator = AsyncSimulator(network, monitors)
+
+    async def collect():
+        return [signals async for signals in simulator.chunks(10, 4)]
+    chunks = asyncio.run(collect())
+
+    assert [len(next(iter(signals.values()))) for signals in chunks] == \
+        [4, 4, 2]
+    for key, signal_list in monitors.monitors_dictionary.items():
+        assert signal_list == [signal for signals in chunks
+                               for signal in signals[key]]
+
+
+def test_other_tasks_run_between_chunks():
+    """Test if the event loop runs other tasks between chunks."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 1)
+    simulator = AsyncSimulator(network, monitors)
+    seen = []
+
+    async def watch():
+        while True:
+            seen.append(network.cycles_completed)
+            await asyncio.sleep(0)
+
+    async def main():
+        watcher = asyncio.ensure_future(watch())
+        await simulator.run(12, chunk=3)
+        watcher.cancel()
+    asyncio.run(main())
+
+    assert 3 in seen and 6 in seen and 9 in seen
+    assert all(cycles % 3 == 0 for cycles in seen)
+
+
+def test_cancel_at_chunk_boundary():
+    """Test if a cancelled run leaves every completed cycle recorded."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 1)
+    simulator = AsyncSimulator(network, monitors)
+
+    async def main():
+        task = asyncio.ensure_future(simulator.run(10 ** 6, chunk=5))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    asyncio.run(main())
+
+    assert 0 < network.cycles_completed < 10 ** 6
+    assert network.cycles_completed % 5 == 0
+    for signal_list in monitors.monitors_dictionary.values():
+        assert len(signal_list) == network.cycles_completed
+
+
+def test_failed_cycle():
+    """Test if the run stops at the cycle that oscillates."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, NOR1_ID, I1, I2] = names.lookup(["Sw1", "Nor1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(NOR1_ID, devices.NOR, 2)
+    network.make_connection(SW1_ID, None, NOR1_ID, I1)
+    network.make_connection(NOR1_ID, None, NOR1_ID, I2)
+    monitors.make_monitor(NOR1_ID, None)
+    # The switch releases the NOR gate, which then oscillates, in cycle 5
+    stimulus = Stimulus(names, devices, iter([(5, "Sw1", 0)]))
+    simulator = AsyncSimulator(network, monitors, stimulus)
+
+    assert asyncio.run(simulator.run(9, chunk=3)) == 5
+    assert monitors.monitors_dictionary[(NOR1_ID, None)] == \
+        [devices.LOW] * 5
+
+
+def test_invalid_chunk():
+    """Test if a chunk of no cycles raises a ValueError."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    simulator = AsyncSimulator(network, monitors)
+    with pytest.raises(ValueError):
+        asyncio.run(simulator.run(10, chunk=0))
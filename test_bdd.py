@@ -0,0 +1,201 @@
+"""Test the bdd module."""
+import itertools
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from bdd import BDD, SymbolicNetwork
+from test_bitsim import parse_file
+
+
+def make_chain(kind, switches):
+    """Return names, devices and network of a chain of two-input gates of
+    the kind over the switches."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    switch_ids = names.lookup(["SW" + str(index)
+                               for index in range(switches)])
+    gate_ids = names.lookup(["G" + str(index)
+                             for index in range(1, switches)])
+    [I1, I2] = names.lookup(["I1", "I2"])
+    for switch_id in switch_ids:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    driver = switch_ids[0]
+    for gate_id, switch_id in zip(gate_ids, switch_ids[1:]):
+        kind_id = kind(devices)
+        devices.make_device(gate_id, kind_id,
+                            None if kind_id == devices.XOR else 2)
+        network.make_connection(driver, None, gate_id, I1)
+        network.make_connection(switch_id, None, gate_id, I2)
+        driver = gate_id
+    return names, devices, network
+
+
+def test_reduced_and_canonical():
+    """Test if equivalent functions are the same node."""
+    bdd = BDD(3)
+    [a, b, c] = [bdd.get_variable(variable) for variable in range(3)]
+    # De Morgan
+    assert bdd.negate(bdd.conjoin(a, b)) == \
+        bdd.disjoin(bdd.negate(a), bdd.negate(b))
+    assert bdd.exclusive_or(a, a) == bdd.FALSE
+    assert bdd.disjoin(a, bdd.negate(a)) == bdd.TRUE
+    # Distributivity
+    assert bdd.conjoin(a, bdd.disjoin(b, c)) == \
+        bdd.disjoin(bdd.conjoin(a, b), bdd.conjoin(a, c))
+    assert bdd.make_node(0, b, b) == b
+
+
+@pytest.mark.parametrize("cache_limit", [1, 100000])
+def test_count_and_cubes(cache_limit):
+    """Test if counts, cubes and evaluation agree with every assignment of
+    random functions, also with a computed table of a single entry."""
+    rng = random.Random(4)
+    bdd = BDD(5, cache_limit=cache_limit)
+    functions = [bdd.get_variable(variable) for variable in range(5)]
+    operations = [bdd.conjoin, bdd.disjoin, bdd.exclusive_or]
+    for _ in range(30):
+        function = rng.choice(operations)(rng.choice(functions),
+                                          rng.choice(functions))
+        if rng.random() < 0.3:
+            function = bdd.negate(function)
+        functions.append(function)
+
+    for function in functions:
+        true = [values for values in itertools.product([False, True],
+                                                       repeat=5)
+                if bdd.evaluate(function, values)]
+        assert bdd.count_assignments(function) == len(true)
+        covered = []
+        for cube in bdd.get_cubes(function):
+            free = [variable for variable in range(5) if variable not in cube]
+            for free_values in itertools.product([False, True],
+                                                 repeat=len(free)):
+                values = dict(cube)
+                values.update(zip(free, free_values))
+                covered.append(tuple(values[variable]
+                                     for variable in range(5)))
+        assert sorted(covered) == true
+
+
+def test_node_limit():
+    """Test if the node limit raises a ValueError."""
+    bdd = BDD(8, node_limit=10)
+    function = bdd.FALSE
+    with pytest.raises(ValueError, match="node limit of 10"):
+        for variable in range(8):
+            function = bdd.exclusive_or(function, bdd.get_variable(variable))
+
+
+def test_functions_match_simulation():
+    """Test if the diagram of every gate gives its simulated output for
+    every switch setting."""
+    rng = random.Random(7)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    switch_ids = names.lookup(["SW" + str(index) for index in range(4)])
+    [I1, I2, I3] = names.lookup(["I1", "I2", "I3"])
+    for switch_id in switch_ids:
+        devices.make_device(switch_id, devices.SWITCH, 0)
+    drivers = list(switch_ids)
+    for index in range(15):
+        [gate_id] = names.lookup(["G" + str(index)])
+        kind = rng.choice(devices.gate_types)
+        if kind == devices.XOR:  # always two inputs
+            inputs = 2
+            devices.make_device(gate_id, kind, None)
+        else:
+            inputs = rng.randint(1, 3)
+            devices.make_device(gate_id, kind, inputs)
+        for input_id in [I1, I2, I3][:inputs]:
+            network.make_connection(rng.choice(drivers), None, gate_id,
+                                    input_id)
+        drivers.append(gate_id)
+    symbolic = SymbolicNetwork(names, devices, network)
+
+    for values in itertools.product([devices.LOW, devices.HIGH], repeat=4):
+        for switch_id, value in zip(switch_ids, values):
+            devices.set_switch(switch_id, value)
+        assert network.execute_network()
+        for device_id in drivers:
+            name = names.get_name_string(device_id)
+            assert symbolic.bdd.evaluate(symbolic.get_function(name),
+                                         values) == \
+                (network.get_output_signal(device_id, None) == devices.HIGH)
+
+
+def test_example_queries():
+    """Test the queries on a definition file with D-types and feedback."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example2.txt")
+    symbolic = SymbolicNetwork(names, devices, network)
+    assert symbolic.count_assignments("G1") == 4  # SW1 and SW2, of 16
+    assert list(symbolic.find_assignments("G1")) == \
+        [{"SW1": devices.HIGH, "SW2": devices.HIGH}]
+    assert not symbolic.is_equivalent("G1", "G2")
+    difference = symbolic.find_difference("G1", "G2")
+    values = [difference.get(name, devices.LOW)
+              for name in ["SW1", "SW2", "SW3", "SW4"]]
+    assert symbolic.bdd.evaluate(symbolic.get_function("G1"), values) != \
+        symbolic.bdd.evaluate(symbolic.get_function("G2"), values)
+    with pytest.raises(ValueError, match="not a function of the switches"):
+        symbolic.get_function("G9")
+    with pytest.raises(ValueError, match="Not the output"):
+        symbolic.get_function("G6.Q")
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    symbolic = SymbolicNetwork(names, devices, network)
+    with pytest.raises(ValueError, match="feedback loop"):
+        symbolic.get_function("G1")
+
+
+def test_many_switches():
+    """Test if the parity of 40 switches is built and queried without
+    enumerating the 2^40 settings."""
+    names, devices, network = make_chain(lambda devices: devices.XOR, 40)
+    symbolic = SymbolicNetwork(names, devices, network)
+    assert symbolic.count_assignments("G39") == 2 ** 39
+    # Two nodes per switch, but the first, and the constants
+    assert symbolic.bdd.count_nodes(symbolic.get_function("G39")) == 81
+    assert symbolic.find_difference("G39", "G39") is None
+
+    names, devices, network = make_chain(lambda devices: devices.AND, 30)
+    symbolic = SymbolicNetwork(names, devices, network)
+    assert symbolic.count_assignments("G29") == 1
+    [assignment] = symbolic.find_assignments("G29")
+    assert assignment == {"SW" + str(index): devices.HIGH
+                          for index in range(30)}
+
+
+def test_equivalence():
+    """Test if an XOR gate built of four NAND gates is equivalent to an XOR
+    gate, and differs from an OR gate only when both switches are HIGH."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [SW1, SW2, XOR1, OR1, N1, N2, N3, N4, I1, I2] = names.lookup(
+        ["SW1", "SW2", "Xor1", "Or1", "N1", "N2", "N3", "N4", "I1", "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(XOR1, devices.XOR)
+    devices.make_device(OR1, devices.OR, 2)
+    for gate_id in [N1, N2, N3, N4]:
+        devices.make_device(gate_id, devices.NAND, 2)
+    for first, second, gate_id in [(SW1, SW2, XOR1), (SW1, SW2, OR1),
+                                   (SW1, SW2, N1), (SW1, N1, N2),
+                                   (SW2, N1, N3), (N2, N3, N4)]:
+        network.make_connection(first, None, gate_id, I1)
+        network.make_connection(second, None, gate_id, I2)
+    symbolic = SymbolicNetwork(names, devices, network)
+
+    assert symbolic.is_equivalent("N4", "Xor1")
+    assert symbolic.find_difference("N4", "Xor1") is None
+    assert not symbolic.is_equivalent("N4", "Or1")
+    assert symbolic.find_difference("N4", "Or1") == {"SW1": devices.HIGH,
+                                                     "SW2": devices.HIGH}
@@ -0,0 +1,177 @@
+"""Test the bitsim module."""
+import itertools
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from bitsim import BitParallel
+
+
+def parse_file(path, seed=0, engine="sweep", prune=False, fold=False):
+    """Return names, devices, network and monitors for the definition file."""
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine, prune, fold)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    parser.parse_network()
+    return names, devices, network, monitors
+
+
+def switch_scenarios(names, devices):
+    """Return every combination of the switches in the network."""
+    switch_names = [names.get_name_string(switch_id) for switch_id
+                    in devices.find_devices(devices.SWITCH)]
+    return [dict(zip(switch_names, states)) for states
+            in itertools.product([0, 1], repeat=len(switch_names))]
+
+
+@pytest.mark.parametrize("path", [
+    "example_files/example1.txt",
+    "example_files/example5.txt",
+    "example_files/example6.txt",
+    "example_files/example7.txt",
+])
+def test_scenarios_match_sweep(path):
+    """Test if every scenario has the traces of a sweep with its switches."""
+    names, devices, network, monitors = parse_file(path)
+    scenarios = switch_scenarios(names, devices)
+    simulator = BitParallel(names, devices, network, monitors)
+    traces = simulator.run(scenarios, 20)
+
+    assert len(traces) == len(scenarios)
+    for scenario, trace, steady_states in zip(scenarios, traces,
+                                              simulator.steady_states):
+        names, devices, network, monitors = parse_file(path)
+        for name, state in scenario.items():
+            devices.set_switch(names.query(name), state)
+        results = []
+        for _ in range(20):
+            results.append(network.execute_network())
+            monitors.record_signals()
+        assert trace == monitors.monitors_dictionary
+        assert steady_states == results
+
+
+def test_random_scenarios_match_sweep():
+    """Test if every scenario has the traces of a sweep with its switches on
+    random circuits with feedback, D-types and every kind of source."""
+    from test_network import make_random_network  # imports this module
+    for seed in range(30):
+        rng = random.Random(seed)
+        names, devices, network, monitors, switch_ids = \
+            make_random_network(seed)
+        switch_names = [names.get_name_string(switch_id)
+                        for switch_id in switch_ids]
+        scenarios = [{name: rng.randint(0, 1) for name in switch_names}
+                     for _ in range(4)]
+        simulator = BitParallel(names, devices, network, monitors)
+        traces = simulator.run(scenarios, 15)
+
+        for scenario, trace, steady_states in zip(scenarios, traces,
+                                                  simulator.steady_states):
+            names, devices, network, monitors, switch_ids = \
+                make_random_network(seed)
+            for name, state in scenario.items():
+                devices.set_switch(names.query(name), state)
+            results = []
+            for _ in range(15):
+                results.append(network.execute_network())
+                monitors.record_signals()
+            assert [trace, steady_states] == \
+                [monitors.monitors_dictionary, results], seed
+
+
+@pytest.mark.parametrize("block_cycles", [None, 1, 3])
+def test_source_blocks(block_cycles):
+    """Test if the source outputs are the same whatever blocks of cycles
+    they are filled in."""
+    from test_network import make_random_network  # imports this module
+    for seed in range(10):
+        names, devices, network, monitors, switch_ids = \
+            make_random_network(seed)
+        for _ in range(seed):
+            network.execute_network()  # start the sources mid-waveform
+        simulator = BitParallel(names, devices, network, monitors)
+        expected = simulator.run([{}], 25)
+
+        simulator.reset(1)
+        if block_cycles is not None:
+            simulator.fill_sources(block_cycles)
+        switch_masks = simulator.get_switch_masks([{}])
+        traces = [{key: list(signals) for key, signals in
+                   monitors.monitors_dictionary.items()}]
+        for _ in range(25):
+            simulator.execute_cycle(switch_masks)
+            for key, signals in traces[0].items():
+                signals.append(simulator.get_signal(key, 0))
+        assert traces == expected, seed
+
+
+def test_run_leaves_network_unchanged():
+    """Test if the network keeps its state after running scenarios."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example5.txt")
+    network.execute_network()
+    state = [(dict(device.outputs), device.dtype_memory, device.clock_counter,
+              device.switch_state) for device in devices.devices_list]
+
+    BitParallel(names, devices, network, monitors).run(
+        [{"SW": 0}, {"SW": 1}], 10)
+    assert state == [(device.outputs, device.dtype_memory,
+                      device.clock_counter, device.switch_state)
+                     for device in devices.devices_list]
+    assert network.cycles_completed == 1
+
+
+def test_missing_switch_keeps_state():
+    """Test if switches missing from a scenario keep their current state."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    [SW1_ID] = names.lookup(["SW1"])
+    devices.set_switch(SW1_ID, devices.HIGH)
+    simulator = BitParallel(names, devices, network, monitors)
+
+    masks = simulator.get_switch_masks([{}, {"SW1": 0}, {"SW2": 1}])
+    assert masks[SW1_ID] == 0b101
+
+
+@pytest.mark.parametrize("scenario", [{"G1": 1}, {"XYZ": 1}, {"SW1": 2}])
+def test_invalid_scenario(scenario):
+    """Test if unknown switches and invalid states raise a ValueError."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    simulator = BitParallel(names, devices, network, monitors)
+    with pytest.raises(ValueError):
+        simulator.run([scenario], 5)
+
+
+def test_unconnected_network():
+    """Test if a network with an unconnected input raises a ValueError."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [AND1_ID] = names.lookup(["And1"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    with pytest.raises(ValueError):
+        BitParallel(names, devices, network, monitors).run([{}], 5)
+
+
+def test_folded_network():
+    """Test if a network with folded gates raises a ValueError."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example4.txt", fold=True)
+    network.execute_network()
+    network.execute_network()
+    assert network.schedule.folded
+    with pytest.raises(ValueError):
+        BitParallel(names, devices, network, monitors).run([{}], 5)
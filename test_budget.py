@@ -0,0 +1,126 @@
+"""Test the budget module."""
+import asyncio
+import threading
+
+import pytest
+
+import budget as budget_module
+from budget import Budget
+from periodic import PeriodDetector
+from asyncsim import AsyncSimulator
+from test_bitsim import parse_file
+
+
+def test_cycle_limit():
+    """Test if the cycles are counted and refused once spent."""
+    budget = Budget(cycles=3)
+    assert [budget.allow_cycle() for _ in range(5)] == \
+        [True, True, True, False, False]
+    assert budget.cycles_used == 3
+    assert budget.stopped == budget.CYCLE_LIMIT
+    assert budget.get_text() == "Cycle limit of 3 cycles reached"
+
+
+def test_time_limit(monkeypatch):
+    """Test if no cycle is started once the deadline has passed."""
+    now = [100.0]
+    monkeypatch.setattr(budget_module.time, "monotonic", lambda: now[0])
+    budget = Budget(seconds=2)
+    assert budget.allow_cycle()
+    now[0] = 101.5
+    assert budget.allow_cycle()
+    now[0] = 102.0
+    assert not budget.allow_cycle()
+    assert budget.stopped == budget.TIME_LIMIT
+    assert budget.get_text() == ("Time limit of 2 seconds reached after 2 "
+                                 "cycles")
+
+
+def test_cancel():
+    """Test if a cancelled budget refuses every cycle."""
+    budget = Budget()
+    assert budget.allow_cycle()
+    assert budget.get_text() is None
+    budget.cancel()
+    assert budget.is_cancelled()
+    assert not budget.allow_cycle()
+    assert budget.stopped == budget.CANCELLED
+
+
+@pytest.mark.parametrize("seconds, cycles", [(-1, None), (None, -1)])
+def test_invalid_budget(seconds, cycles):
+    """Test if negative limits raise a ValueError."""
+    with pytest.raises(ValueError):
+        Budget(seconds, cycles)
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled"])
+def test_run_cycles_partial_result(engine):
+    """Test if a run stopped by its budget keeps the cycles completed, and
+    if the network can then be continued as if never stopped."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", engine=engine)
+    assert network.run_cycles(20, monitors)[1] is None
+    expected = monitors.monitors_dictionary
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", engine=engine)
+    budget = Budget(cycles=7)
+    [signals, failed] = network.run_cycles(20, monitors, budget=budget)
+    assert failed is None
+    assert budget.stopped == budget.CYCLE_LIMIT
+    assert network.cycles_completed == 7
+    for key, signal_list in monitors.monitors_dictionary.items():
+        assert list(signals[key]) == signal_list == expected[key][:7]
+
+    assert network.run_cycles(13, monitors)[1] is None
+    assert monitors.monitors_dictionary == expected
+
+
+def test_cancel_from_another_thread():
+    """Test if a run is cancelled between cycles from another thread."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", engine="event")
+    budget = Budget(seconds=30)  # in case the cancellation is missed
+    timer = threading.Timer(0.05, budget.cancel)
+    timer.start()
+    try:
+        network.run_cycles(10 ** 6, monitors, budget=budget)
+    finally:
+        timer.cancel()
+    assert budget.stopped == budget.CANCELLED
+    assert 0 < network.cycles_completed < 10 ** 6
+    for signal_list in monitors.monitors_dictionary.values():
+        assert len(signal_list) == network.cycles_completed
+
+
+def test_period_detector_budget():
+    """Test if the budget bounds the cycles executed by a periodic run,
+    but not the cycles fast-forwarded."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt")
+    detector = PeriodDetector(devices, network, monitors)
+    assert detector.run(10 ** 6, Budget(cycles=5))
+    assert network.cycles_completed == 5
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt")
+    detector = PeriodDetector(devices, network, monitors)
+    budget = Budget(cycles=1000)
+    assert detector.run(10 ** 6, budget)
+    assert detector.fast_forwarded > 0
+    assert budget.stopped is None
+    assert network.cycles_completed == 10 ** 6
+    assert budget.cycles_used == 10 ** 6 - detector.fast_forwarded
+
+
+def test_async_simulator_budget():
+    """Test if an asynchronous run stops after the chunk that spends the
+    budget."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt")
+    budget = Budget(cycles=10)
+    simulator = AsyncSimulator(network, monitors, budget=budget)
+    assert asyncio.run(simulator.run(100, chunk=4)) is None
+    assert network.cycles_completed == 10
+    assert budget.stopped == budget.CYCLE_LIMIT
@@ -0,0 +1,118 @@
+"""Test the checkpoint module."""
+import pytest
+
+from checkpoint import Checkpoint
+from test_bitsim import parse_file
+
+
+def run(network, monitors, cycles):
+    """Run the network, recording the monitors after every cycle."""
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+
+
+def get_state(devices):
+    """Return the outputs, memories and counters of every device."""
+    return [(dict(device.outputs), device.dtype_memory, device.clock_counter,
+             device.switch_state) for device in devices.devices_list]
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+@pytest.mark.parametrize("path", ["example_files/example1.txt",
+                                  "example_files/example6.txt",
+                                  "example_files/example7.txt"])
+def test_restore_resumes_run(engine, path):
+    """Test if a restored run continues exactly as the original."""
+    names, devices, network, monitors = parse_file(path, 0, engine)
+    checkpoint = Checkpoint(devices, network, monitors)
+    run(network, monitors, 23)
+    data = checkpoint.snapshot()
+    run(network, monitors, 40)
+    expected = [dict(monitors.monitors_dictionary), get_state(devices),
+                network.cycles_completed]
+
+    checkpoint.restore(data)
+    assert network.cycles_completed == 23
+    assert all(len(signal_list) == 23
+               for signal_list in monitors.monitors_dictionary.values())
+    run(network, monitors, 40)
+    network.wheel.sync()
+    assert [monitors.monitors_dictionary, get_state(devices),
+            network.cycles_completed] == expected
+
+
+def test_checkpoint_file(tmp_path):
+    """Test if a checkpoint file resumes a run in a new network."""
+    path = "example_files/example6.txt"
+    names, devices, network, monitors = parse_file(path, 0)
+    run(network, monitors, 17)
+    [SW1_ID] = names.lookup(["SW1"])
+    devices.set_switch(SW1_ID, devices.HIGH)
+    Checkpoint(devices, network, monitors).save(tmp_path / "run.ck")
+    run(network, monitors, 30)
+
+    # A different seed gives different clock counters and D-type memories
+    names, devices, new_network, new_monitors = parse_file(path, 1)
+    Checkpoint(devices, new_network, new_monitors).load(tmp_path / "run.ck")
+    assert devices.get_device(SW1_ID).switch_state == devices.HIGH
+    run(new_network, new_monitors, 30)
+    assert new_monitors.monitors_dictionary == monitors.monitors_dictionary
+
+
+def test_invalid_snapshots():
+    """Test if snapshots of other networks and bad data raise ValueError."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    checkpoint = Checkpoint(devices, network, monitors)
+    run(network, monitors, 5)
+    data = checkpoint.snapshot()
+    state = get_state(devices)
+    for bad_data in [b"", b"LSCK", data[:-3], b"XXXX" + data[4:]]:
+        with pytest.raises(ValueError):
+            checkpoint.restore(bad_data)
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt")
+    with pytest.raises(ValueError):
+        Checkpoint(devices, network, monitors).restore(data)
+
+    # A trace shorter than in the snapshot cannot be restored
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    with pytest.raises(ValueError):
+        Checkpoint(devices, network, monitors).restore(data)
+    Checkpoint(devices, network, monitors).restore(
+        checkpoint.snapshot(traces=True))
+    assert get_state(devices) == state
+    assert network.cycles_completed == 5
+
+
+@pytest.mark.parametrize("traces", [False, True])
+def test_restore_monitors(traces):
+    """Test if monitors removed since the snapshot are made again and
+    monitors made since are removed."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt")
+    checkpoint = Checkpoint(devices, network, monitors)
+    run(network, monitors, 9)
+    data = checkpoint.snapshot(traces)
+    expected = {key: list(signal_list) for key, signal_list in
+                monitors.monitors_dictionary.items()}
+    removed = next(iter(expected))
+    added = next((device.device_id, output_id)
+                 for device in devices.devices_list
+                 for output_id in device.outputs
+                 if (device.device_id, output_id) not in expected)
+    assert monitors.remove_monitor(*removed)
+    assert monitors.make_monitor(*added, network.cycles_completed) == \
+        monitors.NO_ERROR
+    run(network, monitors, 6)
+
+    checkpoint.restore(data)
+    if not traces:  # the samples of the removed monitor are lost
+        expected[removed] = [devices.BLANK] * 9
+    assert monitors.monitors_dictionary == expected
+    run(network, monitors, 6)
+    assert all(len(signal_list) == 15
+               for signal_list in monitors.monitors_dictionary.values())
@@ -0,0 +1,136 @@
+"""Test the codegen module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from codegen import CompiledEngine
+from test_event import run_file
+
+
+def make_network(engine):
+    """Return a network with a NAND latch, an XOR gate and a D-type."""
+    random.seed(0)  # same cold start for every network
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+
+    [SW1_ID, SW2_ID, NAND1_ID, NAND2_ID, XOR1_ID, D1_ID, CL_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "Nand1", "Nand2", "Xor1", "D1", "Cl",
+                         "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+    devices.make_device(XOR1_ID, devices.XOR)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    network.make_connection(SW2_ID, None, NAND2_ID, I2)
+    network.make_connection(NAND1_ID, None, NAND2_ID, I1)
+    network.make_connection(NAND2_ID, None, NAND1_ID, I2)
+    network.make_connection(NAND1_ID, None, XOR1_ID, I1)
+    network.make_connection(D1_ID, devices.Q_ID, XOR1_ID, I2)
+    network.make_connection(CL_ID, None, D1_ID, devices.CLK_ID)
+    network.make_connection(XOR1_ID, None, D1_ID, devices.DATA_ID)
+    network.make_connection(SW2_ID, None, D1_ID, devices.SET_ID)
+    network.make_connection(SW2_ID, None, D1_ID, devices.CLEAR_ID)
+    return network
+
+
+@pytest.mark.parametrize("path", [
+    "example_files/example1.txt",
+    "example_files/example3.txt",
+    "example_files/example4.txt",
+    "example_files/example5.txt",
+    "example_files/example6.txt",
+    "example_files/example7.txt",
+])
+def test_compiled_engine_matches_sweep(path):
+    """Test if the compiled engine produces the same traces as the sweep."""
+    for seed in range(3):
+        assert run_file(path, "compiled", seed=seed) == run_file(
+            path, "sweep", seed=seed)
+
+
+def test_compiled_engine_matches_sweep_after_toggles():
+    """Test if outputs and D-type memories match the sweep cycle by cycle."""
+    sweep = make_network("sweep")
+    compiled = make_network("compiled")
+    [SW1_ID, SW2_ID] = sweep.names.lookup(["Sw1", "Sw2"])
+    for cycle in range(12):
+        if cycle == 4:
+            for network in [sweep, compiled]:
+                network.devices.set_switch(SW1_ID, 0)
+        if cycle == 8:
+            for network in [sweep, compiled]:
+                network.devices.set_switch(SW2_ID, 1)
+        assert compiled.execute_network() == sweep.execute_network()
+        assert [(device.outputs, device.dtype_memory)
+                for device in compiled.devices.devices_list] == \
+            [(device.outputs, device.dtype_memory)
+             for device in sweep.devices.devices_list]
+
+
+def test_compiled_code_is_cached():
+    """Test if networks with the same structure share compiled code."""
+    first = make_network("compiled")
+    second = make_network("compiled")
+    first.execute_network()
+    second.execute_network()
+
+    source = first.engine.generate()
+    assert source == second.engine.generate()
+    assert source in CompiledEngine.code_cache
+
+
+def test_code_cache_is_bounded(monkeypatch):
+    """Test if the least recently used code is dropped from a full cache."""
+    monkeypatch.setattr(CompiledEngine, "code_cache", {})
+    monkeypatch.setattr(CompiledEngine, "cache_limit", 2)
+    sources = []
+    for length in [1, 2, 1, 3]:  # chains of NOT gates of three lengths
+        names = Names()
+        devices = Devices(names)
+        network = Network(names, devices, "compiled")
+        [SW1_ID, I1] = names.lookup(["Sw1", "I1"])
+        devices.make_device(SW1_ID, devices.SWITCH, 0)
+        driver = SW1_ID
+        for gate_id in names.lookup(["G" + str(k) for k in range(length)]):
+            devices.make_device(gate_id, devices.NAND, 1)
+            network.make_connection(driver, None, gate_id, I1)
+            driver = gate_id
+        assert network.execute_network()
+        sources.append(network.engine.generate())
+
+    assert list(CompiledEngine.code_cache) == [sources[0], sources[3]]
+
+
+def test_compiled_engine_oscillation():
+    """Test if the compiled engine reports an oscillating loop."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "compiled")
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+
+    assert not network.execute_network()
+    assert network.oscillations == [["Nor1"]]
+
+
+def test_compiled_engine_unconnected_input():
+    """Test if an unconnected input fails as it does in the sweep."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "compiled")
+    [SW1_ID, AND1_ID, I1] = names.lookup(["Sw1", "And1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+
+    assert not network.execute_network()
+    assert network.engine.cycle is None
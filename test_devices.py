@@ -1,4 +1,6 @@
 """Test the devices module."""
+import random
+
 import pytest
 
 from names import Names
@@ -148,3 +150,21 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+    assert new_devices.changed_switches == {SW1_ID}
+
+
+def test_cold_startup_with_rng(new_devices):
+    """Test if a seeded generator gives a reproducible cold start."""
+    names = new_devices.names
+    [D1_ID, D2_ID, CL_ID] = names.lookup(["D1", "D2", "Cl"])
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(D2_ID, new_devices.D_TYPE)
+    new_devices.make_device(CL_ID, new_devices.CLOCK, 7)
+
+    states = []
+    for _ in range(2):
+        new_devices.cold_startup(random.Random("seed"))
+        states.append([(device.dtype_memory, device.clock_counter,
+                        dict(device.outputs))
+                       for device in new_devices.devices_list])
+    assert states[0] == states[1]
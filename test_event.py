@@ -0,0 +1,112 @@
+"""Test the event module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+
+
+def run_file(path, engine, cycles=40, seed=0):
+    """Return the monitor traces of the definition file run with engine."""
+    random.seed(seed)
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    parser.parse_network()
+
+    switch_ids = devices.find_devices(devices.SWITCH)
+    results = []
+    for cycle in range(cycles):
+        if switch_ids and cycle % 5 == 2:
+            switch_id = switch_ids[cycle % len(switch_ids)]
+            devices.set_switch(switch_id, (cycle // 5) % 2)
+        results.append(network.execute_network())
+        monitors.record_signals()
+    return results, dict(monitors.monitors_dictionary)
+
+
+@pytest.fixture
+def chain_network():
+    """Return a Network using the event engine with a chain of two gates."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices, "event")
+
+    [SW1_ID, SW2_ID, AND1_ID, OR1_ID, I1, I2] = new_names.lookup(
+        ["Sw1", "Sw2", "And1", "Or1", "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 1)
+    new_devices.make_device(AND1_ID, new_devices.AND, 2)
+    new_devices.make_device(OR1_ID, new_devices.OR, 2)
+
+    new_network.make_connection(SW1_ID, None, AND1_ID, I1)
+    new_network.make_connection(SW2_ID, None, AND1_ID, I2)
+    new_network.make_connection(AND1_ID, None, OR1_ID, I1)
+    new_network.make_connection(SW1_ID, None, OR1_ID, I2)
+    return new_network
+
+
+@pytest.mark.parametrize("path", [
+    "example_files/example1.txt",
+    "example_files/example2.txt",
+    "example_files/example3.txt",
+    "example_files/example4.txt",
+    "example_files/example5.txt",
+    "example_files/example6.txt",
+    "example_files/example7.txt",
+])
+def test_event_engine_matches_sweep(path):
+    """Test if the event engine produces the same traces as the sweep."""
+    for seed in range(3):
+        assert run_file(path, "event", seed=seed) == run_file(path, "sweep",
+                                                              seed=seed)
+
+
+def test_event_engine_only_evaluates_changes(chain_network):
+    """Test if settled gates are not evaluated again."""
+    network = chain_network
+    devices = network.devices
+    [SW1_ID, AND1_ID, OR1_ID] = devices.names.lookup(["Sw1", "And1", "Or1"])
+
+    assert network.execute_network()
+    assert network.execute_network()
+
+    # Nothing changed, so the network skips the cycle, and the engine on its
+    # own only evaluates the two switches
+    evaluations = network.engine.evaluations
+    assert network.execute_network()
+    assert network.engine.evaluations == evaluations
+    assert network.engine.execute_network()
+    assert network.engine.evaluations - evaluations == 2
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    assert network.get_output_signal(AND1_ID, None) == devices.HIGH
+    assert network.get_output_signal(OR1_ID, None) == devices.HIGH
+
+
+def test_event_engine_oscillating_network():
+    """Test if the event engine returns False for oscillating networks."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "event")
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+
+    assert not network.execute_network()
+
+
+def test_unknown_engine():
+    """Test if an unknown engine name raises a ValueError."""
+    names = Names()
+    with pytest.raises(ValueError):
+        Network(names, Devices(names), "quantum")
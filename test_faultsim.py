@@ -0,0 +1,80 @@
+"""Test the faultsim module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from faultsim import FaultSimulator
+from test_bitsim import parse_file
+
+
+@pytest.fixture
+def and_gate():
+    """Return a FaultSimulator for two switches driving a monitored AND."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, SW2_ID, AND1_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "And1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    monitors.make_monitor(AND1_ID, None)
+    return FaultSimulator(names, devices, network, monitors)
+
+
+def test_get_faults(and_gate):
+    """Test if every output and input pin has two faults."""
+    faults = and_gate.get_faults()
+    assert len(faults) == 10
+    assert [and_gate.get_fault_name(fault) for fault in faults[4:]] == [
+        "And1 stuck-at-0", "And1 stuck-at-1", "And1.I1 stuck-at-0",
+        "And1.I1 stuck-at-1", "And1.I2 stuck-at-0", "And1.I2 stuck-at-1"]
+
+
+def test_exhaustive_sequence_detects_every_fault(and_gate):
+    """Test if the four input combinations detect every fault."""
+    sequence = [{}, {"Sw2": 1}, {"Sw1": 1, "Sw2": 0}, {"Sw2": 1}]
+    detected = and_gate.run(sequence)
+    assert and_gate.get_coverage() == 1
+
+    [SW1_ID, AND1_ID, I1] = and_gate.names.lookup(["Sw1", "And1", "I1"])
+    # Stuck-at-0 of the output is only seen with both inputs HIGH
+    assert detected[(AND1_ID, None, False, 0)] == 3
+    # Stuck-at-1 of an input is seen as soon as the other input is HIGH
+    assert detected[(AND1_ID, I1, True, 1)] == 1
+    assert detected[(SW1_ID, None, False, 1)] == 1
+    assert and_gate.get_report() == "Faults: 10\nDetected: 10 (100.0%)"
+
+
+def test_weak_sequence_report(and_gate):
+    """Test if undetected faults are listed in the report."""
+    and_gate.run([{}, {"Sw1": 1}])
+    assert and_gate.get_coverage() == 0.3
+    report = and_gate.get_report().splitlines()
+    assert report[:3] == ["Faults: 10", "Detected: 3 (30.0%)",
+                          "Undetected:"]
+    assert "  And1 stuck-at-0" in report
+
+
+@pytest.mark.parametrize("path", ["example_files/example1.txt",
+                                  "example_files/example5.txt"])
+def test_batch_size_does_not_change_results(path):
+    """Test if splitting the faults into batches gives the same results."""
+    results = []
+    for batch_size in [1, 3, 256]:
+        names, devices, network, monitors = parse_file(path)
+        simulator = FaultSimulator(names, devices, network, monitors)
+        results.append(simulator.run([{}] * 12, batch_size))
+    assert results[0] == results[1] == results[2]
+    assert results[0]
+
+
+def test_invalid_sequence(and_gate):
+    """Test if an unknown switch raises a ValueError."""
+    with pytest.raises(ValueError):
+        and_gate.run([{"And1": 1}])
@@ -5,6 +5,7 @@ from names import Names
 from network import Network
 from devices import Devices
 from monitors import Monitors
+from test_bitsim import parse_file
 
 
 @pytest.fixture
@@ -197,3 +198,56 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_get_trace_string(new_monitors):
+    """Test if get_trace_string maps every signal to its character."""
+    devices = new_monitors.devices
+    signals = [devices.LOW, devices.HIGH, devices.RISING, devices.FALLING,
+               devices.BLANK]
+    assert new_monitors.get_trace_string(signals) == "_-/\\ "
+    assert new_monitors.get_trace_string(signals + [None]) == "_-/\\ "
+
+
+def parse_example(engine):
+    """Return the bundle of example 6, with G3 monitored too."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 0, engine)
+    [G3_ID] = names.lookup(["G3"])
+    monitors.make_monitor(G3_ID, None)
+    return names, devices, network, monitors
+
+
+def run_branch(names, devices, network, monitors, switch, state, cycles):
+    """Set a switch and run the network, recording the monitors."""
+    [switch_id] = names.lookup([switch])
+    devices.set_switch(switch_id, state)
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+    return monitors.monitors_dictionary
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+def test_fork(engine):
+    """Test if branches forked from a prefix match straight runs."""
+    names, devices, network, monitors = parse_example(engine)
+    run_branch(names, devices, network, monitors, "SW3", 1, 20)
+    prefix = {key: list(signal_list) for key, signal_list
+              in monitors.monitors_dictionary.items()}
+
+    branches = [monitors.fork() for _ in range(3)]
+    forked_devices = branches[0][1]
+    assert forked_devices.devices_list[0] is not devices.devices_list[0]
+    assert forked_devices.devices_list[0].inputs is \
+        devices.devices_list[0].inputs
+    traces = [run_branch(*branch, "SW3", state, 30)
+              for branch, state in zip(branches, [0, 1, 1])]
+    # The branches do not change the prefix or each other
+    assert monitors.monitors_dictionary == prefix
+    assert traces[1] == traces[2] != traces[0]
+
+    for trace, state in zip(traces, [0, 1]):
+        straight = parse_example(engine)
+        run_branch(*straight, "SW3", 1, 20)
+        assert run_branch(*straight, "SW3", state, 30) == trace
@@ -0,0 +1,55 @@
+"""Test the montecarlo module."""
+import io
+
+from montecarlo import (ColdStartRunner, get_run_seed, monte_carlo,
+                        write_summary)
+
+
+def test_runs_can_be_replayed():
+    """Test if every run is reproduced by its own seed."""
+    [summary, unsettled] = monte_carlo("example_files/example5.txt", 12, 8,
+                                       seed=5, processes=1)
+    runner = ColdStartRunner("example_files/example5.txt", 8)
+    for name, (high, traces) in summary.items():
+        for trace, runs in traces.items():
+            for run in runs:
+                [run_traces, steady] = runner.run(get_run_seed(5, run))
+                assert runner.monitors.get_trace_string(
+                    run_traces[name]) == trace
+    assert unsettled == []
+
+
+def test_summary():
+    """Test if the summary counts every run once per monitor."""
+    [summary, unsettled] = monte_carlo("example_files/example5.txt", 20, 6,
+                                       processes=1)
+    assert set(summary) == {"CL", "D1.Q", "D2.Q", "D3.Q"}
+    for name, (high, traces) in summary.items():
+        assert len(high) == 6
+        assert all(0 <= probability <= 1 for probability in high)
+        assert sorted(run for runs in traces.values() for run in runs) == \
+            list(range(20))
+    # The clock starts LOW or HIGH at random, and then alternates
+    [high, traces] = summary["CL"]
+    assert set(traces) <= {"_-_-_-", "-_-_-_"}
+    assert high[0] + high[1] == 1
+
+    output = io.StringIO()
+    write_summary(summary, unsettled, output)
+    assert output.getvalue().startswith("CL\n  P(HIGH): ")
+
+
+def test_process_pool_matches_single_process():
+    """Test if the worker processes give the same summary."""
+    single = monte_carlo("example_files/example5.txt", 24, 6, seed=1,
+                         processes=1)
+    pool = monte_carlo("example_files/example5.txt", 24, 6, seed=1,
+                       processes=2, chunk_size=5)
+    assert pool == single
+
+
+def test_different_seeds():
+    """Test if different base seeds give different cold starts."""
+    runner = ColdStartRunner("example_files/example5.txt", 8)
+    traces = {str(runner.run(get_run_seed(seed, 0))[0]) for seed in range(8)}
+    assert len(traces) > 1
@@ -1,9 +1,14 @@
 """Test the network module."""
+import array
+import random
+
 import pytest
 
 from names import Names
 from devices import Devices
 from network import Network
+from monitors import Monitors
+from test_bitsim import parse_file
 
 
 @pytest.fixture
@@ -31,6 +36,70 @@ def network_with_devices():
     return new_network
 
 
+def make_random_network(seed, engine="sweep", size=12, circuits=1):
+    """Return names, devices, network, monitors and switch IDs of random
+    circuits of gates and D-types, with feedback, clocks, an RC and a
+    SIGGEN device each, and a monitor on every output.
+
+    The circuits share no nets, so each is a separate component of the
+    network (see partition.ParallelRunner).
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # same cold start for every engine
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    monitors = Monitors(names, devices, network)
+    input_ids = names.lookup(["I1", "I2", "I3"])
+    all_switch_ids = []
+    for circuit in range(circuits):
+        prefix = "C" + str(circuit)
+        switch_ids = names.lookup([prefix + "Sw1", prefix + "Sw2",
+                                   prefix + "Sw3"])
+        [CL1, CL2, RC1, SG1] = names.lookup(
+            [prefix + "Cl1", prefix + "Cl2", prefix + "Rc1", prefix + "Sg1"])
+        for switch_id in switch_ids:
+            devices.make_device(switch_id, devices.SWITCH, rng.randint(0, 1))
+        devices.make_device(CL1, devices.CLOCK, 1)
+        devices.make_device(CL2, devices.CLOCK, rng.randint(2, 3))
+        devices.make_device(RC1, devices.RC, rng.randint(1, 5))
+        devices.make_device(SG1, devices.SIGGEN, "".join(
+            rng.choice("01") for _ in range(rng.randint(2, 6))))
+        outputs = [(device_id, None) for device_id in
+                   switch_ids + [CL1, CL2, SG1]]
+        sources = len(outputs)
+        pins = []
+        for index in range(size):
+            [device_id] = names.lookup([prefix + "Dev" + str(index)])
+            if rng.random() < 0.25:
+                devices.make_device(device_id, devices.D_TYPE)
+                pins.append((device_id, devices.dtype_input_ids,
+                             len(outputs)))
+                outputs.extend([(device_id, devices.Q_ID),
+                                (device_id, devices.QBAR_ID)])
+            else:
+                kind = rng.choice(devices.gate_types)
+                inputs = 2 if kind == devices.XOR else rng.randint(1, 3)
+                devices.make_device(device_id, kind,
+                                    None if kind == devices.XOR else inputs)
+                pins.append((device_id, input_ids[:inputs], len(outputs)))
+                outputs.append((device_id, None))
+        for device_id, pin_ids, earlier in pins:
+            for input_id in pin_ids:
+                # Mostly acyclic, with some feedback
+                output = rng.choice(outputs[:max(earlier, sources)]
+                                    if rng.random() < 0.7 else outputs)
+                if input_id in [devices.SET_ID, devices.CLEAR_ID]:
+                    output = rng.choice([(switch_ids[0], None), (RC1, None),
+                                         output])
+                assert network.make_connection(*output, device_id,
+                                               input_id) == network.NO_ERROR
+        for output in outputs + [(RC1, None)]:
+            monitors.make_monitor(*output)
+        all_switch_ids.extend(switch_ids)
+    return names, devices, network, monitors, all_switch_ids
+
+
 def test_get_connected_output(network_with_devices):
     """Test if the output connected to a given input port is correct."""
     network = network_with_devices
@@ -348,3 +417,115 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+@pytest.mark.parametrize("engine", ["event", "compiled", "vector"])
+def test_engine_parity(engine):
+    """Test if every engine gives the traces of the sweep, and fails in the
+    same cycle, on random circuits with feedback and switch changes."""
+    if engine == "vector":
+        pytest.importorskip("numpy")
+    for seed in range(40):
+        results = []
+        for name in ["sweep", engine]:
+            rng = random.Random(seed)
+            names, devices, network, monitors, switch_ids = \
+                make_random_network(seed, name)
+            completed = 0
+            for cycle in range(25):
+                if rng.random() < 0.2:
+                    devices.set_switch(rng.choice(switch_ids),
+                                       rng.randint(0, 1))
+                if not network.execute_network():
+                    break
+                monitors.record_signals()
+                completed += 1
+            results.append([completed, monitors.monitors_dictionary])
+        assert results[0] == results[1], seed
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+@pytest.mark.parametrize("path", ["example_files/example1.txt",
+                                  "example_files/example6.txt"])
+def test_run_cycles(engine, path):
+    """Test if run_cycles gives the signals of a loop of execute_network
+    and record_signals, and adds them to the monitors."""
+    if engine == "vector":
+        pytest.importorskip("numpy")
+    names, devices, network, monitors = parse_file(path, 1, engine)
+    for _ in range(40):
+        assert network.execute_network()
+        monitors.record_signals()
+    expected = monitors.monitors_dictionary
+
+    names, devices, network, monitors = parse_file(path, 1, engine)
+    [signals, failed] = network.run_cycles(15, monitors)
+    assert failed is None
+    assert network.run_cycles(25, monitors)[1] is None
+    assert monitors.monitors_dictionary == expected
+    for key, signal_array in signals.items():
+        assert isinstance(signal_array, array.array)
+        assert list(signal_array) == expected[key][:15]
+
+
+def test_run_cycles_stops_early(new_network):
+    """Test if run_cycles stops at the cycle that oscillates."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, NOR1, I1, I2] = names.lookup(["Sw1", "Nor1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(NOR1, devices.NOR, 2)
+    network.make_connection(SW1_ID, None, NOR1, I1)
+    network.make_connection(NOR1, None, NOR1, I2)
+    monitors.make_monitor(NOR1, None)
+
+    assert network.run_cycles(3, monitors)[1] is None
+    devices.set_switch(SW1_ID, devices.LOW)  # the NOR gate now oscillates
+    [signals, failed] = network.run_cycles(5, monitors)
+    assert failed == 0
+    assert list(signals[(NOR1, None)]) == []
+    assert monitors.monitors_dictionary[(NOR1, None)] == [devices.LOW] * 3
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("skip", [0, 7])
+def test_get_source_block(new_network, seed, skip):
+    """Test if the precomputed waveforms give the outputs of every cycle."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+    random.seed(seed)  # the clocks start with random counters
+    properties = [(devices.CLOCK, 1), (devices.CLOCK, 2), (devices.CLOCK, 3),
+                  (devices.RC, 4), (devices.SIGGEN, "0110100")]
+    sources = []
+    for index, (kind, device_property) in enumerate(properties):
+        [device_id] = names.lookup(["Src" + str(index)])
+        assert devices.make_device(device_id, kind,
+                                   device_property) == devices.NO_ERROR
+        sources.append(devices.get_device(device_id))
+    for _ in range(skip):
+        assert network.execute_network()
+
+    start = network.cycles_completed
+    blocks = [network.get_source_block(device, start, 30)
+              for device in sources]
+    later = [network.get_source_block(device, start + 5, 25)
+             for device in sources]
+    signals = [[network.get_source_signal(device, network.cycles_completed +
+                                          cycle) for cycle in range(30)]
+               for device in sources]
+    # Step the state machines of the devices, settling edges in between
+    expected = [[] for device in sources]
+    for _ in range(30):
+        network.update_clocks()
+        network.update_rc()
+        network.update_siggen()
+        for device, outputs in zip(sources, expected):
+            outputs.append(device.outputs[None])
+            device.outputs[None] = network.settled_signal(
+                device.outputs[None])
+        network.cycles_completed += 1
+    assert blocks == signals == expected
+    assert later == [outputs[5:] for outputs in expected]
@@ -0,0 +1,105 @@
+"""Test the oscillation module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from oscillation import LoopDetector, Oscillation
+
+
+def make_ring(engine, gates):
+    """Return devices and network of a ring of NOR gates, which oscillates
+    for an odd number of gates."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    gate_ids = names.lookup(["Nor" + str(index) for index in range(gates)])
+    [I1] = names.lookup(["I1"])
+    for gate_id in gate_ids:
+        devices.make_device(gate_id, devices.NOR, 1)
+    for index, gate_id in enumerate(gate_ids):
+        network.make_connection(gate_id, None,
+                                gate_ids[(index + 1) % gates], I1)
+    return devices, network
+
+
+def test_loop_detector():
+    """Test if a repeated state is proven one period after it repeats."""
+    detector = LoopDetector()
+    states = [(0, 0), (1, 0), (1, 1), (0, 1), (1, 1), (0, 1), (1, 1)]
+    proven = [detector.add(state) for state in states]
+    assert proven == [False] * 6 + [True]
+    assert detector.proven
+    assert detector.loop == [(0, 1), (1, 1)]
+
+
+def test_loop_detector_hash_collision():
+    """Test if states with the same hash but different values are not a
+    loop."""
+    detector = LoopDetector()
+    # hash(-1) == hash(-2) in CPython, so choose states that collide
+    first = (-1,)
+    second = (-2,)
+    if hash(first) != hash(second):
+        pytest.skip("the states do not collide on this interpreter")
+    assert not detector.add(first)
+    assert not detector.add(second)
+    assert not detector.add(first)
+    assert not detector.proven
+
+
+def test_oscillation_text():
+    """Test if the description lists the sequence of every signal."""
+    report = Oscillation(["G1", "G2"], [[0, 1], [1, 0]], True, 5, 2)
+    assert report.get_period() == 2
+    assert report.get_text() == ("Oscillation with period 2 proven after 5 "
+                                 "iterations in cycle 3:\n"
+                                 "  G1: 0 1\n"
+                                 "  G2: 1 0")
+    report = Oscillation(["G1"], [[0, 1, 0]], False, 20, 0)
+    assert report.get_period() is None
+    assert report.get_text().startswith("No settled state after 20 "
+                                        "iterations in cycle 1:")
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+@pytest.mark.parametrize("gates", [1, 3])
+def test_oscillation_is_proven(engine, gates):
+    """Test if every engine proves an oscillating ring long before the
+    iteration budget runs out and reports its sequence."""
+    if engine == "vector":
+        pytest.importorskip("numpy")
+    devices, network = make_ring(engine, gates)
+
+    assert not network.execute_network()
+    assert len(network.oscillations) == 1
+    [report] = network.oscillation_reports
+    assert report.proven
+    assert report.iterations < 20
+    assert report.cycle == 0
+    assert sorted(report.names) == ["Nor" + str(index)
+                                    for index in range(gates)]
+    assert report.get_period() >= 2
+    for sequence in report.sequences:
+        assert set(sequence) <= {devices.LOW, devices.HIGH, devices.RISING,
+                                 devices.FALLING}
+        assert len(set(sequence)) > 1
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+def test_iteration_budget(engine):
+    """Test if an oscillation is reported unproven when the budget runs out
+    first, and if the reports are cleared by a settled cycle."""
+    if engine == "vector":
+        pytest.importorskip("numpy")
+    devices, network = make_ring(engine, 1)
+    network.iteration_limit = 3
+
+    assert not network.execute_network()
+    [report] = network.oscillation_reports
+    assert not report.proven
+    assert report.names == ["Nor0"]
+
+    devices, network = make_ring(engine, 2)  # a latch settles
+    assert network.execute_network()
+    assert network.oscillation_reports == []
@@ -0,0 +1,151 @@
+"""Test the partition module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from partition import ParallelRunner
+from test_network import make_random_network
+
+
+def make_circuits(engine="sweep", oscillator=False):
+    """Return a runner of two counters, a SIGGEN circuit and a lone clock.
+
+    If oscillator is True, an oscillating NOR gate is added too.
+    """
+    random.seed(0)  # the clocks and D-types start in random states
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    monitors = Monitors(names, devices, network)
+    [CLK, DATA, SET, CLEAR, Q, QBAR, I1, I2] = [
+        devices.CLK_ID, devices.DATA_ID, devices.SET_ID, devices.CLEAR_ID,
+        devices.Q_ID, devices.QBAR_ID] + names.lookup(["I1", "I2"])
+    for counter in ["A", "B"]:
+        [CL_ID, SW_ID, D1_ID, D2_ID] = names.lookup(
+            [counter + "Cl", counter + "Sw", counter + "D1", counter + "D2"])
+        devices.make_device(CL_ID, devices.CLOCK, 2 if counter == "A" else 3)
+        devices.make_device(SW_ID, devices.SWITCH, 0)
+        devices.make_device(D1_ID, devices.D_TYPE)
+        devices.make_device(D2_ID, devices.D_TYPE)
+        for D_ID in [D1_ID, D2_ID]:
+            network.make_connection(SW_ID, None, D_ID, SET)
+            network.make_connection(SW_ID, None, D_ID, CLEAR)
+            network.make_connection(D_ID, QBAR, D_ID, DATA)
+        network.make_connection(CL_ID, None, D1_ID, CLK)
+        network.make_connection(D1_ID, QBAR, D2_ID, CLK)
+        monitors.make_monitor(D1_ID, Q)
+        monitors.make_monitor(D2_ID, Q)
+
+    [SG_ID, RC_ID, XOR_ID, CL_ID, ZERO_ID, D_ID, LONE_ID] = names.lookup(
+        ["Sg", "Rc", "Xor", "Cl", "Zero", "D", "Lone"])
+    devices.make_device(SG_ID, devices.SIGGEN, "0010111")
+    devices.make_device(RC_ID, devices.RC, 6)
+    devices.make_device(XOR_ID, devices.XOR)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(ZERO_ID, devices.SWITCH, 0)
+    devices.make_device(D_ID, devices.D_TYPE)
+    devices.make_device(LONE_ID, devices.CLOCK, 4)
+    network.make_connection(SG_ID, None, XOR_ID, I1)
+    network.make_connection(CL_ID, None, XOR_ID, I2)
+    network.make_connection(RC_ID, None, D_ID, SET)
+    network.make_connection(ZERO_ID, None, D_ID, CLEAR)
+    network.make_connection(SG_ID, None, D_ID, DATA)
+    network.make_connection(CL_ID, None, D_ID, CLK)
+    monitors.make_monitor(XOR_ID, None)
+    monitors.make_monitor(D_ID, Q)
+
+    if oscillator:
+        [NOR_ID, SW_ID] = names.lookup(["Nor", "Sw"])
+        devices.make_device(SW_ID, devices.SWITCH, 1)
+        devices.make_device(NOR_ID, devices.NOR, 2)
+        network.make_connection(SW_ID, None, NOR_ID, I1)
+        network.make_connection(NOR_ID, None, NOR_ID, I2)
+        monitors.make_monitor(NOR_ID, None)
+    return ParallelRunner(names, devices, network, monitors)
+
+
+def get_state(runner, settled=False):
+    """Return the traces, device state and cycles of a runner.
+
+    If settled is True, RISING and FALLING outputs are given as the levels
+    they settle to.
+    """
+    network = runner.network
+    network.wheel.sync()
+    return [dict(runner.monitors.monitors_dictionary),
+            [({output_id: network.settled_signal(signal) if settled
+               else signal for output_id, signal in device.outputs.items()},
+              device.dtype_memory, device.clock_counter)
+             for device in runner.devices.devices_list],
+            network.cycles_completed]
+
+
+def test_get_components():
+    """Test if the network splits into its separate circuits."""
+    runner = make_circuits(oscillator=True)
+    components = [[runner.names.get_name_string(device.device_id)
+                   for device in component]
+                  for component in runner.get_components()]
+    assert components == [["ACl", "ASw", "AD1", "AD2"],
+                          ["BCl", "BSw", "BD1", "BD2"],
+                          ["Sg", "Rc", "Xor", "Cl", "Zero", "D"], ["Lone"],
+                          ["Sw", "Nor"]]
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+def test_parallel_run_matches_serial(engine):
+    """Test if the parallel run gives the traces and state of a serial one."""
+    serial = make_circuits(engine)
+    assert serial.run(25, processes=1)
+    parallel = make_circuits(engine)
+    assert parallel.run(25, processes=2)
+    assert get_state(parallel) == get_state(serial)
+
+    # The run continues from where it stopped
+    [SW_ID] = serial.names.lookup(["ASw"])
+    for runner in [serial, parallel]:
+        runner.devices.set_switch(SW_ID, 1)
+    assert serial.run(10, processes=1)
+    assert parallel.run(10)
+    assert get_state(parallel) == get_state(serial)
+
+
+def test_oscillating_component():
+    """Test if a failed cycle of a component ends the whole run."""
+    serial = make_circuits(oscillator=True)
+    [SW_ID] = serial.names.lookup(["Sw"])
+    assert serial.run(5, processes=1)
+    serial.devices.set_switch(SW_ID, 0)
+    assert not serial.run(5, processes=1)
+
+    parallel = make_circuits(oscillator=True)
+    assert parallel.run(5)
+    parallel.devices.set_switch(SW_ID, 0)
+    assert not parallel.run(5)
+    # The serial run stops part-way through the failed cycle
+    assert get_state(parallel, True) == get_state(serial, True)
+    assert parallel.network.oscillations == serial.network.oscillations
+    [NOR_ID] = parallel.names.lookup(["Nor"])
+    assert len(parallel.monitors.monitors_dictionary[(NOR_ID, None)]) == 5
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled", "vector"])
+def test_random_circuits_parallel(engine):
+    """Test if parallel runs of random circuits, with feedback, give the
+    traces and failed cycle of serial runs with every engine."""
+    if engine == "vector":
+        pytest.importorskip("numpy")
+    for seed in range(8):
+        results = []
+        for processes in [1, 2]:
+            runner = ParallelRunner(*make_random_network(
+                seed, engine, circuits=3)[:4])
+            assert runner.network.engine_name == engine
+            steady = runner.run(20, processes)
+            results.append([steady, runner.network.cycles_completed,
+                            runner.monitors.monitors_dictionary])
+        assert results[0] == results[1], seed
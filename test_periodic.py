@@ -0,0 +1,104 @@
+"""Test the periodic module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from periodic import PeriodDetector
+from stimulus import Stimulus
+from test_bitsim import parse_file
+
+
+def get_state(devices):
+    """Return the outputs, memories and counters of every device."""
+    return [(dict(device.outputs), device.dtype_memory, device.clock_counter)
+            for device in devices.devices_list]
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+@pytest.mark.parametrize("path", ["example_files/example1.txt",
+                                  "example_files/example5.txt",
+                                  "example_files/example6.txt",
+                                  "example_files/example7.txt"])
+def test_fast_forward_matches_simulation(engine, path):
+    """Test if fast-forwarding gives the traces and state of a full run."""
+    names, devices, network, monitors = parse_file(path, 0, engine)
+    for _ in range(500):
+        network.execute_network()
+        monitors.record_signals()
+    expected = [monitors.monitors_dictionary, get_state(devices),
+                network.cycles_completed]
+
+    names, devices, network, monitors = parse_file(path, 0, engine)
+    detector = PeriodDetector(devices, network, monitors)
+    assert detector.run(500)
+    assert detector.fast_forwarded > 0
+    assert [monitors.monitors_dictionary, get_state(devices),
+            network.cycles_completed] == expected
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+def test_stimulus(engine):
+    """Test if switch changes are applied at their cycles, and the network
+    is only fast-forwarded after the last."""
+    events = [(0, "SW1", 1), (0, "SW2", 1), (40, "SW3", 1), (90, "SW1", 0)]
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 0, engine)
+    monitors.make_monitor(*devices.get_signal_ids("G3"))
+    network.run_cycles(500, monitors, Stimulus(names, devices, events))
+    expected = [monitors.monitors_dictionary, get_state(devices)]
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example6.txt", 0, engine)
+    monitors.make_monitor(*devices.get_signal_ids("G3"))
+    detector = PeriodDetector(devices, network, monitors)
+    assert detector.run(500, stimulus=Stimulus(names, devices, events))
+    assert detector.start >= 90
+    assert detector.fast_forwarded > 0
+    assert [monitors.monitors_dictionary, get_state(devices)] == expected
+
+
+def test_clock_period():
+    """Test if the period of a clock is detected."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [CL_ID] = names.lookup(["Cl"])
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    monitors.make_monitor(CL_ID, None)
+
+    detector = PeriodDetector(devices, network, monitors)
+    assert detector.run(10 ** 6)
+    assert detector.period == 6
+    assert detector.fast_forwarded >= 10 ** 6 - 20
+    trace = monitors.monitors_dictionary[(CL_ID, None)]
+    assert len(trace) == 10 ** 6
+    assert trace[-6:] == trace[-12:-6]
+
+
+def test_history_limit():
+    """Test if periods longer than the history are not detected."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example5.txt")
+    detector = PeriodDetector(devices, network, monitors, history_limit=1)
+    assert detector.run(100)
+    assert detector.period is None
+    assert len(list(monitors.monitors_dictionary.values())[0]) == 100
+
+
+def test_oscillating_network():
+    """Test if the run stops at a cycle that does not settle."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [NOR1_ID, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1_ID, devices.NOR, 1)
+    network.make_connection(NOR1_ID, None, NOR1_ID, I1)
+    monitors.make_monitor(NOR1_ID, None)
+
+    detector = PeriodDetector(devices, network, monitors)
+    assert not detector.run(10)
+    assert monitors.monitors_dictionary[(NOR1_ID, None)] == []
@@ -0,0 +1,511 @@
+"""Test the schedule module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from schedule import Schedule
+from test_bitsim import parse_file
+
+
+def make_chain(engine, length):
+    """Return a network with a switch driving a chain of AND gates."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+
+    [SW1_ID, I1, I2] = names.lookup(["Sw1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    previous = SW1_ID
+    # Make the gates in reverse so that the device list is not in order
+    gate_ids = names.lookup(["And" + str(i) for i in range(length)])
+    for gate_id in reversed(gate_ids):
+        devices.make_device(gate_id, devices.AND, 2)
+    for gate_id in gate_ids:
+        network.make_connection(previous, None, gate_id, I1)
+        network.make_connection(SW1_ID, None, gate_id, I2)
+        previous = gate_id
+    return network, gate_ids
+
+
+def make_latch_network():
+    """Return a network with a NAND latch driving an AND gate."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+
+    [SW1_ID, SW2_ID, NAND1_ID, NAND2_ID, AND1_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Nand1", "Nand2", "And1", "I1", "I2"])
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    network.make_connection(SW2_ID, None, NAND2_ID, I2)
+    network.make_connection(NAND1_ID, None, NAND2_ID, I1)
+    network.make_connection(NAND2_ID, None, NAND1_ID, I2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    return network
+
+
+@pytest.fixture
+def latch_network():
+    """Return a network with a NAND latch driving an AND gate."""
+    return make_latch_network()
+
+
+def test_build_levels():
+    """Test if gates are levelized in topological order."""
+    network, gate_ids = make_chain("sweep", 4)
+    schedule = Schedule(network.devices)
+    schedule.build()
+
+    assert [[gate.device_id for gate in level]
+            for level in schedule.levels] == [[gate_id]
+                                              for gate_id in gate_ids]
+    assert schedule.feedback == []
+    assert [device.device_id for device in schedule.order] == \
+        network.devices.find_devices(network.devices.SWITCH) + gate_ids
+
+
+def test_build_feedback(latch_network):
+    """Test if gates on a feedback loop form one component."""
+    devices = latch_network.devices
+    [NAND1_ID, NAND2_ID, AND1_ID] = devices.names.lookup(
+        ["Nand1", "Nand2", "And1"])
+    schedule = Schedule(devices)
+    schedule.build()
+
+    assert [[gate.device_id for gate in component]
+            for component in schedule.components] == [[AND1_ID],
+                                                      [NAND1_ID, NAND2_ID]]
+    assert schedule.cyclic == [False, True]
+    assert [[gate.device_id for gate in component]
+            for component in schedule.feedback] == [[NAND1_ID, NAND2_ID]]
+    assert [[gate.device_id for gate in level]
+            for level in schedule.levels] == [[AND1_ID, NAND1_ID, NAND2_ID]]
+
+
+def test_get_fanout(latch_network):
+    """Test if the fanout of a switch holds the gates it drives, through
+    the latch, in execution order."""
+    devices = latch_network.devices
+    [SW1_ID, NAND1_ID, NAND2_ID, AND1_ID] = devices.names.lookup(
+        ["Sw1", "Nand1", "Nand2", "And1"])
+    schedule = latch_network.schedule
+    schedule.build()
+
+    [sources, components, cyclic] = schedule.get_fanout(
+        [devices.get_device(SW1_ID)])
+    assert [device.device_id for device in sources] == [SW1_ID]
+    assert [[gate.device_id for gate in component]
+            for component in components] == [[AND1_ID], [NAND1_ID, NAND2_ID]]
+    assert cyclic == [False, True]
+
+    [sources, components, cyclic] = schedule.get_fanout(
+        [devices.get_device(NAND2_ID)])
+    assert sources == []
+    assert components == [schedule.components[1]]
+
+
+def test_find_components_long_chain():
+    """Test if long chains do not reach the recursion limit."""
+    network, gate_ids = make_chain("sweep", 1500)
+    schedule = Schedule(network.devices)
+    gates = [network.devices.get_device(gate_id) for gate_id in gate_ids]
+
+    assert schedule.find_components(gates) == [[gate_id]
+                                               for gate_id in gate_ids]
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+def test_latch_settles(engine):
+    """Test if the latch settles and follows its set and reset inputs."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    [SW1_ID, SW2_ID, NAND1_ID, NAND2_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Nand1", "Nand2", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    devices.make_device(NAND2_ID, devices.NAND, 2)
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    network.make_connection(SW2_ID, None, NAND2_ID, I2)
+    network.make_connection(NAND1_ID, None, NAND2_ID, I1)
+    network.make_connection(NAND2_ID, None, NAND1_ID, I2)
+
+    assert network.execute_network()
+    assert network.oscillations == []
+    assert network.get_output_signal(NAND1_ID, None) == devices.HIGH
+    assert network.get_output_signal(NAND2_ID, None) == devices.LOW
+
+    devices.set_switch(SW1_ID, devices.HIGH)  # hold
+    assert network.execute_network()
+    assert network.get_output_signal(NAND1_ID, None) == devices.HIGH
+
+    devices.set_switch(SW2_ID, devices.LOW)  # reset
+    assert network.execute_network()
+    assert network.get_output_signal(NAND1_ID, None) == devices.LOW
+    assert network.get_output_signal(NAND2_ID, None) == devices.HIGH
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+def test_oscillation_names_component(engine):
+    """Test if only the oscillating loop is reported."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    [SW1_ID, AND1_ID, NOR1_ID, NOR2_ID, NOR3_ID, I1, I2] = names.lookup(
+        ["Sw1", "And1", "Nor1", "Nor2", "Nor3", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    for gate_id in [NOR1_ID, NOR2_ID, NOR3_ID]:
+        devices.make_device(gate_id, devices.NOR, 1)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW1_ID, None, AND1_ID, I2)
+    network.make_connection(NOR1_ID, None, NOR2_ID, I1)
+    network.make_connection(NOR2_ID, None, NOR3_ID, I1)
+    network.make_connection(NOR3_ID, None, NOR1_ID, I1)
+
+    assert not network.execute_network()
+    assert network.oscillations == [["Nor1", "Nor2", "Nor3"]]
+    assert network.get_output_signal(AND1_ID, None) in [devices.RISING,
+                                                        devices.HIGH]
+
+
+def test_schedule_invalidated_by_connections(latch_network):
+    """Test if the network rebuilds its schedule after a new connection."""
+    network = latch_network
+    network.execute_network()
+    assert not network.schedule.is_stale()
+
+    devices = network.devices
+    [OR1_ID, SW1_ID, I1] = devices.names.lookup(["Or1", "Sw1", "I1"])
+    devices.make_device(OR1_ID, devices.OR, 1)
+    assert network.schedule.is_stale()
+    network.execute_network()
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    assert network.schedule.is_stale()
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+def test_deep_chain_settles(engine):
+    """Test if a chain longer than the iteration limit settles."""
+    network, gate_ids = make_chain(engine, 60)
+    devices = network.devices
+    [SW1_ID] = devices.names.lookup(["Sw1"])
+
+    assert network.execute_network()
+    assert network.get_output_signal(gate_ids[-1], None) == devices.HIGH
+
+    devices.set_switch(SW1_ID, devices.LOW)
+    assert network.execute_network()
+    assert network.get_output_signal(gate_ids[-1], None) == devices.LOW
+
+
+@pytest.fixture
+def pruned_latch(latch_network):
+    """Return the latch network, pruned to a monitor on the AND gate."""
+    network = latch_network
+    network.schedule.prune = True
+    monitors = Monitors(network.names, network.devices, network)
+    [AND1_ID] = network.names.lookup(["And1"])
+    monitors.make_monitor(AND1_ID, None)
+    return network, monitors
+
+
+def test_cone_of_influence(pruned_latch):
+    """Test if only the fan-in of the monitors is scheduled."""
+    network, monitors = pruned_latch
+    [SW1_ID, SW2_ID, NAND1_ID, NAND2_ID, AND1_ID] = network.names.lookup(
+        ["Sw1", "Sw2", "Nand1", "Nand2", "And1"])
+    assert network.execute_network()
+    assert network.schedule.cone == {SW1_ID, SW2_ID, AND1_ID}
+    assert [device.device_id for device in network.schedule.order] == \
+        [SW1_ID, SW2_ID, AND1_ID]
+    # The latch is not executed
+    assert network.get_output_signal(NAND1_ID, None) == \
+        network.devices.LOW
+
+
+def test_cone_grows_with_monitors(pruned_latch):
+    """Test if adding a monitor only rebuilds when the cone grows, and
+    removing one keeps the cone."""
+    network, monitors = pruned_latch
+    devices = network.devices
+    [SW1_ID, NAND2_ID] = network.names.lookup(["Sw1", "Nand2"])
+    network.sweep_order()  # build the cone before the first cycle
+
+    monitors.make_monitor(SW1_ID, None)
+    assert not network.schedule.is_stale()
+
+    monitors.make_monitor(NAND2_ID, None)
+    assert network.schedule.is_stale()
+    assert network.execute_network()
+    assert len(network.schedule.cone) == 5
+    assert network.get_output_signal(NAND2_ID, None) in [devices.LOW,
+                                                         devices.HIGH]
+
+    monitors.remove_monitor(NAND2_ID, None)
+    assert not network.schedule.is_stale()
+    assert network.execute_network()
+    assert len(network.schedule.cone) == 5
+
+
+def test_monitor_added_mid_run(pruned_latch):
+    """Test if a pruned output cannot be monitored once the network has
+    run, and a removed monitor can be made again with its correct trace."""
+    network, monitors = pruned_latch
+    [SW1_ID, SW2_ID, NAND1_ID, AND1_ID] = network.names.lookup(
+        ["Sw1", "Sw2", "Nand1", "And1"])
+    devices = network.devices
+    assert monitors.make_monitor(NAND1_ID, None) == monitors.NO_ERROR
+    for cycle in range(6):
+        devices.set_switch(SW1_ID, cycle % 2)
+        assert network.execute_network()
+        monitors.record_signals()
+    assert monitors.remove_monitor(NAND1_ID, None)
+    assert monitors.remove_monitor(AND1_ID, None)
+    for cycle in range(6):
+        devices.set_switch(SW2_ID, cycle % 3 == 0)
+        assert network.execute_network()
+    [NAND2_ID] = network.names.lookup(["Nand2"])
+    assert monitors.make_monitor(NAND2_ID, None, 12) == monitors.NO_ERROR
+    assert monitors.make_monitor(NAND1_ID, None, 12) == monitors.NO_ERROR
+
+    # Same switch changes on a network that is not pruned
+    unpruned = make_latch_network()
+    devices = unpruned.devices
+    for cycle in range(12):
+        if cycle < 6:
+            devices.set_switch(SW1_ID, cycle % 2)
+        else:
+            devices.set_switch(SW2_ID, (cycle - 6) % 3 == 0)
+        assert unpruned.execute_network()
+    assert [network.get_output_signal(NAND1_ID, None),
+            network.get_output_signal(NAND2_ID, None)] == \
+        [unpruned.get_output_signal(NAND1_ID, None),
+         unpruned.get_output_signal(NAND2_ID, None)]
+
+
+def test_pruned_monitor_refused(pruned_latch):
+    """Test if a monitor outside the cone is refused after cycle 0."""
+    network, monitors = pruned_latch
+    [SW1_ID, NAND1_ID] = network.names.lookup(["Sw1", "Nand1"])
+    assert network.execute_network()
+    assert monitors.make_monitor(NAND1_ID, None, 1) == \
+        monitors.MONITOR_PRUNED
+    assert (NAND1_ID, None) not in monitors.monitors_dictionary
+    assert monitors.make_monitor(SW1_ID, None, 1) == monitors.NO_ERROR
+    assert not network.schedule.is_stale()
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled"])
+@pytest.mark.parametrize("path", ["example_files/example1.txt",
+                                  "example_files/example4.txt",
+                                  "example_files/example5.txt",
+                                  "example_files/example7.txt"])
+def test_pruned_traces_unchanged(engine, path):
+    """Test if pruning does not change the trace of the kept monitor."""
+    traces = []
+    for prune in [False, True]:
+        names, devices, network, monitors = parse_file(path, 0, engine,
+                                                       prune)
+        for device_id, output_id in list(monitors.monitors_dictionary)[1:]:
+            monitors.remove_monitor(device_id, output_id)
+        for _ in range(30):
+            network.execute_network()
+            monitors.record_signals()
+        traces.append(monitors.monitors_dictionary)
+    assert traces[0] == traces[1]
+
+
+@pytest.fixture
+def folded_network():
+    """Return a network with a LOW switch fixing an AND gate.
+
+    The AND gate drives a monitored OR gate, and a NOR gate driven by a
+    clock drives nothing.
+    """
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, fold=True)
+    monitors = Monitors(names, devices, network)
+
+    [SW1_ID, SW2_ID, CLK1_ID, AND1_ID, OR1_ID, NOR1_ID, I1, I2] = \
+        names.lookup(["Sw1", "Sw2", "Clk1", "And1", "Or1", "Nor1", "I1",
+                      "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(CLK1_ID, devices.CLOCK, 1)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    devices.make_device(OR1_ID, devices.OR, 2)
+    devices.make_device(NOR1_ID, devices.NOR, 2)
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    network.make_connection(AND1_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    network.make_connection(SW1_ID, None, NOR1_ID, I1)
+    network.make_connection(CLK1_ID, None, NOR1_ID, I2)
+    monitors.make_monitor(OR1_ID, None)
+    return network, monitors
+
+
+def test_fold_constants(folded_network):
+    """Test if gates fixed by the switches are folded once settled."""
+    network, monitors = folded_network
+    devices = network.devices
+    [SW1_ID, SW2_ID, CLK1_ID, AND1_ID, OR1_ID, NOR1_ID] = \
+        devices.names.lookup(["Sw1", "Sw2", "Clk1", "And1", "Or1", "Nor1"])
+    assert network.execute_network()
+    # The OR gate had not reached its constant when the schedule was built
+    assert network.schedule.folded == {AND1_ID: devices.LOW}
+    assert network.schedule.is_stale()
+
+    assert network.execute_network()
+    assert network.schedule.folded == {AND1_ID: devices.LOW,
+                                       OR1_ID: devices.HIGH}
+    assert network.schedule.dead == {NOR1_ID}
+    assert [device.device_id for device in network.schedule.order] == \
+        [SW1_ID, SW2_ID, CLK1_ID]
+    assert not network.schedule.is_stale()
+
+    # Setting a switch that the folded gates rely on unfolds them
+    devices.set_switch(SW2_ID, devices.LOW)
+    assert network.schedule.is_stale()
+    assert network.execute_network()
+    assert network.get_output_signal(OR1_ID, None) == devices.LOW
+
+
+def test_dead_logic_monitored(folded_network):
+    """Test if monitoring a dead device schedules it again."""
+    network, monitors = folded_network
+    devices = network.devices
+    [CLK1_ID, NOR1_ID] = devices.names.lookup(["Clk1", "Nor1"])
+    network.execute_network()
+    assert NOR1_ID in network.schedule.dead
+    signal = network.get_output_signal(NOR1_ID, None)
+    network.execute_network()
+    assert network.get_output_signal(NOR1_ID, None) == signal
+
+    monitors.make_monitor(NOR1_ID, None)
+    assert network.schedule.is_stale()
+    for _ in range(2):
+        network.execute_network()
+        assert network.get_output_signal(NOR1_ID, None) == \
+            1 - network.get_output_signal(CLK1_ID, None)
+    assert NOR1_ID not in network.schedule.dead
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled"])
+@pytest.mark.parametrize("path", ["example_files/example3.txt",
+                                  "example_files/example4.txt",
+                                  "example_files/example6.txt",
+                                  "example_files/example7.txt"])
+def test_folded_traces_unchanged(engine, path):
+    """Test if folding does not change the traces as switches are set."""
+    traces = []
+    for fold in [False, True]:
+        names, devices, network, monitors = parse_file(path, 0, engine,
+                                                       fold=fold)
+        switch_ids = devices.find_devices(devices.SWITCH)
+        for cycle in range(30):
+            if cycle % 7 == 3:
+                switch_id = switch_ids[cycle % len(switch_ids)]
+                device = devices.get_device(switch_id)
+                devices.set_switch(switch_id, 1 - device.switch_state)
+            network.execute_network()
+            monitors.record_signals()
+        traces.append(monitors.monitors_dictionary)
+    assert traces[0] == traces[1]
+
+
+def make_duplicates(engine, merge):
+    """Return a network with duplicated gates, monitoring every output.
+
+    And2 duplicates And1 with its inputs swapped, and Or2 duplicates Or1
+    through them. Or2 clocks a D-type.
+    """
+    random.seed(0)  # same cold start for every network
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine, merge=merge)
+    monitors = Monitors(names, devices, network)
+
+    [SW1_ID, SW2_ID, CL_ID, AND1_ID, AND2_ID, OR1_ID, OR2_ID, XOR1_ID,
+     D1_ID, I1, I2] = names.lookup(["Sw1", "Sw2", "Cl", "And1", "And2",
+                                    "Or1", "Or2", "Xor1", "D1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    for gate_id in [AND1_ID, AND2_ID]:
+        devices.make_device(gate_id, devices.AND, 2)
+    for gate_id in [OR1_ID, OR2_ID]:
+        devices.make_device(gate_id, devices.OR, 2)
+    devices.make_device(XOR1_ID, devices.XOR)
+    devices.make_device(D1_ID, devices.D_TYPE)
+
+    network.make_connection(SW1_ID, None, AND1_ID, I1)
+    network.make_connection(CL_ID, None, AND1_ID, I2)
+    network.make_connection(CL_ID, None, AND2_ID, I1)
+    network.make_connection(SW1_ID, None, AND2_ID, I2)
+    network.make_connection(AND1_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    network.make_connection(AND2_ID, None, OR2_ID, I1)
+    network.make_connection(SW2_ID, None, OR2_ID, I2)
+    network.make_connection(OR1_ID, None, XOR1_ID, I1)
+    network.make_connection(OR2_ID, None, XOR1_ID, I2)
+    network.make_connection(OR2_ID, None, D1_ID, devices.CLK_ID)
+    network.make_connection(D1_ID, devices.QBAR_ID, D1_ID, devices.DATA_ID)
+    network.make_connection(SW2_ID, None, D1_ID, devices.SET_ID)
+    network.make_connection(SW2_ID, None, D1_ID, devices.CLEAR_ID)
+    for device in devices.devices_list:
+        for output_id in device.outputs:
+            monitors.make_monitor(device.device_id, output_id)
+    return network, monitors
+
+
+def test_merge_gates():
+    """Test if identical gates are merged and keep their own outputs."""
+    network, monitors = make_duplicates("sweep", True)
+    devices = network.devices
+    [AND1_ID, AND2_ID, OR1_ID, OR2_ID, XOR1_ID] = devices.names.lookup(
+        ["And1", "And2", "Or1", "Or2", "Xor1"])
+    assert network.execute_network()
+    assert network.schedule.merged == {AND2_ID: AND1_ID, OR2_ID: OR1_ID}
+    order = [device.device_id for device in network.schedule.order]
+    assert AND2_ID not in order and OR2_ID not in order
+
+    for _ in range(4):
+        assert network.execute_network()
+        monitors.record_signals()
+        assert network.get_output_signal(OR2_ID, None) == \
+            network.get_output_signal(OR1_ID, None)
+        assert network.get_output_signal(XOR1_ID, None) == devices.LOW
+    assert devices.get_signal_name(OR2_ID, None) == "Or2"
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled"])
+def test_merged_traces_unchanged(engine):
+    """Test if merging does not change the traces as switches are set."""
+    traces = []
+    for merge in [False, True]:
+        network, monitors = make_duplicates(engine, merge)
+        devices = network.devices
+        [SW1_ID, SW2_ID] = devices.names.lookup(["Sw1", "Sw2"])
+        for cycle in range(20):
+            if cycle == 8:
+                devices.set_switch(SW1_ID, devices.LOW)
+            elif cycle == 12:
+                devices.set_switch(SW2_ID, devices.HIGH)
+            network.execute_network()
+            monitors.record_signals()
+        traces.append(monitors.monitors_dictionary)
+    assert traces[0] == traces[1]
@@ -0,0 +1,87 @@
+"""Test the stimulus module."""
+import pytest
+
+from stimulus import Stimulus, read_stimulus, get_sequence
+from test_bitsim import parse_file
+
+EVENTS = [(0, "SW1", 1), (0, "SW2", 1), (3, "SW1", 0), (4, "SW1", 1),
+          (4, "SW2", 0), (9, "SW2", 1)]
+
+
+def test_read_stimulus(tmp_path):
+    """Test if the events of a file are read, skipping comments."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text("# cycle switch value\n"
+                    "0 SW1 1\n"
+                    "\n"
+                    "12 SW2 0  # release\n")
+    assert list(read_stimulus(path)) == [(0, "SW1", 1), (12, "SW2", 0)]
+
+    path.write_text("0 SW1 1\n"
+                    "5 SW2 2\n")
+    events = read_stimulus(path)
+    assert next(events) == (0, "SW1", 1)  # the file is read lazily
+    with pytest.raises(ValueError, match="Line 2"):
+        next(events)
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event", "compiled"])
+def test_run_cycles_with_stimulus(engine):
+    """Test if the events are applied at their cycles within a run, also
+    when the run is split."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt", engine=engine)
+    for cycle in range(12):
+        for event_cycle, name, value in EVENTS:
+            if event_cycle == cycle:
+                devices.set_switch(names.query(name), value)
+        assert network.execute_network()
+        monitors.record_signals()
+    expected = monitors.monitors_dictionary
+
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt", engine=engine)
+    stimulus = Stimulus(names, devices, iter(EVENTS))
+    assert network.run_cycles(4, monitors, stimulus)[1] is None
+    assert stimulus.applied == 3
+    assert stimulus.pending == (4, "SW1", 1)  # held for the next run
+    assert network.run_cycles(8, monitors, stimulus)[1] is None
+    assert stimulus.is_finished()
+    assert monitors.monitors_dictionary == expected
+
+
+@pytest.mark.parametrize("events, message", [
+    ([(0, "SW1", 1), (2, "G1", 0)], "Not a switch"),
+    ([(0, "SW1", 1), (2, "SW1", 3)], "Invalid value"),
+    ([(2, "SW1", 1), (1, "SW1", 0)], "comes after cycle 2"),
+])
+def test_stimulus_errors(events, message):
+    """Test if invalid events raise a ValueError, and if the cycles run
+    before them are recorded."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    stimulus = Stimulus(names, devices, iter(events))
+    with pytest.raises(ValueError, match=message):
+        network.run_cycles(5, monitors, stimulus)
+    assert len(monitors.monitors_dictionary[
+        tuple(devices.get_signal_ids("G1"))]) == network.cycles_completed
+
+
+def test_stimulus_in_the_past():
+    """Test if an event for a cycle already simulated raises a
+    ValueError."""
+    names, devices, network, monitors = parse_file(
+        "example_files/example1.txt")
+    network.run_cycles(3, monitors)
+    stimulus = Stimulus(names, devices, iter([(1, "SW1", 1)]))
+    with pytest.raises(ValueError, match="before cycle 3"):
+        network.run_cycles(3, monitors, stimulus)
+
+
+def test_get_sequence():
+    """Test if the events are grouped by cycle for the fault simulator."""
+    assert get_sequence(EVENTS, 6) == [
+        {"SW1": 1, "SW2": 1}, {}, {}, {"SW1": 0}, {"SW1": 1, "SW2": 0}, {}]
+    assert get_sequence(iter(EVENTS), 2) == [{"SW1": 1, "SW2": 1}, {}]
+    with pytest.raises(ValueError, match="comes after cycle 2"):
+        get_sequence([(2, "SW1", 1), (1, "SW1", 0)], 5)
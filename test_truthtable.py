@@ -0,0 +1,62 @@
+"""Test the truthtable module."""
+import io
+
+from truthtable import get_switch_states, write_truth_table
+
+
+def test_get_switch_states():
+    """Test if the first switch is the most significant bit."""
+    assert get_switch_states(0, 3) == [0, 0, 0]
+    assert get_switch_states(1, 3) == [0, 0, 1]
+    assert get_switch_states(6, 3) == [1, 1, 0]
+
+
+def test_truth_table_latch():
+    """Test the table of a NAND latch."""
+    output = io.StringIO()
+    assert write_truth_table("example_files/example1.txt", 4, output,
+                             processes=1)
+    assert output.getvalue().splitlines() == ["SW1 SW2 | G1 G2",
+                                              "  0   0 | ---- ----",
+                                              "  0   1 | ---- ____",
+                                              "  1   0 | ____ ----",
+                                              "  1   1 | ---- ____"]
+
+
+def test_truth_table_process_pool():
+    """Test if the process pool writes the same table as one process."""
+    single = io.StringIO()
+    pool = io.StringIO()
+    assert write_truth_table("example_files/example6.txt", 12, single,
+                             processes=1, chunk_size=3)
+    assert write_truth_table("example_files/example6.txt", 12, pool,
+                             processes=2, chunk_size=3)
+    assert pool.getvalue() == single.getvalue()
+    assert len(pool.getvalue().splitlines()) == 1 + 2 ** 3
+
+
+def test_truth_table_invalid_file(tmp_path):
+    """Test if a definition file with errors is not tabulated."""
+    path = tmp_path / "invalid.txt"
+    path.write_text("[devices]\n    G1 = NAND\n")
+    output = io.StringIO()
+    assert not write_truth_table(str(path), 4, output, processes=1)
+
+
+def test_truth_table_options():
+    """Test if pruning gives the same table, and if the iteration budget
+    reaches the networks of the workers."""
+    tables = []
+    for prune in [False, True]:
+        for processes in [1, 2]:
+            output = io.StringIO()
+            assert write_truth_table("example_files/example6.txt", 12,
+                                     output, processes=processes,
+                                     chunk_size=3, prune=prune)
+            tables.append(output.getvalue())
+    assert tables[1:] == tables[:1] * 3
+
+    output = io.StringIO()
+    assert write_truth_table("example_files/example1.txt", 4, output,
+                             processes=1, iterations=1)
+    assert output.getvalue().splitlines()[1].endswith(" oscillating")
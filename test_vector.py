@@ -0,0 +1,98 @@
+"""Test the vector module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from test_event import run_file
+from test_codegen import make_network
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("path", [
+    "example_files/example1.txt",
+    "example_files/example2.txt",
+    "example_files/example3.txt",
+    "example_files/example4.txt",
+    "example_files/example5.txt",
+    "example_files/example6.txt",
+    "example_files/example7.txt",
+])
+def test_vector_engine_matches_sweep(path):
+    """Test if the vector engine produces the same traces as the sweep."""
+    for seed in range(3):
+        assert run_file(path, "vector", seed=seed) == run_file(
+            path, "sweep", seed=seed)
+
+
+def test_vector_engine_matches_sweep_after_toggles():
+    """Test if outputs and D-type memories match the sweep cycle by cycle."""
+    sweep = make_network("sweep")
+    vector = make_network("vector")
+
+    [SW1_ID, SW2_ID] = sweep.names.lookup(["Sw1", "Sw2"])
+    for cycle in range(12):
+        if cycle == 4:
+            for network in [sweep, vector]:
+                network.devices.set_switch(SW1_ID, 0)
+        if cycle == 8:
+            for network in [sweep, vector]:
+                network.devices.set_switch(SW2_ID, 1)
+        assert vector.execute_network() == sweep.execute_network()
+        assert [(device.outputs, device.dtype_memory)
+                for device in vector.devices.devices_list] == \
+            [(device.outputs, device.dtype_memory)
+             for device in sweep.devices.devices_list]
+
+
+def test_vector_engine_groups_gates():
+    """Test if the gates of a level are grouped by kind and fan-in."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "vector")
+    [SW1_ID, I1, I2] = names.lookup(["Sw1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    gate_ids = names.lookup(["And1", "And2", "Or1", "And3"])
+    for gate_id, kind, fan_in in zip(gate_ids, [devices.AND, devices.AND,
+                                                devices.OR, devices.AND],
+                                     [2, 2, 2, 1]):
+        devices.make_device(gate_id, kind, fan_in)
+        network.make_connection(SW1_ID, None, gate_id, I1)
+        if fan_in == 2:
+            network.make_connection(SW1_ID, None, gate_id, I2)
+
+    assert network.execute_network()
+    [(groups, feedback)] = network.engine.levels
+    assert sorted((kind, len(gate_outputs), gate_inputs.shape[1])
+                  for kind, gate_outputs, gate_inputs in groups) == sorted(
+        [(devices.AND, 2, 2), (devices.OR, 1, 2), (devices.AND, 1, 1)])
+    assert feedback == []
+    for gate_id in gate_ids:
+        assert network.get_output_signal(gate_id, None) == devices.HIGH
+
+
+def test_vector_engine_oscillation():
+    """Test if the vector engine reports an oscillating loop."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, "vector")
+    [NOR1, I1] = names.lookup(["Nor1", "I1"])
+    devices.make_device(NOR1, devices.NOR, 1)
+    network.make_connection(NOR1, None, NOR1, I1)
+
+    assert not network.execute_network()
+    assert network.oscillations == [["Nor1"]]
+
+
+def test_vector_engine_rebuilds_after_connection():
+    """Test if new devices and connections are picked up."""
+    network = make_network("vector")
+    devices = network.devices
+    network.execute_network()
+    [SW1_ID, OR1_ID, I1] = devices.names.lookup(["Sw1", "Or1", "I1"])
+    devices.make_device(OR1_ID, devices.OR, 1)
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+
+    assert network.execute_network()
+    assert network.get_output_signal(OR1_ID, None) == devices.HIGH
@@ -0,0 +1,33 @@
+"""Test the waveform module."""
+import pytest
+
+from waveform import Waveform, LOW, HIGH, RISING, FALLING
+
+
+def test_signals():
+    """Test if edges are found where the level changes, also on wrapping."""
+    waveform = Waveform([HIGH, HIGH, LOW, HIGH, LOW], [HIGH])
+    assert [waveform.get_signal(cycle) for cycle in range(11)] == [
+        HIGH, HIGH, FALLING, RISING, FALLING,
+        RISING, HIGH, FALLING, RISING, FALLING, RISING]
+    assert waveform.get_level(10 ** 12 + 2) == LOW
+
+
+@pytest.mark.parametrize("levels, head", [
+    ([LOW, LOW, HIGH, HIGH, HIGH], []),
+    ([HIGH, LOW, HIGH, HIGH], [HIGH]),
+    ([LOW], [HIGH, HIGH, HIGH, FALLING]),
+    ([HIGH, HIGH], [HIGH]),
+])
+def test_next_change_and_block(levels, head):
+    """Test if the next changes and blocks agree with get_signal()."""
+    waveform = Waveform(levels, head)
+    signals = [waveform.get_signal(cycle) for cycle in range(40)]
+    for cycle in range(20):
+        changes = [later for later in range(cycle + 1, 40)
+                   if signals[later] in [RISING, FALLING]]
+        assert waveform.get_next_change(cycle) == \
+            (changes[0] if changes else None)
+        for cycles in [0, 1, 7, 20]:
+            assert waveform.get_block(cycle, cycles) == \
+                signals[cycle:cycle + cycles]
@@ -0,0 +1,160 @@
+"""Test the wheel module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+
+
+def make_slow_clock(engine="sweep"):
+    """Return names, devices, network and monitors of a slow clocked NAND."""
+    random.seed(0)  # the clock starts with a random counter
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices, engine)
+    monitors = Monitors(names, devices, network)
+    [CL_ID, SW1_ID, NAND1_ID, I1, I2] = names.lookup(
+        ["Cl", "Sw1", "Nand1", "I1", "I2"])
+    devices.make_device(CL_ID, devices.CLOCK, 5)
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(NAND1_ID, devices.NAND, 2)
+    network.make_connection(CL_ID, None, NAND1_ID, I1)
+    network.make_connection(SW1_ID, None, NAND1_ID, I2)
+    monitors.make_monitor(NAND1_ID, None)
+    return names, devices, network, monitors
+
+
+@pytest.fixture
+def slow_clock():
+    """Return a slow clocked NAND simulated by the sweep engine."""
+    return make_slow_clock()
+
+
+def run(devices, network, monitors, cycles):
+    """Run the network, recording the monitors after every cycle."""
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+    network.wheel.sync()
+    return [device.clock_counter for device in devices.devices_list]
+
+
+def test_cycles_are_skipped(slow_clock):
+    """Test if cycles without a clock edge are skipped."""
+    names, devices, network, monitors = slow_clock
+    skipped = []
+    for _ in range(30):
+        skipped.append(network.wheel.skip_cycle())
+        assert network.execute_network()
+        monitors.record_signals()
+    # The clock only changes every fifth cycle, with edges in between
+    assert skipped.count(True) > 10
+    assert network.cycles_completed == 30
+    [NAND1_ID] = names.lookup(["Nand1"])
+    trace = monitors.monitors_dictionary[(NAND1_ID, None)]
+    assert len(trace) == 30
+
+
+@pytest.mark.parametrize("engine", ["event", "compiled", "vector"])
+def test_engines_match_sweep(engine):
+    """Test if every engine gives the traces and counters of the sweep."""
+    names, devices, network, monitors = make_slow_clock()
+    counters = run(devices, network, monitors, 37)
+    expected = monitors.monitors_dictionary
+
+    names, devices, network, monitors = make_slow_clock(engine)
+    assert run(devices, network, monitors, 37) == counters
+    assert monitors.monitors_dictionary == expected
+
+
+def test_switch_change_is_simulated(slow_clock):
+    """Test if setting a switch stops the cycle from being skipped."""
+    names, devices, network, monitors = slow_clock
+    [SW1_ID, NAND1_ID] = names.lookup(["Sw1", "Nand1"])
+    run(devices, network, monitors, 3)
+    devices.set_switch(SW1_ID, devices.LOW)
+    assert not network.wheel.skip_cycle()
+    assert network.execute_network()
+    assert network.get_output_signal(NAND1_ID, None) == devices.HIGH
+
+
+def test_cold_startup_rebuilds_calendar(slow_clock):
+    """Test if a cold start-up of the devices gives the clock new counters."""
+    names, devices, network, monitors = slow_clock
+    [CL_ID] = names.lookup(["Cl"])
+    clock = devices.get_device(CL_ID)
+    run(devices, network, monitors, 7)
+    devices.cold_startup()
+    counter = clock.clock_counter
+    network.wheel.sync()
+    assert clock.clock_counter == counter
+    assert not network.wheel.is_valid()
+    assert network.execute_network()
+
+
+def add_switched_gate(names, devices, network, monitors):
+    """Add a switch driving an AND gate apart from the clocked NAND."""
+    [SW2_ID, AND1_ID, I1, I2] = names.lookup(["Sw2", "And1", "I1", "I2"])
+    devices.make_device(SW2_ID, devices.SWITCH, 0)
+    devices.make_device(AND1_ID, devices.AND, 2)
+    network.make_connection(SW2_ID, None, AND1_ID, I1)
+    network.make_connection(SW2_ID, None, AND1_ID, I2)
+    monitors.make_monitor(AND1_ID, None)
+    return SW2_ID, AND1_ID
+
+
+def toggle(devices, network, monitors, switch_id):
+    """Set the switch every other cycle and return the clock counters."""
+    for cycle in range(20):
+        devices.set_switch(switch_id, cycle // 2 % 2)
+        assert network.execute_network()
+        monitors.record_signals()
+    network.wheel.sync()
+    return [device.clock_counter for device in devices.devices_list]
+
+
+@pytest.mark.parametrize("engine", ["sweep", "event"])
+def test_only_switch_fanout_is_executed(engine):
+    """Test if a cycle after a switch is set only executes its fanout, and
+    if the signals are those of cycles that execute every device."""
+    names, devices, network, monitors = make_slow_clock(engine)
+    [SW2_ID, AND1_ID] = add_switched_gate(names, devices, network, monitors)
+    run(devices, network, monitors, 3)
+    while network.wheel.cycle in network.wheel.calendar:
+        run(devices, network, monitors, 1)  # wait for a cycle without edges
+
+    executed = []
+    evaluate_device = network.evaluate_device
+
+    def record(device, keep_edges=False):
+        """Record the device and execute it."""
+        executed.append(device.device_id)
+        return evaluate_device(device, keep_edges)
+    network.evaluate_device = record
+    evaluations = network.engine.evaluations if engine == "event" else 0
+
+    devices.set_switch(SW2_ID, devices.HIGH)
+    assert network.wheel.get_changed_switches() == [
+        devices.get_device(SW2_ID)]
+    run(devices, network, monitors, 1)
+    assert network.get_output_signal(AND1_ID, None) == devices.HIGH
+    assert devices.changed_switches == set()
+    if engine == "sweep":
+        assert set(executed) == {SW2_ID, AND1_ID}
+    else:
+        # Both start their edges, then complete them
+        assert network.engine.evaluations - evaluations == 4
+
+    # The compiled engine executes every device in every cycle
+    names, devices, network, monitors = make_slow_clock(engine)
+    [SW2_ID, AND1_ID] = add_switched_gate(names, devices, network, monitors)
+    counters = toggle(devices, network, monitors, SW2_ID)
+    names, devices, network, monitors_compiled = make_slow_clock("compiled")
+    [SW2_ID, AND1_ID] = add_switched_gate(names, devices, network,
+                                          monitors_compiled)
+    assert toggle(devices, network, monitors_compiled, SW2_ID) == counters
+    assert monitors.monitors_dictionary == \
+        monitors_compiled.monitors_dictionary
@@ -0,0 +1,174 @@
+"""Tabulate the monitored signals for every setting of the switches.
+
+Used in the Logic Simulator project by `logsim.py --sweep <file path>`. The
+definition file is run for every one of the 2^k combinations of its k
+switches and one row per combination is written, with the trace of every
+monitored signal. The combinations are split into chunks and spread over a
+multiprocessing pool. Each worker parses the file once and simulates every
+chunk it is given bit-parallel (see bitsim.BitParallel).
+
+Classes
+-------
+TableWorker - holds the parsed definition file and tabulates combinations.
+
+Functions
+---------
+get_switch_states(index, switch_count): Returns the switch states of a
+                                        combination.
+
+init_worker(path, cycles, seed, prune, iterations): Parses the definition
+                                                   file in a worker.
+
+run_chunk(chunk): Returns the table rows of a chunk of combinations.
+
+write_truth_table(path, cycles, output, processes, chunk_size, seed, prune,
+                  iterations):
+    Writes the table for every combination of the switches.
+"""
+import contextlib
+import io
+import multiprocessing
+import random
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from bitsim import BitParallel
+
+# Simulator of the definition file in this worker process
+worker = None
+
+
+class TableWorker:
+
+    """Hold the parsed definition file and tabulate chunks of combinations.
+
+    Parameters
+    ----------
+    path: path of the definition file.
+    cycles: number of simulation cycles for each combination.
+    seed: seed of the random cold start, so that every worker starts the
+          D-types and clocks in the same state.
+    prune: if True, only the devices that the monitored outputs depend on
+           are simulated (see schedule.Schedule).
+    iterations: iteration budget of a cycle (see
+                network.Network.iteration_limit), or None for the default.
+
+    Public methods
+    --------------
+    get_header(self): Returns the header row of the table.
+
+    run_chunk(self, chunk): Returns the table rows of a chunk of
+                            combinations.
+    """
+
+    def __init__(self, path, cycles, seed=0, prune=False, iterations=None):
+        """Parse the definition file."""
+        random.seed(seed)
+        self.names = Names()
+        self.devices = Devices(self.names)
+        self.network = Network(self.names, self.devices, prune=prune)
+        if iterations is not None:
+            self.network.iteration_limit = iterations
+        self.monitors = Monitors(self.names, self.devices, self.network)
+        scanner = Scanner(path, self.names)
+        parser = Parser(self.names, self.devices, self.network,
+                        self.monitors, scanner)
+        with contextlib.redirect_stdout(io.StringIO()):
+            [self.valid, self.errors] = parser.parse_network()
+        self.cycles = cycles
+
+        self.switch_names = [self.names.get_name_string(switch_id)
+                             for switch_id in self.devices.find_devices(
+                                 self.devices.SWITCH)]
+        self.simulator = BitParallel(self.names, self.devices, self.network,
+                                     self.monitors)
+
+    def get_header(self):
+        """Return the header row: switch names, then monitor names."""
+        return " ".join(self.switch_names) + " | " + " ".join(
+            self.devices.get_signal_name(device_id, output_id)
+            for device_id, output_id in self.monitors.monitors_dictionary)
+
+    def run_chunk(self, chunk):
+        """Return the table rows of the combinations from start to stop.
+
+        chunk is the pair (start, stop). Each row has the switch states, the
+        trace of every monitor, and "oscillating" if a cycle did not settle.
+        """
+        start, stop = chunk
+        switch_count = len(self.switch_names)
+        scenarios = [dict(zip(self.switch_names,
+                              get_switch_states(index, switch_count)))
+                     for index in range(start, stop)]
+        traces = self.simulator.run(scenarios, self.cycles)
+
+        rows = []
+        for scenario, trace, steady_states in zip(
+                scenarios, traces, self.simulator.steady_states):
+            row = " ".join(str(state).rjust(len(name))
+                           for name, state in scenario.items())
+            row += " | " + " ".join(self.monitors.get_trace_string(signals)
+                                    for signals in trace.values())
+            if not all(steady_states):
+                row += " oscillating"
+            rows.append(row)
+        return rows
+
+
+def get_switch_states(index, switch_count):
+    """Return the switch states of combination number index.
+
+    The first switch is the most significant bit, so the combinations are in
+    binary counting order.
+    """
+    return [(index >> (switch_count - 1 - i)) & 1
+            for i in range(switch_count)]
+
+
+def init_worker(path, cycles, seed, prune=False, iterations=None):
+    """Parse the definition file once in this worker process."""
+    global worker
+    worker = TableWorker(path, cycles, seed, prune, iterations)
+
+
+def run_chunk(chunk):
+    """Return the table rows of a chunk of combinations in this worker."""
+    return worker.run_chunk(chunk)
+
+
+def write_truth_table(path, cycles, output, processes=None, chunk_size=256,
+                      seed=0, prune=False, iterations=None):
+    """Write the table for every combination of the switches to output.
+
+    The combinations are run in chunks of chunk_size on a pool of processes
+    (one per CPU if None), whose networks are made with prune and
+    iterations (see TableWorker). Return True if successful, or False if
+    the definition file is not valid or has an unconnected input.
+    """
+    table = TableWorker(path, cycles, seed, prune, iterations)
+    if not table.valid:
+        output.write(str(table.errors) + "\n")
+        return False
+    if not table.network.check_network():
+        output.write("Error: the network has unconnected inputs\n")
+        return False
+
+    combinations = 2 ** len(table.switch_names)
+    chunks = ((start, min(start + chunk_size, combinations))
+              for start in range(0, combinations, chunk_size))
+    output.write(table.get_header() + "\n")
+    if processes == 1 or combinations <= chunk_size:
+        for chunk in chunks:
+            output.write("\n".join(table.run_chunk(chunk)) + "\n")
+        return True
+
+    with multiprocessing.Pool(processes, init_worker,
+                              (path, cycles, seed, prune,
+                               iterations)) as pool:
+        for rows in pool.imap(run_chunk, chunks):
+            output.write("\n".join(rows) + "\n")
+    return True
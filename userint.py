@@ -7,6 +7,10 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+import signal
+
+from periodic import PeriodDetector
+from budget import Budget
 
 
 class UserInterface:
@@ -24,6 +28,10 @@ class UserInterface:
     devices: instance of the devices.Devices() class.
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
+    time_limit: wall-clock time, in seconds, after which a run or continue
+                command stops, or None for no limit.
+    cycle_limit: number of cycles a run or continue command may execute, or
+                 None for no limit.
 
     Public methods:
     ---------------
@@ -59,19 +67,23 @@ class UserInterface:
     zap_command(self): Removes the specified monitor.
 
     run_network(self, cycles): Runs the network for the specified number of
-                               simulation cycles.
+                               simulation cycles, within the time and cycle
+                               limits.
 
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
     """
 
-    def __init__(self, names, devices, network, monitors):
+    def __init__(self, names, devices, network, monitors, time_limit=None,
+                 cycle_limit=None):
         """Initialise variables."""
         self.names = names
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        self.time_limit = time_limit
+        self.cycle_limit = cycle_limit
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
@@ -230,6 +242,8 @@ class UserInterface:
                                                        self.cycles_completed)
             if monitor_error == self.monitors.NO_ERROR:
                 print("Successfully made monitor.")
+            elif monitor_error == self.monitors.MONITOR_PRUNED:
+                print("Error! The signal is pruned from the simulation.")
             else:
                 print("Error! Could not make monitor.")
 
@@ -246,16 +260,44 @@ class UserInterface:
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
-        Return True if successful.
+        The cycles are executed by Network.run_cycles(), as in the GUI, and
+        once the network is periodic, the remaining cycles are extrapolated
+        (see periodic.PeriodDetector). The run stops early at the time and
+        cycle limits, or when interrupted with Ctrl-C, keeping the cycles
+        completed. Return the number of cycles completed, or None if a cycle
+        failed.
         """
-        for _ in range(cycles):
-            if self.network.execute_network():
-                self.monitors.record_signals()
-            else:
-                print("Error! Network oscillating.")
-                return False
+        detector = PeriodDetector(self.devices, self.network, self.monitors)
+        budget = Budget(self.time_limit, self.cycle_limit)
+        start = self.network.cycles_completed
+        try:  # Ctrl-C cancels the run between cycles
+            handler = signal.signal(signal.SIGINT,
+                                    lambda signum, frame: budget.cancel())
+        except ValueError:  # signals can only be handled in the main thread
+            handler = None
+        try:
+            successful = detector.run(cycles, budget)
+        finally:
+            if handler is not None:
+                signal.signal(signal.SIGINT, handler)
+        if not successful:
+            print("Error! Network oscillating.")
+            for component in self.network.oscillations:
+                print("Oscillating devices: " + ", ".join(component))
+            for report in self.network.oscillation_reports:
+                print(report.get_text())
+            return None
+        if detector.fast_forwarded:
+            print(" ".join(["Periodic with period", str(detector.period),
+                            "after cycle", str(detector.start) + ":",
+                            "skipped", str(detector.fast_forwarded),
+                            "cycles."]))
+        completed = self.network.cycles_completed - start
+        if budget.stopped is not None:
+            print(budget.get_text() + ": stopped after " + str(completed) +
+                  " of " + str(cycles) + " cycles.")
         self.monitors.display_signals()
-        return True
+        return completed
 
     def run_command(self):
         """Run the simulation from scratch."""
@@ -266,8 +308,9 @@ class UserInterface:
             self.monitors.reset_monitors()
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
-            if self.run_network(cycles):
-                self.cycles_completed += cycles
+            completed = self.run_network(cycles)
+            if completed is not None:
+                self.cycles_completed += completed
 
     def continue_command(self):
         """Continue a previously run simulation."""
@@ -275,7 +318,10 @@ class UserInterface:
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
-            elif self.run_network(cycles):
-                self.cycles_completed += cycles
-                print(" ".join(["Continuing for", str(cycles), "cycles.",
-                                "Total:", str(self.cycles_completed)]))
+            else:
+                completed = self.run_network(cycles)
+                if completed is not None:
+                    self.cycles_completed += completed
+                    print(" ".join(["Continuing for", str(completed),
+                                    "cycles.", "Total:",
+                                    str(self.cycles_completed)]))
@@ -0,0 +1,380 @@
+"""Execute the network with NumPy array operations.
+
+Used in the Logic Simulator project as an alternative to the sweep engine in
+network.py, for wide circuits. Every output signal is held in one NumPy array
+and the gates of each level are evaluated together, a few array operations
+per kind and number of inputs, so the signal traces are identical to the
+sweep but the cost of a cycle grows with the number of levels rather than the
+number of gates. This module needs NumPy.
+
+Classes
+-------
+VectorEngine - evaluates the network level by level with NumPy.
+"""
+import numpy as np
+
+from oscillation import LoopDetector
+
+# Settled level of LOW, HIGH, RISING and FALLING, see Network.settled_signal()
+SETTLED = np.array([0, 1, 1, 0], dtype=np.int8)
+
+# UPDATE[signal, target] is Network.update_signal(signal, target)
+UPDATE = np.array([[0, 2], [3, 1], [3, 1], [0, 2]], dtype=np.int8)
+
+
+class VectorEngine:
+
+    """Execute the network level by level with NumPy array operations.
+
+    Gates on the same level of the schedule (see schedule.Schedule) never read
+    each other's outputs, so evaluating them all at once from the same array
+    gives exactly what the sweep (network.Network.settle_network()) computes
+    one gate at a time. For each level, the gates of one kind and number of
+    inputs are evaluated with an index matrix into the signal array and a
+    reduction along its rows. Switches, clocks, RC and SIGGEN devices are
+    updated in one operation each, and the D-types in batches of devices
+    that do not read each other. Feedback components must see each other's
+    updates in sweep order, so they are settled gate by gate as in
+    network.Network.settle_component().
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    invalidate(self): Discards the index arrays so that they are rebuilt
+                      before the next cycle.
+
+    build(self): Builds the signal index and the index arrays of every group
+                 of devices.
+
+    execute_network(self): Executes the network for one simulation cycle.
+    """
+
+    def __init__(self, network):
+        """Initialise the engine without index arrays."""
+        self.network = network
+        self.devices = network.devices
+
+        self.outputs = []  # [(device, output_id)], one per array entry
+        self.owner = []  # owner[i] = position in the sweep order of output i
+        self.switches = []  # the switches, in sweep order
+        self.switch_outputs = None  # array entries of the switch outputs
+        self.dtypes = []  # batches of D-types, see build()
+        self.clocks = None  # array entries of clock, RC and SIGGEN outputs
+        self.levels = []  # [(gate groups, feedback components)] per level
+        self.connected = False
+        self.device_count = None
+
+        # Signal array at the end of the previous cycle. Only the engine writes
+        # the gate outputs, so only the source outputs (the first
+        # source_count entries) are read from the devices in the next cycle.
+        self.values = None
+        self.source_count = 0
+
+    def invalidate(self):
+        """Discard the index arrays so that they are rebuilt before the next
+        cycle."""
+        self.device_count = None
+        self.values = None
+
+    def build(self):
+        """Build the signal index and the index arrays of every group of
+        devices."""
+        devices = self.devices
+        schedule = self.network.schedule
+        order = self.network.sweep_order()
+
+        index = {}
+        self.outputs = []
+        self.owner = []
+        for position, device in enumerate(order):
+            for output_id in device.outputs:
+                index[(device.device_id, output_id)] = len(self.outputs)
+                self.outputs.append((device, output_id))
+                self.owner.append(position)
+        # Folded gates are read but never written
+        for device_id in schedule.folded:
+            index[(device_id, None)] = len(self.outputs)
+            self.outputs.append((devices.get_device(device_id), None))
+            self.owner.append(-1)
+        self.owner = np.array(self.owner, dtype=np.int64)
+        self.source_count = sum(len(device.outputs)
+                                for device in schedule.sources)
+        self.values = None
+
+        self.connected = True
+        inputs = {}
+        for device in order:
+            inputs[device.device_id] = {}
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is not None:
+                    connected_output = schedule.resolve(connected_output)
+                if connected_output not in index:
+                    self.connected = False
+                    break
+                inputs[device.device_id][input_id] = index[connected_output]
+        self.device_count = len(devices.devices_list)
+        if not self.connected:
+            return
+
+        def entries(device_list, output_id=None):
+            return np.array([index[(device.device_id, output_id)]
+                             for device in device_list], dtype=np.int64)
+
+        sources = schedule.sources
+        self.switches = [device for device in sources
+                         if device.device_kind == devices.SWITCH]
+        self.switch_outputs = entries(self.switches)
+        self.clocks = entries([device for device in sources
+                               if device.device_kind in [devices.CLOCK,
+                                                         devices.RC,
+                                                         devices.SIGGEN]])
+
+        # A D-type reading a D-type earlier in the same batch would see its
+        # old output, so it starts a new batch
+        batches = []
+        batch = []
+        outputs = set()
+        for device in sources:
+            if device.device_kind != devices.D_TYPE:
+                continue
+            if outputs.intersection(inputs[device.device_id].values()):
+                batches.append(batch)
+                batch = []
+                outputs = set()
+            batch.append(device)
+            outputs.update([index[(device.device_id, devices.Q_ID)],
+                            index[(device.device_id, devices.QBAR_ID)]])
+        if batch:
+            batches.append(batch)
+        self.dtypes = []
+        for batch in batches:
+            ports = [devices.CLK_ID, devices.DATA_ID, devices.SET_ID,
+                     devices.CLEAR_ID]
+            self.dtypes.append((
+                batch, entries(batch, devices.Q_ID),
+                entries(batch, devices.QBAR_ID),
+                [np.array([inputs[device.device_id][port] for device in batch],
+                          dtype=np.int64) for port in ports]))
+
+        # Gates of one level, grouped by kind and number of inputs, and the
+        # feedback components of the level in sweep order
+        self.levels = []
+        level_of = {}
+        for level, gates in enumerate(schedule.levels):
+            for gate in gates:
+                level_of[gate.device_id] = level
+            self.levels.append(({}, []))
+        for component, cyclic in zip(schedule.components, schedule.cyclic):
+            groups, feedback = self.levels[level_of[component[0].device_id]]
+            if cyclic:
+                feedback.append((component, [
+                    (index[(gate.device_id, None)], gate.device_kind,
+                     list(inputs[gate.device_id].values()))
+                    for gate in component]))
+                continue
+            gate = component[0]
+            key = (gate.device_kind, len(gate.inputs))
+            groups.setdefault(key, ([], []))
+            groups[key][0].append(index[(gate.device_id, None)])
+            groups[key][1].append(list(inputs[gate.device_id].values()))
+        self.levels = [([(kind, np.array(gate_outputs, dtype=np.int64),
+                          np.array(gate_inputs, dtype=np.int64))
+                         for (kind, _), (gate_outputs, gate_inputs)
+                         in groups.items()], feedback)
+                       for groups, feedback in self.levels]
+
+    def evaluate_gates(self, values, kind, gate_outputs, gate_inputs):
+        """Evaluate a group of gates of one kind and number of inputs."""
+        devices = self.devices
+        levels = SETTLED[values[gate_inputs]]
+        if kind == devices.AND:
+            target = levels.min(axis=1)
+        elif kind == devices.NAND:
+            target = 1 - levels.min(axis=1)
+        elif kind == devices.OR:
+            target = levels.max(axis=1)
+        elif kind == devices.NOR:
+            target = 1 - levels.max(axis=1)
+        else:  # XOR
+            target = levels[:, 0] ^ levels[:, 1]
+        values[gate_outputs] = UPDATE[values[gate_outputs], target]
+
+    def evaluate_gate(self, values, output, kind, gate_inputs, keep_edges):
+        """Evaluate a single gate of a feedback component.
+
+        Return True if its output changed. As network.Network.evaluate_device()
+        if keep_edges is True, an edge whose target has not changed is kept.
+        """
+        devices = self.devices
+        levels = [int(SETTLED[values[i]]) for i in gate_inputs]
+        if kind == devices.AND:
+            target = min(levels)
+        elif kind == devices.NAND:
+            target = 1 - min(levels)
+        elif kind == devices.OR:
+            target = max(levels)
+        elif kind == devices.NOR:
+            target = 1 - max(levels)
+        else:  # XOR
+            target = levels[0] ^ levels[1]
+        signal = int(values[output])
+        new_signal = int(UPDATE[signal, target])
+        if new_signal == signal or (keep_edges and
+                                    new_signal == SETTLED[signal]):
+            return False
+        values[output] = new_signal
+        return True
+
+    def settle_component(self, values, gates):
+        """Settle a feedback component, as network.Network.settle_component().
+
+        Return [changed, settled], where changed is the set of array entries
+        whose value changed.
+        """
+        changed = set()
+        for output, kind, gate_inputs in gates:
+            if self.evaluate_gate(values, output, kind, gate_inputs, False):
+                changed.add(output)
+        if not changed:
+            return [changed, True]
+        outputs = [output for output, _, _ in gates]
+        detector = LoopDetector()
+        for _ in range(self.network.iteration_limit):
+            settled = True
+            for output, kind, gate_inputs in gates:
+                if self.evaluate_gate(values, output, kind, gate_inputs,
+                                      True):
+                    settled = False
+                    changed.add(output)
+            if settled:
+                return [changed, True]
+            if detector.add(values[outputs].tobytes()):
+                break
+        self.network.add_oscillation([self.outputs[output]
+                                      for output in outputs],
+                                     detector, detector.iterations + 1)
+        return [changed, False]
+
+    def execute_network(self):
+        """Execute the network for one simulation cycle.
+
+        Return True if successful and the network does not oscillate.
+        """
+        network = self.network
+        devices = self.devices
+        if self.device_count != len(devices.devices_list):
+            self.build()
+        if not self.connected:
+            return network.sweep_network()
+
+        network.tick_sources()
+
+        # Only the sources change between cycles, unless the array is new
+        if self.values is None:
+            outputs = self.outputs
+        else:
+            outputs = self.outputs[:self.source_count]
+        try:
+            signals = np.fromiter((device.outputs[output_id]
+                                   for device, output_id in outputs),
+                                  dtype=np.int64, count=len(outputs))
+        except TypeError:
+            signals = None
+        if signals is None or ((signals < 0) | (signals > 3)).any():
+            # A signal is not LOW, HIGH, RISING or FALLING, so the sweep must
+            # fail in exactly its own way
+            self.values = None
+            return network.settle_network()
+        if self.values is None:
+            start = signals.astype(np.int8)
+        else:
+            start = self.values
+            start[:self.source_count] = signals
+        values = start.copy()
+        switch_targets = np.array([0 if device.switch_state == 0 else 1
+                                   for device in self.switches],
+                                  dtype=np.int8)
+        memories = [np.array([device.dtype_memory for device in batch])
+                    for batch, _, _, _ in self.dtypes]
+
+        oscillations = []
+        network.oscillation_reports = []
+        detector = LoopDetector()
+        changed = []
+        steady = True
+        iterations = 0
+        while iterations < network.iteration_limit:
+            iterations += 1
+            last_iteration = iterations == network.iteration_limit
+            before = values.copy()
+            feedback_changed = set()
+
+            values[self.switch_outputs] = UPDATE[
+                values[self.switch_outputs], switch_targets]
+            for memory, (_, q, qbar, ports) in zip(memories, self.dtypes):
+                [clk, data, set_, clear] = [values[port] for port in ports]
+                edge = clk == devices.RISING
+                memory[edge & ((data == 1) | (data == 3))] = devices.HIGH
+                memory[edge & ((data == 0) | (data == 2))] = devices.LOW
+                memory[set_ == devices.HIGH] = devices.HIGH
+                memory[clear == devices.HIGH] = devices.LOW
+                q_target = (memory != devices.LOW).astype(np.int8)
+                qbar_target = (memory != devices.HIGH).astype(np.int8)
+                q_values = UPDATE[values[q], q_target]
+                values[qbar] = UPDATE[values[qbar], qbar_target]
+                values[q] = q_values
+            values[self.clocks] = SETTLED[values[self.clocks]]
+
+            for groups, feedback in self.levels:
+                for kind, gate_outputs, gate_inputs in groups:
+                    self.evaluate_gates(values, kind, gate_outputs,
+                                        gate_inputs)
+                for component, gates in feedback:
+                    [component_changed, settled] = self.settle_component(
+                        values, gates)
+                    if not settled:
+                        oscillations.append(
+                            network.get_component_names(component))
+                    else:
+                        feedback_changed.update(component_changed)
+
+            different = np.flatnonzero(values != before)
+            steady = len(different) == 0 and not feedback_changed
+            if oscillations:
+                steady = False
+                break
+            if steady:
+                break
+            if iterations > 2 and detector.add(
+                    values.tobytes() + b"".join(memory.tobytes()
+                                                for memory in memories)):
+                # The state of the network repeats, as in the sweep
+                oscillations.append(network.get_component_names(
+                    network.add_oscillation(self.outputs, detector,
+                                            iterations)))
+                break
+            if last_iteration:
+                network.add_oscillation(self.outputs, detector, iterations)
+                positions = set(self.owner[different].tolist())
+                positions.update(self.owner[sorted(feedback_changed)].tolist())
+                order = network.schedule.order
+                changed = [order[position]
+                           for position in sorted(positions)]
+                oscillations.append(network.get_component_names(changed))
+
+        for i in np.flatnonzero(values != start).tolist():
+            device, output_id = self.outputs[i]
+            device.outputs[output_id] = int(values[i])
+        for memory, (batch, _, _, _) in zip(memories, self.dtypes):
+            for device, value in zip(batch, memory.tolist()):
+                device.dtype_memory = value
+
+        self.values = values
+
+        network.oscillations = oscillations
+        network.steady_state = steady
+        network.cycles_completed += 1
+        return steady
@@ -0,0 +1,126 @@
+"""Precompute the output waveforms of the clocks, RC and SIGGEN devices.
+
+Used in the Logic Simulator project so that the signal of a source device in
+any cycle, including cycles that have not been simulated yet, is a table
+lookup rather than a step of its state machine.
+
+Classes
+-------
+Waveform - stores the signals of a source device in every cycle.
+"""
+
+# Signal codes, as devices.Devices.signal_types
+LOW, HIGH, RISING, FALLING = range(4)
+
+
+class Waveform:
+
+    """Store the signals of a source device in every cycle.
+
+    The waveform is a list of head signals for the first cycles, followed
+    by a periodic part, given by the levels of one period. The signal in
+    cycle c of the periodic part is the level in position c % period, or
+    RISING or FALLING where it differs from the level before it, so the
+    signal in any cycle is found in constant time. The cycle after each
+    position in which the signal next changes is precomputed too.
+
+    A SIGGEN device has the levels of its waveform, and a head of its first
+    level, as the device starts on it. An RC device has a head of HIGH
+    levels and a FALLING edge, followed by LOW forever. A clock device has
+    half a period of LOW levels followed by half a period of HIGH levels,
+    where cycle 0 is its falling edge (see Network.get_source_signal()).
+
+    Parameters
+    ----------
+    levels: list of the LOW or HIGH levels of one period.
+    head: list of the signals of the cycles before the periodic part.
+
+    Public methods
+    --------------
+    get_level(self, cycle): Returns the level in the cycle.
+
+    get_signal(self, cycle): Returns the signal in the cycle.
+
+    get_next_change(self, cycle): Returns the next cycle after cycle in which
+                                  the signal is RISING or FALLING.
+
+    get_block(self, cycle, cycles): Returns the signals of a block of cycles.
+    """
+
+    def __init__(self, levels, head=None):
+        """Precompute the signal and next change in every position."""
+        self.levels = list(levels)
+        self.head = list(head or [])
+        self.period = len(self.levels)
+
+        # signals[i] is the signal in position i of the periodic part
+        self.signals = []
+        for position, level in enumerate(self.levels):
+            previous = self.levels[position - 1]
+            if level == previous:
+                self.signals.append(level)
+            else:
+                self.signals.append(RISING if level == HIGH else FALLING)
+
+        # gaps[i] is the number of cycles from position i to the next edge
+        self.gaps = [None] * self.period
+        gap = None
+        for position in range(2 * self.period - 1, -1, -1):
+            if self.signals[(position + 1) % self.period] in [RISING, FALLING]:
+                gap = 1
+            elif gap is not None:
+                gap += 1
+            if position < self.period:  # the first pass only finds an edge
+                self.gaps[position] = gap
+
+        # head_changes[i] is the next cycle after i with an edge in the head
+        self.head_changes = [None] * len(self.head)
+        change = None
+        for cycle in range(len(self.head) - 1, -1, -1):
+            self.head_changes[cycle] = change
+            if self.head[cycle] in [RISING, FALLING]:
+                change = cycle
+
+    def get_level(self, cycle):
+        """Return the level (LOW or HIGH) in the cycle."""
+        if cycle < len(self.head):
+            return HIGH if self.head[cycle] in [HIGH, RISING] else LOW
+        return self.levels[cycle % self.period]
+
+    def get_signal(self, cycle):
+        """Return the signal in the cycle."""
+        if cycle < len(self.head):
+            return self.head[cycle]
+        return self.signals[cycle % self.period]
+
+    def get_next_change(self, cycle):
+        """Return the next cycle after cycle in which the signal changes.
+
+        Return None if it never changes again.
+        """
+        head_length = len(self.head)
+        if cycle < head_length:
+            if self.head_changes[cycle] is not None:
+                return self.head_changes[cycle]
+            if self.signals[head_length % self.period] in [RISING, FALLING]:
+                return head_length
+            cycle = head_length
+        gap = self.gaps[cycle % self.period]
+        if gap is None:
+            return None
+        return cycle + gap
+
+    def get_block(self, cycle, cycles):
+        """Return the signals in the block of cycles starting at cycle.
+
+        The block is sliced from the tables, so no Python code runs per
+        cycle.
+        """
+        block = self.head[cycle:cycle + cycles]
+        remaining = cycles - len(block)
+        if remaining > 0:
+            position = max(cycle, len(self.head)) % self.period
+            repeats = (position + remaining) // self.period + 1
+            block.extend((self.signals * repeats)[position:position +
+                                                  remaining])
+        return block
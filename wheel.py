@@ -0,0 +1,200 @@
+"""Schedule the output changes of the clocks, RC and SIGGEN devices.
+
+Used in the Logic Simulator project so that a simulation cycle only touches
+the sources whose outputs change, and so that a cycle in which nothing can
+change is skipped altogether.
+
+Classes
+-------
+TimingWheel - keeps a calendar queue of the upcoming source changes.
+"""
+
+
+class TimingWheel:
+
+    """Keep a calendar queue of the upcoming source changes.
+
+    The calendar maps a cycle to the clocks, RC and SIGGEN devices whose
+    outputs change in that cycle: a clock toggles when its counter reaches
+    its half period, an RC device falls once its switch period has passed,
+    and a SIGGEN device changes where its waveform changes. In every other
+    cycle these devices keep their outputs, so tick() only touches the due
+    devices. Clock counters are not advanced in between: the counter of a
+    clock is worked out from the cycle in which it was last set, and sync()
+    writes every counter back to its device.
+
+    The calendar is built by ticking every source once. It is built again
+    after the schedule is rebuilt or invalidated, after a cold start-up of
+    the devices, or when the cycles completed by the network do not follow
+    on from the last tick (after Network.reset_network(), for example).
+
+    If the last cycle settled, and neither a source nor a switch changes in
+    the next one, then the whole cycle would change nothing, and
+    skip_cycle() skips it. If only switches change, get_changed_switches()
+    returns them, as Devices.set_switch() records them, and only their
+    fanout needs to be executed.
+
+    Parameters
+    ----------
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    sync(self): Writes the clock counters back to the devices.
+
+    invalidate(self): Writes the clock counters back and drops the calendar.
+
+    tick(self): Updates the sources whose outputs change in this cycle.
+
+    end_cycle(self, steady): Records whether the simulated cycle settled.
+
+    get_changed_switches(self): Returns the switches that changed, if
+                                nothing else can change in the current
+                                cycle.
+
+    skip_cycle(self): Returns True if the current cycle can be skipped.
+    """
+
+    def __init__(self, network):
+        """Initialise an empty calendar."""
+        self.network = network
+        self.devices = network.devices
+
+        self.sources = None  # schedule.sources the calendar was built from
+        self.cycle = None  # cycle of the next tick, None if not built
+        self.cold_starts = None  # devices.cold_starts when built
+        self.calendar = {}  # {cycle: [sources whose outputs change]}
+        self.clocks = {}  # {clock: (cycle, counter before its tick)}
+        self.switches = {}  # {switch_id: switch} of the schedule
+        self.switch_states = {}  # {switch_id: state in the last settled cycle}
+        self.settled = False  # True if the last cycle settled
+
+    def is_valid(self):
+        """Return True if the calendar follows on from the last tick."""
+        network = self.network
+        return self.cycle is not None and \
+            self.cycle == network.cycles_completed and \
+            self.sources is network.schedule.sources and \
+            self.cold_starts == self.devices.cold_starts
+
+    def sync(self):
+        """Write the clock counters back to the devices.
+
+        After a cold start-up, the devices hold the new counters, which are
+        kept.
+        """
+        if self.cycle is None or self.cold_starts != self.devices.cold_starts:
+            return
+        for clock, (cycle, counter) in self.clocks.items():
+            clock.clock_counter = counter + self.cycle - cycle
+
+    def invalidate(self):
+        """Write the clock counters back and drop the calendar."""
+        self.sync()
+        self.cycle = None
+        self.calendar = {}
+        self.clocks = {}
+        self.settled = False
+
+    def add(self, device, cycle):
+        """Add a source change to the calendar, unless cycle is None."""
+        if cycle is not None:
+            self.calendar.setdefault(cycle, []).append(device)
+
+    def build(self):
+        """Tick every source once and build the calendar from their states."""
+        network = self.network
+        devices = self.devices
+        self.sync()
+        self.sources = network.schedule.sources
+        self.cold_starts = devices.cold_starts
+        self.calendar = {}
+        self.clocks = {}
+        self.switches = {}
+        self.switch_states = {}
+        self.settled = False
+        devices.changed_switches.clear()  # every switch is executed now
+        cycle = network.cycles_completed
+        for device in self.sources:
+            kind = device.device_kind
+            if kind == devices.SWITCH:
+                self.switches[device.device_id] = device
+                self.switch_states[device.device_id] = device.switch_state
+            elif kind == devices.CLOCK:
+                network.tick_clock(device)
+                counter = device.clock_counter
+                self.clocks[device] = (cycle + 1, counter)
+                if counter <= device.clock_half_period:
+                    self.add(device, cycle + 1 + device.clock_half_period -
+                             counter)
+            elif kind == devices.RC:
+                network.tick_rc(device)
+                self.add(device, device.waveform.get_next_change(cycle))
+            elif kind == devices.SIGGEN:
+                network.tick_siggen(device)
+                self.add(device, device.waveform.get_next_change(cycle))
+        self.cycle = cycle + 1
+
+    def tick(self):
+        """Update the sources whose outputs change in this cycle."""
+        network = self.network
+        devices = self.devices
+        network.sweep_order()  # rebuild the schedule if the network changed
+        if not self.is_valid():
+            self.build()
+            return
+        cycle = self.cycle
+        for device in self.calendar.pop(cycle, []):
+            kind = device.device_kind
+            if kind == devices.CLOCK:
+                half_period = device.clock_half_period
+                device.clock_counter = half_period
+                network.tick_clock(device)
+                self.clocks[device] = (cycle + 1, device.clock_counter)
+                self.add(device, cycle + half_period)
+            else:
+                if kind == devices.RC:
+                    network.tick_rc(device)
+                else:
+                    network.tick_siggen(device)
+                self.add(device, device.waveform.get_next_change(cycle))
+        self.cycle = cycle + 1
+
+    def end_cycle(self, steady):
+        """Record whether the simulated cycle completed and settled."""
+        self.settled = steady and self.is_valid()
+        if self.settled:
+            changed_switches = self.devices.changed_switches
+            for switch_id in changed_switches:
+                if switch_id in self.switches:
+                    self.switch_states[switch_id] = \
+                        self.switches[switch_id].switch_state
+            changed_switches.clear()
+
+    def get_changed_switches(self):
+        """Return the switches set to a new state since the last cycle.
+
+        Return None unless the last cycle settled and no source changes in
+        the current cycle, since every device must be executed then.
+        """
+        network = self.network
+        if not self.settled or not self.is_valid() or \
+                self.cycle in self.calendar or \
+                network.schedule.is_stale():
+            return None
+        return [self.switches[switch_id]
+                for switch_id in self.devices.changed_switches
+                if switch_id in self.switches and
+                self.switches[switch_id].switch_state !=
+                self.switch_states[switch_id]]
+
+    def skip_cycle(self):
+        """Return True if nothing can change in the current cycle.
+
+        The cycle is then counted as ticked, and the network only needs to
+        count it as completed.
+        """
+        if self.get_changed_switches() != []:
+            return False
+        self.cycle += 1
+        return True